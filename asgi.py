@@ -0,0 +1,150 @@
+"""
+Asynchronous Server Gateway Interface entry-point.
+
+Serves simple searches as JSON using :class:`.AsyncSearchSession`, so that a
+single worker process can have many searches in flight at once. Accepts the
+same parameters as the simple search form (``searchtype``, ``query``,
+``order``) plus ``start`` and ``size`` for pagination. Configuration is read
+from :mod:`search.config`, as for the WSGI app.
+
+Run with any ASGI server, e.g. ``uvicorn asgi:application``. Connections
+for other protocols (e.g. WebSockets) are closed.
+"""
+
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from werkzeug.datastructures import MultiDict
+
+from arxiv import status
+from arxiv.base import logging
+from search import config
+from search.controllers.simple import query_from_form
+from search.controllers.simple.forms import SimpleSearchForm
+from search.controllers.util import paginate
+from search.domain import asdict
+from search.services.index import IndexConnectionError, QueryError, \
+    OutsideAllowedRange, init_app
+from search.services.index.aio import AsyncSearchSession, get_async_session
+
+logger = logging.getLogger(__name__)
+
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+
+__session__: Optional[AsyncSearchSession] = None
+"""The search session for this worker process."""
+
+
+def get_config() -> Dict[str, Any]:
+    """
+    Get the configuration for this worker process.
+
+    This is loaded from :mod:`search.config`, which maps the variables set by
+    the deployment (e.g. ``ELASTICSEARCH_SERVICE_HOST``) to the names used by
+    the services.
+    """
+    return {key: value for key, value in vars(config).items()
+            if key.isupper()}
+
+
+def get_session() -> AsyncSearchSession:
+    """Get the search session for this worker process."""
+    global __session__
+    if __session__ is None:
+        app_config = get_config()
+        init_app(app_config)
+        __session__ = get_async_session(app_config)
+    return __session__
+
+
+def _validate_page(form: SimpleSearchForm,
+                   params: MultiDict) -> Dict[str, List[str]]:
+    """Check the pagination parameters, and get any errors by parameter."""
+    errors: Dict[str, List[str]] = {}
+    try:
+        if int(params.get('start', 0)) < 0:
+            errors['start'] = ['Must not be negative.']
+    except ValueError:
+        errors['start'] = ['Not a valid integer.']
+    if str(params.get('size', 50)) not in dict(form.size.choices):
+        errors['size'] = ['Not a valid choice.']
+    return errors
+
+
+async def search(params: MultiDict) -> Tuple[Dict[str, Any], int]:
+    """Perform a simple search, and get the response data and status."""
+    form = SimpleSearchForm(params)
+    if not form.validate():
+        return {'errors': form.errors}, status.HTTP_400_BAD_REQUEST
+    errors = _validate_page(form, params)
+    if errors:
+        return {'errors': errors}, status.HTTP_400_BAD_REQUEST
+    query = paginate(query_from_form(form), params)
+    try:
+        document_set = await get_session().search(query)
+    except OutsideAllowedRange as e:
+        return {'errors': str(e)}, status.HTTP_400_BAD_REQUEST
+    except (IndexConnectionError, QueryError) as e:
+        logger.error('%s: %s', type(e).__name__, e)
+        return ({'errors': 'There was a problem executing your query'},
+                status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return asdict(document_set), status.HTTP_200_OK
+
+
+async def _respond(send: Send, data: Dict[str, Any], code: int,
+                   head: bool = False) -> None:
+    body = json.dumps(data, default=str).encode('utf-8')
+    await send({'type': 'http.response.start', 'status': code,
+                'headers': [(b'content-type', b'application/json'),
+                            (b'content-length', str(len(body)).encode())]})
+    # A response to a HEAD request has the headers of the GET response only.
+    await send({'type': 'http.response.body', 'body': b'' if head else body})
+
+
+async def _lifespan(receive: Receive, send: Send) -> None:
+    global __session__
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                get_session()
+            except IndexConnectionError as e:
+                await send({'type': 'lifespan.startup.failed',
+                            'message': str(e)})
+                return
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if __session__ is not None:
+                await __session__.close()
+                __session__ = None
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope: Dict[str, Any], receive: Receive,
+                      send: Send) -> None:
+    """ASGI application, with one search session per worker process."""
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] == 'websocket':
+        await receive()     # The ``websocket.connect`` message.
+        await send({'type': 'websocket.close', 'code': 1003})
+        return
+    if scope['type'] != 'http':
+        logger.warning('Unsupported scope: %s', scope['type'])
+        return
+    head = scope['method'] == 'HEAD'
+    if scope['method'] not in ('GET', 'HEAD'):
+        await _respond(send, {'errors': 'Method not allowed'},
+                       status.HTTP_405_METHOD_NOT_ALLOWED)
+        return
+    if scope['path'].rstrip('/') not in ('', '/search'):
+        await _respond(send, {'errors': 'Not found'},
+                       status.HTTP_404_NOT_FOUND, head=head)
+        return
+    params = MultiDict(parse_qsl(scope['query_string'].decode('latin-1')))
+    data, code = await search(params)
+    await _respond(send, data, code, head=head)
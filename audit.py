@@ -1,58 +1,78 @@
 """Check for missing papers in the index."""
 
-import time
 import os
-import csv
-from multiprocessing import Pool
-from functools import reduce
-from operator import concat
-from typing import List, Tuple
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Deque, Dict, Iterable, Iterator, List
 
 import click
 
 from search.factory import create_ui_web_app
+from search.services import index
 
 app = create_ui_web_app()
 
 
-def exists(chunk: List[str]) -> List[Tuple[str, bool]]:
-    """
-    Check the status of a chunk of paper IDs.
+def read_ids(id_list: str) -> Iterator[str]:
+    """Lazily read paper IDs (one per line) from a file."""
+    with open(id_list) as f:
+        for line in f:
+            ident = line.strip().split(',')[0]
+            if ident:
+                yield ident
 
-    Parameters
-    ----------
-    chunk : list
-        Each item should be a paper ID with a version affix.
 
-    Returns
-    -------
-    list
-        Items are paper ID, bool (exists) tuples.
+def batches(idents: Iterable[str], batch_size: int) -> Iterator[List[str]]:
+    """Group paper IDs into lists of at most ``batch_size``."""
+    idents = iter(idents)
+    while True:
+        batch = list(islice(idents, batch_size))
+        if not batch:
+            return
+        yield batch
 
+
+def missing(session: index.SearchSession, idents: Iterable[str],
+            batch_size: int = 5_000, n_workers: int = 4) -> Iterator[str]:
     """
-    with app.app_context():
-        from search.services import index
-        status = []
-        for ident in chunk:
-            time.sleep(0.05)    # TODO: make this configurable?
-            status.append((ident, index.exists(ident)))
-        return status
+    Generate the paper IDs in ``idents`` that are not in the index.
+
+    Each batch is checked with a single multi-get request (see
+    :meth:`.SearchSession.bulk_exists`). Up to ``n_workers`` batches are
+    checked at once, and results are generated in the order of ``idents``.
+    Only a bounded number of batches are held in memory at any time.
+    """
+    pending: Deque[Future] = deque()
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        for batch in batches(idents, batch_size):
+            pending.append(executor.submit(session.bulk_exists, batch))
+            if len(pending) >= 2 * n_workers:
+                yield from _missing(pending.popleft().result())
+        while pending:
+            yield from _missing(pending.popleft().result())
+
+
+def _missing(status: Dict[str, bool]) -> Iterator[str]:
+    return (ident for ident, exists in status.items() if not exists)
 
 
 @app.cli.command()
 @click.option('--id_list', '-l',
               help="Index paper IDs in a file (one ID per line)")
-@click.option('--batch-size', '-b', type=int, default=1_600,
-              help="Number of records to process each iteration")
-@click.option('--n-workers', '-n', type=int, default=8, help="Num of workers")
+@click.option('--batch-size', '-b', type=int, default=5_000,
+              help="Number of paper IDs to check in each request")
+@click.option('--n-workers', '-n', type=int, default=4,
+              help="Number of concurrent requests")
 @click.option('--output', '-o', help="File in which missing IDs are stored")
 def audit(id_list: str, batch_size: int, n_workers: int, output: str):
     """
     Check the index for missing papers.
 
-    Uses HEAD requests to the document endpoint using each paper ID in the
-    provided list. Uses multiprocessing with a configurable number of worker
-    processes to speed things up.
+    Paper IDs are read from the provided list and checked in batches, using
+    one multi-get request per batch. Missing paper IDs are written to the
+    output file as they are found, so neither the input nor the results need
+    to fit in memory.
 
     Parameters
     ----------
@@ -60,55 +80,36 @@ def audit(id_list: str, batch_size: int, n_workers: int, output: str):
         Should be a path to a file with paper IDs. There should be one paper ID
         per line. Paper IDs should include version affixes.
     batch_size : int
-        Number of records per batch. Each batch is divided into equal chunks
-        and distributed across workers. Smaller batches mean more frequent
-        updates/checkpoints. Must be divisible by the number of workers.
-        Default: 1,600.
+        Number of paper IDs per request. Default: 5,000.
     n_workers : int
-        Number of worker processes to run for each batch. Default: 8.
+        Number of requests to run concurrently. Default: 4.
     output : str
         Path to a file into which to deposit paper IDs not found in the index.
 
     """
-    if batch_size % n_workers > 0:
-        raise click.ClickException(
-            "batch size must be divisible by the number of workers"
-        )
-    chunk_size = int(round(batch_size/n_workers))
-
     if not os.path.exists(id_list):
         raise click.ClickException("no such file")
 
-    # Load paper IDs to check.
     with open(id_list) as f:
-        data = [row[0] for row in csv.reader(f)]
-
-    # Create the output file.
-    with open(output, 'w') as f:
-        f.write('')
-
-    N_results = 0
-    N_total = len(data)
-
-    with click.progressbar(length=N_total, label='Papers checked') as bar:
-        # We do this in batches, so that we can track and save as we go.
-        for i in range(0, len(data), batch_size):
-            batch = data[i:i + batch_size]
-            chunks = [batch[c:c + chunk_size]
-                      for c in range(0, batch_size, chunk_size)]
-
-            with Pool(n_workers) as p:
-                results = reduce(concat, p.map(exists, chunks))
-
-            # Write one missing paper ID per line.
-            with open(output, 'a') as f:       # Append to output file.
-                for ident, status in results:
-                    if status:
-                        continue
-                    f.write(f'{ident}\n')
-
-            N_results += len(results)
-            bar.update(N_results)
+        N_total = sum(1 for line in f if line.strip())
+
+    with app.app_context():
+        session = index.current_session()
+
+    N_missing = 0
+    with open(output, 'w', buffering=1) as f:     # Line-buffered.
+        with click.progressbar(length=N_total, label='Papers checked') as bar:
+            def _checked(idents: Iterable[str]) -> Iterator[str]:
+                for ident in idents:
+                    bar.update(1)
+                    yield ident
+
+            # Progress reflects IDs handed off for checking.
+            for ident in missing(session, _checked(read_ids(id_list)),
+                                 batch_size=batch_size, n_workers=n_workers):
+                f.write(f'{ident}\n')
+                N_missing += 1
+    click.echo(f'{N_missing} of {N_total} papers are missing')
 
 
 if __name__ == '__main__':
@@ -0,0 +1 @@
+"""Performance benchmarks for the search service and indexing tools."""
@@ -0,0 +1,81 @@
+"""
+Compare the memory use and construction time of slotted domain objects.
+
+:class:`.DocMeta` and :class:`.Document` are measured against otherwise
+identical dataclasses that keep their fields in a per-instance ``__dict__``.
+
+Run from the project root with ``python -m benchmarks.domain_objects``.
+"""
+
+import json
+import os
+import timeit
+import tracemalloc
+from dataclasses import MISSING, field, fields, make_dataclass
+from typing import Any, Callable, Dict, List
+
+from search.domain import DocMeta, Document
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'tests', 'data',
+                    'examples', '1404.3450.json')
+
+
+def _unslotted(cls: type) -> type:
+    """Make an equivalent dataclass without ``__slots__``."""
+    spec = []
+    for f in fields(cls):
+        factory = f.default_factory     # type: ignore
+        if factory is not MISSING:
+            spec.append((f.name, f.type, field(default_factory=factory)))
+        else:
+            spec.append((f.name, f.type, field(default=f.default)))
+    namespace = {'__post_init__': cls.__dict__['__post_init__']} \
+        if '__post_init__' in cls.__dict__ else {}
+    return make_dataclass(cls.__name__, spec, namespace=namespace)
+
+
+def _bytes_per_object(factory: Callable[[], Any], number: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects: List[Any] = [factory() for _ in range(number)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    used = sum(stat.size_diff for stat in after.compare_to(before, 'lineno'))
+    del objects
+    return used / number
+
+
+def _report(name: str, before: Callable[[], Any], after: Callable[[], Any],
+            number: int) -> None:
+    print(f'{name}:')
+    for label, factory in (('dict', before), ('slots', after)):
+        size = _bytes_per_object(factory, number)
+        took = min(timeit.repeat(factory, number=number, repeat=5)) / number
+        print(f'  {label:6} {size:8.0f} bytes/object'
+              f' {took * 1e6:8.2f} us/object')
+
+
+def main(number: int = 20_000) -> None:
+    """Report bytes and microseconds per object for each variant."""
+    with open(DATA) as f:
+        data: Dict[str, Any] = json.load(f)
+    data['unknown_field'] = 'ignored by from_dict'
+    known = {k: v for k, v in data.items() if k != 'unknown_field'}
+
+    PlainDocMeta = _unslotted(DocMeta)
+    PlainDocument = _unslotted(Document)
+    # Decoded from JSON, like the ``_source`` of an indexed document.
+    doc = json.loads(json.dumps({
+        'paper_id': known['paper_id'], 'title': known['title'],
+        'abstract': known['abstract'], 'latest': known['paper_id'] + 'v4',
+        'version': 4, 'formats': known['formats']
+    }))
+
+    _report('DocMeta', lambda: PlainDocMeta(**known),
+            lambda: DocMeta.from_dict(data), number)
+    _report('Document', lambda: PlainDocument(**doc),
+            lambda: Document.from_dict(doc), number)
+
+
+if __name__ == '__main__':
+    main()
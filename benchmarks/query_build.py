@@ -0,0 +1,47 @@
+"""
+Measure the time to build a search request body, with and without caching.
+
+Run from the project root with ``python -m benchmarks.query_build``.
+"""
+
+import timeit
+
+from elasticsearch_dsl import Search
+
+from search.domain import SimpleQuery
+from search.services.index import prepare
+from search.services.index.simple import simple_search
+from search.services.index.highlighting import highlight
+
+TERMS = ['quantum gravity', 'dark matter 1902', '"black hole" entropy',
+         'Bloggs, J', 'neural network*', '$\\alpha$ decay']
+
+
+def _uncached() -> None:
+    """Build each query from scratch, as before caching was introduced."""
+    for term in TERMS:
+        search = Search().filter("term", is_current=True)
+        search = search.query(prepare._query_all_fields(term))
+        highlight(search).to_dict()
+
+
+def _cached() -> None:
+    for term in TERMS:
+        query = SimpleQuery(search_field='all', value=term)
+        highlight(simple_search(Search(), query)).to_dict()
+
+
+def main(number: int = 200) -> None:
+    """Report the mean time (ms) to build each request body."""
+    n_requests = number * len(TERMS)
+    before = timeit.timeit(_uncached, number=number) / n_requests
+    after = timeit.timeit(_cached, number=number) / n_requests
+    info = prepare.query_cache_info()['all']
+    print(f'uncached: {before * 1000:.3f} ms/request')
+    print(f'cached:   {after * 1000:.3f} ms/request')
+    print(f'hit rate: {info["hit_rate"]:.3f};'
+          f' mean build time {info["mean_build_time"] * 1000:.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
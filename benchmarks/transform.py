@@ -0,0 +1,91 @@
+"""
+Measure the throughput of transforming DocMeta into search documents.
+
+Compares the original per-document interpretation of the transformation
+table (without the cache of normalized author names) with
+:func:`.transform.to_search_documents`, for a batch of papers by a large
+collaboration (the same authors on every paper).
+
+Run from the project root with ``python -m benchmarks.transform``.
+"""
+
+import copy
+import json
+import os
+import time
+from typing import Callable, List
+
+from search.domain import DocMeta, Document
+from search.process import transform
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'tests', 'data',
+                    'docmeta_bulk.json')
+
+
+def _interpreted(metadata: List[DocMeta]) -> List[Document]:
+    """Transform each document by walking the table, as before compiling."""
+    cached = transform._normalizeName
+    transform._normalizeName = cached.__wrapped__     # type: ignore
+    try:
+        return _walk_table(metadata)
+    finally:
+        transform._normalizeName = cached   # type: ignore
+
+
+def _walk_table(metadata: List[DocMeta]) -> List[Document]:
+    documents = []
+    for meta in metadata:
+        data = {}
+        for key, source, is_required in transform._transformations:
+            if isinstance(source, str):
+                value = getattr(meta, source, None)
+            else:
+                value = source(meta)    # type: ignore
+            if value is None and not is_required:
+                continue
+            data[key] = value
+        documents.append(Document(**data))  # type: ignore
+    return documents
+
+
+def _collaboration(n_papers: int, n_authors: int) -> List[DocMeta]:
+    with open(DATA) as f:
+        template = DocMeta.from_dict(json.load(f)[0])
+    authors = [[f'A. B. {i}', f'Physicist{i}', ''] for i in range(n_authors)]
+    metadata = []
+    for i in range(n_papers):
+        meta = copy.deepcopy(template)
+        meta.paper_id = f'1801.{i:05d}'
+        meta.authors_parsed = [{'first_name': first, 'last_name': last,
+                                'suffix': suffix}
+                               for first, last, suffix in authors]
+        metadata.append(meta)
+    return metadata
+
+
+def _rate(func: Callable[[List[DocMeta]], List[Document]],
+          n_papers: int, n_authors: int, repeat: int = 3) -> float:
+    best = 0.
+    for _ in range(repeat):
+        metadata = _collaboration(n_papers, n_authors)
+        start = time.perf_counter()
+        func(metadata)
+        best = max(best, n_papers / (time.perf_counter() - start))
+    return best
+
+
+def main(n_papers: int = 200) -> None:
+    """Report docs/sec for typical and collaboration-sized author lists."""
+    for n_authors in (5, 3000):
+        before = _rate(_interpreted, n_papers, n_authors)
+        transform._normalizeName.cache_clear()
+        after = _rate(transform.to_search_documents, n_papers, n_authors)
+        info = transform.name_cache_info()
+        print(f'{n_authors} authors/paper:')
+        print(f'  per document: {before:10.1f} docs/sec')
+        print(f'  batch:        {after:10.1f} docs/sec'
+              f' (name cache hit rate {info["hit_rate"]:.3f})')
+
+
+if __name__ == '__main__':
+    main()
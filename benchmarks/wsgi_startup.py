@@ -0,0 +1,43 @@
+"""
+Compare per-request cost of the WSGI entry-point with and without app caching.
+
+Run from the project root with ``python -m benchmarks.wsgi_startup``.
+"""
+
+import os
+import timeit
+
+from werkzeug.test import EnvironBuilder
+
+import wsgi
+from search.factory import create_ui_web_app
+
+ENVIRON = dict(os.environ, **EnvironBuilder(path='/foo').get_environ())
+
+
+def _start_response(status: str, headers: list) -> None:
+    pass
+
+
+def _per_request_factory() -> None:
+    """The old behavior: build a new app for every request."""
+    environ = dict(ENVIRON)
+    b''.join(create_ui_web_app()(environ, _start_response))
+
+
+def _cached() -> None:
+    environ = dict(ENVIRON)
+    b''.join(wsgi.application(environ, _start_response))
+
+
+def main(number: int = 200) -> None:
+    """Report the mean time (ms) per request for both entry-points."""
+    before = timeit.timeit(_per_request_factory, number=number) / number
+    after = timeit.timeit(_cached, number=number) / number
+    print(f'app per request: {before * 1000:.3f} ms/request')
+    print(f'app per worker:  {after * 1000:.3f} ms/request')
+    print(f'speedup:         {before / after:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
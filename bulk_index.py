@@ -4,15 +4,17 @@ import json
 import os
 import tempfile
 import click
-from itertools import islice, groupby
-from typing import List
+from contextlib import ExitStack
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
 import re
 from search.factory import create_ui_web_app
 from search.agent import MetadataRecordProcessor, DocumentFailed, \
     IndexingFailed
-from search.domain import asdict, DocMeta, Document
-from search.services import metadata, index
-from search.process import transform
+from search.domain import to_json, DocMeta, Document
+from search.services import metadata, index, docmeta_store
+from search.services.docmeta_store import DocMetaStore
+from search.process import pipeline
 
 app = create_ui_web_app()
 
@@ -29,11 +31,48 @@ app = create_ui_web_app()
                    " preempt checking for new versions of papers that are"
                    " in the cache.")
 @click.option('--cache-dir', '-c', help="Specify the cache directory.")
+@click.option('--compact-cache', is_flag=True,
+              help="Reclaim unused space in the cache when finished.")
+@click.option('--n-fetchers', type=int, default=4,
+              help="Number of concurrent metadata requests.")
+@click.option('--n-transformers', type=int, default=os.cpu_count() or 1,
+              help="Number of transformation processes (0 to transform in"
+                   " the main process).")
+@click.option('--n-indexers', type=int, default=4,
+              help="Number of concurrent bulk indexing requests.")
+@click.option('--bulk-load', is_flag=True,
+              help="Tune the index for ingest while indexing, and restore its"
+                   " settings afterward. Searches will not see new papers"
+                   " until indexing is finished.")
+@click.option('--force-merge/--no-force-merge', default=True,
+              help="Merge index segments at the end of a bulk load.")
+@click.option('--recover', is_flag=True,
+              help="With --bulk-load, first restore the settings left by an"
+                   " interrupted bulk load. Only use this if no other bulk"
+                   " load is running.")
 def populate(print_indexable: bool, paper_id: str, id_list: str,
-             load_cache: bool, cache_dir: str) -> None:
-    """Populate the search index with some test data."""
+             load_cache: bool, cache_dir: str, compact_cache: bool,
+             n_fetchers: int, n_transformers: int, n_indexers: int,
+             bulk_load: bool, force_merge: bool, recover: bool) -> None:
+    """
+    Populate the search index with some test data.
+
+    Metadata retrieval, transformation, and indexing run concurrently as
+    stages of a pipeline (see :mod:`search.process.pipeline`), so that the
+    rate of indexing is limited by the cluster rather than by waiting on each
+    stage in turn.
+
+    With ``--bulk-load``, the index is put in bulk load mode (see
+    :meth:`.SearchSession.bulk_load_mode`) for the duration. This fails if
+    the index is already in bulk load mode, unless ``--recover`` is given.
+    Otherwise, a warning is shown if the index was left in bulk load mode.
+    """
+    if not bulk_load and index.check_bulk_load_mode():
+        click.echo("The index is in bulk load mode, so new papers will not be"
+                   " searchable; if no bulk load is running, use"
+                   " restore_settings")
     cache_dir = init_cache(cache_dir)
-    index_count = 0
+    cache = open_cache(cache_dir)
     if paper_id:    # Index a single paper.
         TO_INDEX = [paper_id]
     elif id_list:   # Index a list of papers.
@@ -44,65 +83,101 @@ def populate(print_indexable: bool, paper_id: str, id_list: str,
 
     retrieve_chunk_size = 50
     index_chunk_size = 250
-    chunk: List[str] = []
-    meta: List[DocMeta] = []
-
-    try:
-        with click.progressbar(length=approx_size,
-                               label='Papers indexed') as index_bar:
-            last = len(TO_INDEX) - 1
-            for i, paper_id in enumerate(TO_INDEX):
-                this_meta = []
-                if load_cache:
-                    try:
-                        this_meta = from_cache(cache_dir, paper_id)
-                    except RuntimeError as e:    # No document.
-                        pass
-
-                if this_meta:
-                    meta += this_meta
+    session = metadata.current_session()
+    throughput = pipeline.Throughput()
+
+    def retrieve_new(paper_ids: List[str]) -> Dict[str, List[DocMeta]]:
+        """Retrieve metadata from the docmeta service, grouped by paper."""
+        new_meta: Dict[str, List[DocMeta]] = {}
+        # Metadata are decoded as the response is read; see
+        # DocMetaSession.iter_bulk_retrieve.
+        for docmeta in session.iter_bulk_retrieve(paper_ids):
+            new_meta.setdefault(docmeta.paper_id, []).append(docmeta)
+        return new_meta
+
+    def retrieve(paper_ids: List[str]) -> List[DocMeta]:
+        """Retrieve metadata from the cache, or from the docmeta service."""
+        meta: List[DocMeta] = []
+        chunk = paper_ids
+        if load_cache:
+            cached = cache.get_many(paper_ids)
+            chunk = []
+            for paper_id in paper_ids:
+                if paper_id in cached:
+                    meta += cached[paper_id]
                 else:
                     chunk.append(paper_id)
+        if chunk:
+            try:
+                new_meta = retrieve_new(chunk)
+            except metadata.ConnectionFailed as e:  # Try again.
+                new_meta = retrieve_new(chunk)
+            # Add metadata to the cache.
+            cache.put_many(new_meta)
+            for versions in new_meta.values():
+                meta += versions
+        return meta
+
+    def echo(documents: Iterable[Document]) -> Iterator[Document]:
+        for document in documents:
+            click.echo(to_json(document))
+            yield document
+
+    batches = pipeline.fetch(TO_INDEX, retrieve, n_workers=n_fetchers,
+                             chunk_size=retrieve_chunk_size)
+    transformed = pipeline.Throughput()
+    documents = pipeline.transform_all(batches, n_workers=n_transformers,
+                                       throughput=transformed)
+    if print_indexable:
+        documents = echo(documents)
 
-                if len(chunk) == retrieve_chunk_size or i == last:
-                    try:
-                        new_meta = metadata.bulk_retrieve(chunk)
-                    except metadata.ConnectionFailed as e:  # Try again.
-                        new_meta = metadata.bulk_retrieve(chunk)
-                    # Add metadata to the cache.
-                    key = lambda dm: dm.paper_id
-                    new_meta_srt = sorted(new_meta, key=key)
-                    for paper_id, grp in groupby(new_meta_srt, key):
-                        to_cache(cache_dir, paper_id, [dm for dm in grp])
-                    meta += new_meta
-                    chunk = []
-
-                # Index papers on a different chunk cycle, and at the very end.
-                if len(meta) >= index_chunk_size or i == last:
-                    # Transform to Document.
-                    documents = [
-                        transform.to_search_document(dm) for dm in meta
-                    ]
-                    # Add to index.
-                    index.bulk_add_documents(documents)
-
-                    if print_indexable:
-                        for document in documents:
-                            click.echo(json.dumps(asdict(document)))
-                    index_count += len(documents)
-                    meta = []
-                    index_bar.update(i)
+    try:
+        with ExitStack() as stack:
+            if bulk_load:
+                stack.enter_context(
+                    index.bulk_load_mode(force_merge=force_merge,
+                                         recover=recover)
+                )
+            with click.progressbar(length=approx_size,
+                                   label='Papers indexed') as index_bar:
+                last_paper_id: Optional[str] = None
+                for ident in index.parallel_bulk_add_documents(
+                        documents, docs_per_chunk=index_chunk_size,
+                        thread_count=n_indexers):
+                    throughput.update()
+                    # Progress is in papers, of which there may be several
+                    # versions.
+                    paper_id = ident.rsplit('v', 1)[0]
+                    if paper_id != last_paper_id:
+                        index_bar.update(1)
+                        last_paper_id = paper_id
 
     except Exception as e:
         raise RuntimeError('Populate failed: %s' % str(e)) from e
 
     finally:
-        click.echo(f"Indexed {index_count} documents in total")
+        click.echo(f"Transformed {transformed.count} documents"
+                   f" ({transformed.rate:.1f} docs/sec)")
+        click.echo(f"Indexed {throughput.count} documents in"
+                   f" {throughput.elapsed:.1f}s"
+                   f" ({throughput.rate:.1f} docs/sec)")
+        if compact_cache:
+            cache.compact()
+        cache.close()
         click.echo(f"Cache path: {cache_dir}; use `-c {cache_dir}` to reuse in"
                    f" subsequent calls")
 
 
-def init_cache(cache_dir: str) -> None:
+@app.cli.command('restore_settings')
+def restore_settings() -> None:
+    """Restore the settings of the index after an interrupted bulk load."""
+    if index.restore_settings():
+        click.echo("Restored index settings")
+    else:
+        click.echo("Nothing to restore")
+
+
+def init_cache(cache_dir: str) -> str:
     """Configure the processor to use a local cache for docmeta."""
     # Create cache directory if it doesn't exist
     if not (cache_dir and os.path.exists(cache_dir)
@@ -111,59 +186,21 @@ def init_cache(cache_dir: str) -> None:
     return cache_dir
 
 
-def from_cache(cache_dir: str, arxiv_id: str) -> List[DocMeta]:
+def open_cache(cache_dir: str) -> DocMetaStore:
     """
-    Get the docmeta document from a local cache, if available.
-
-    Parameters
-    ----------
-    arxiv_id : str
-
-    Returns
-    -------
-    :class:`.DocMeta`
+    Open the docmeta store in ``cache_dir``.
 
-    Raises
-    ------
-    RuntimeError
-        Raised when the cache is not available, or the document could not
-        be found in the cache.
-
-    """
-    fname = '%s.json' % arxiv_id.replace('/', '_')
-    cache_path = os.path.join(cache_dir, fname)
-    if not os.path.exists(cache_path):
-        raise RuntimeError('No cached document')
-
-    with open(cache_path) as f:
-        data: dict = json.load(f)
-        return [DocMeta(**datum) for datum in data]  # type: ignore
-        # See https://github.com/python/mypy/issues/3937
-
-
-def to_cache(cache_dir: str, arxiv_id: str, docmeta: List[DocMeta]) -> None:
+    Caches written by earlier versions of this script, with one JSON file per
+    paper, are imported into the store the first time it is opened.
     """
-    Add a document to the local cache, if available.
-
-    Parameters
-    ----------
-    arxiv_id : str
-    docmeta : :class:`.DocMeta`
-
-    Raises
-    ------
-    RuntimeError
-        Raised when the cache is not available, or the document could not
-        be added to the cache.
-
-    """
-    fname = '%s.json' % arxiv_id.replace('/', '_')
-    cache_path = os.path.join(cache_dir, fname)
-    try:
-        with open(cache_path, 'w') as f:
-            json.dump([asdict(dm) for dm in docmeta], f)
-    except Exception as e:
-        raise RuntimeError(str(e)) from e
+    new_store = not os.path.exists(os.path.join(cache_dir,
+                                                docmeta_store.FILENAME))
+    store = DocMetaStore(cache_dir)
+    if new_store:
+        imported = store.import_json_dir(cache_dir)
+        if imported:
+            click.echo(f"Imported {imported} papers from JSON cache files")
+    return store
 
 
 def load_id_list(path: str) -> List[str]:
@@ -9,7 +9,7 @@ app = create_ui_web_app()
 app.app_context().push()
 
 
-@app.cli.command()
+@app.cli.command('create_index')
 def create_index():
     """Initialize the search index."""
     index.current_session().create_index()
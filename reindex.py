@@ -49,5 +49,44 @@ def reindex(old_index: str, new_index: str):
             time.sleep(2)
 
 
+@app.cli.command()
+@click.argument('new_index', nargs=1)
+@click.option('--alias', '-a', help="Alias to rebuild (default: the"
+                                    " configured index).")
+@click.option('--slices', '-s', default='auto',
+              help="Number of slices to copy in parallel, or 'auto' for one"
+                   " per shard.")
+@click.option('--no-tune', is_flag=True,
+              help="Keep the refresh interval and replicas of the new index"
+                   " while copying.")
+@click.option('--replace-index', is_flag=True,
+              help="If the alias is still the name of an index, delete that"
+                   " index once it has been copied.")
+def rebuild(new_index: str, alias: str, slices: str, no_tune: bool,
+            replace_index: bool):
+    """
+    Copy the documents behind an alias to `new_index`, then move the alias.
+
+    Searches are served from the current index until the copy is complete.
+    If the alias is still the name of an index, that index is only replaced
+    by the alias with `--replace-index`.
+    """
+    click.echo(f"Rebuild `{alias or 'the search index'}` as `{new_index}`")
+
+    def report(progress: index.ReindexProgress) -> None:
+        click.echo(f"\r{progress}", nl=False)
+
+    try:
+        final = index.rebuild_index(
+            new_index, alias=alias,
+            slices=int(slices) if slices.isdigit() else slices,
+            tune=not no_tune, progress=report, delete_old=replace_index
+        )
+    except (index.IndexNotFound, index.NotAnAlias, index.IndexingError) as e:
+        raise click.ClickException(str(e)) from e
+    click.echo(f"\nCopied {final.done} documents in {final.elapsed:.1f}s"
+               f" ({final.rate:.1f} docs/sec)")
+
+
 if __name__ == '__main__':
     reindex()
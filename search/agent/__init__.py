@@ -15,8 +15,10 @@ import warnings
 from flask import current_app as app
 
 from arxiv.base import logging
-from .consumer import MetadataRecordProcessor, DocumentFailed, IndexingFailed
-from .base import CheckpointManager
+from search.services import index
+from .consumer import MetadataRecordProcessor, DocumentFailed, \
+    IndexingFailed
+from .base import CheckpointManager, BaseConsumer, ShardCoordinator
 
 logger = logging.getLogger(__name__)
 logger.propagate = False
@@ -32,7 +34,17 @@ def process_stream(duration: Optional[int] = None) -> None:
         Time (in seconds) to run record processing. If None (default), will
         run "forever".
 
+    If ``KINESIS_SHARD_ID`` is ``*``, all of the shards of the stream are
+    consumed in parallel (see :class:`.ShardCoordinator`). A warning is
+    logged if the index was left tuned for a bulk load, since papers indexed
+    by the agent will not be searchable until its settings are restored.
+
     """
+    try:
+        index.check_bulk_load_mode()
+    except index.IndexConnectionError as e:
+        logger.warning(f'Could not check the index settings: {e}')
+
     # We use the Flask application instance for configuration, and to manage
     # integrations with metadata service, search index.
     with warnings.catch_warnings():     # boto3 is notoriously annoying.
@@ -44,22 +56,49 @@ def process_stream(duration: Optional[int] = None) -> None:
         if start_type == 'AT_TIMESTAMP' and not start_at:
             start_at = datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
 
-        processor = MetadataRecordProcessor(
-            app.config['KINESIS_STREAM'],
-            app.config['KINESIS_SHARD_ID'],
-            app.config['AWS_ACCESS_KEY_ID'],
-            app.config['AWS_SECRET_ACCESS_KEY'],
-            app.config['AWS_REGION'],
-            CheckpointManager(
-                app.config['KINESIS_CHECKPOINT_VOLUME'],
-                app.config['KINESIS_STREAM'],
-                app.config['KINESIS_SHARD_ID'],
-            ),
+        params = dict(
+            access_key=app.config['AWS_ACCESS_KEY_ID'],
+            secret_key=app.config['AWS_SECRET_ACCESS_KEY'],
+            region=app.config['AWS_REGION'],
             endpoint=app.config.get('KINESIS_ENDPOINT', None),
-            verify=app.config.get('KINESIS_VERIFY', 'true') == 'true',
-            duration=duration,
-            start_type=start_type,
-            start_at=start_at,
-            sleep=float(app.config['KINESIS_SLEEP'])
+            verify=app.config.get('KINESIS_VERIFY', 'true') == 'true'
+        )
+
+        def create_processor(shard_id: str, handle_signals: bool = True) \
+                -> MetadataRecordProcessor:
+            return MetadataRecordProcessor(
+                app.config['KINESIS_STREAM'],
+                shard_id,
+                checkpointer=CheckpointManager(
+                    app.config['KINESIS_CHECKPOINT_VOLUME'],
+                    app.config['KINESIS_STREAM'],
+                    shard_id,
+                ),
+                duration=duration,
+                start_type=start_type,
+                start_at=start_at,
+                sleep=float(app.config['KINESIS_SLEEP']),
+                batch=app.config.get('KINESIS_BATCH', 'false') == 'true',
+                handle_signals=handle_signals,
+                **params
+            )
+
+        if app.config['KINESIS_SHARD_ID'] != '*':
+            create_processor(app.config['KINESIS_SHARD_ID']).go()
+            return
+
+        # Consume all shards, each in its own thread and app context.
+        flask_app = app._get_current_object()
+
+        def run(processor: BaseConsumer) -> None:
+            with flask_app.app_context():
+                processor.go()
+
+        coordinator = ShardCoordinator(
+            app.config['KINESIS_STREAM'],
+            lambda shard_id: create_processor(shard_id, handle_signals=False),
+            max_workers=int(app.config.get('KINESIS_MAX_WORKERS', '8')),
+            run=run,
+            **params
         )
-        processor.go()
+        coordinator.go()
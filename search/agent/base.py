@@ -6,9 +6,13 @@ Provides a base class for Kinesis record handling.
 
 import time
 import json
+import random
 from datetime import datetime, timedelta
 import os
-from typing import Any, Optional, Tuple, Generator, Callable, Dict, Union
+from typing import Any, Optional, Tuple, Generator, Callable, Dict, Union, \
+    List, Set
+from concurrent.futures import Future, ThreadPoolExecutor, wait, \
+    FIRST_COMPLETED
 from contextlib import contextmanager
 import signal
 
@@ -39,10 +43,23 @@ class StopProcessing(RuntimeError):
     """Gracefully stopped processing upon unrecoverable error."""
 
 
+class ShardClosed(StopProcessing):
+    """The shard was closed (e.g. split or merged) and has been consumed."""
+
+
 class ConfigurationError(RuntimeError):
     """There was a problem with the configuration."""
 
 
+class Throttled(KinesisRequestFailed):
+    """Kinesis rejected a request because the shard's rate limit was hit."""
+
+
+THROTTLING_CODES = ('ProvisionedThroughputExceededException',
+                    'LimitExceededException', 'ThrottlingException')
+"""Error codes that indicate that a Kinesis request was throttled."""
+
+
 def retry(retries: int = 5, wait: int = 5) -> Callable:
     """
     Decorator factory for retrying Kinesis calls.
@@ -113,12 +130,91 @@ class CheckpointManager(object):
             raise CheckpointError('Could not checkpoint') from e
 
 
+class Poller(object):
+    """
+    Decides how long to wait before the next ``GetRecords`` call.
+
+    While the consumer is behind the tip of the stream (or the last batch was
+    full), records are requested again immediately. Once the consumer has
+    caught up, the delay grows exponentially (with jitter) for as long as the
+    stream stays idle, up to ``max_delay``. Throttled requests are backed off
+    in the same way.
+    """
+
+    def __init__(self, min_delay: float = 0.2, max_delay: float = 5.,
+                 behind_threshold: int = 1_000) -> None:
+        """
+        Set the bounds on the polling delay.
+
+        Parameters
+        ----------
+        min_delay : float
+            Seconds to wait after a partial batch, once caught up.
+        max_delay : float
+            Maximum number of seconds to wait while the stream is idle.
+        behind_threshold : int
+            The consumer is considered to be behind if it is more than this
+            many milliseconds behind the tip of the stream.
+
+        """
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.behind_threshold = behind_threshold
+        self._backoff = min_delay
+
+    def is_behind(self, millis_behind_latest: Optional[int]) -> bool:
+        """Determine whether the consumer is behind the tip of the stream."""
+        return bool(millis_behind_latest
+                    and millis_behind_latest > self.behind_threshold)
+
+    def _back_off(self) -> float:
+        self._backoff = min(self._backoff * 2, self.max_delay)
+        return self._backoff / 2 + random.uniform(0, self._backoff / 2)
+
+    def next_delay(self, n_records: int, limit: int,
+                   millis_behind_latest: Optional[int]) -> float:
+        """
+        Get the delay before the next ``GetRecords`` call.
+
+        Parameters
+        ----------
+        n_records : int
+            Number of records returned by the last call.
+        limit : int
+            Maximum number of records that could have been returned.
+        millis_behind_latest : int or None
+            The ``MillisBehindLatest`` value of the last response.
+
+        Returns
+        -------
+        float
+            Number of seconds to wait.
+
+        """
+        if n_records >= limit or self.is_behind(millis_behind_latest):
+            self._backoff = self.min_delay
+            return 0.
+        if n_records > 0:
+            self._backoff = self.min_delay
+            return self.min_delay
+        return self._back_off()
+
+    def throttled(self) -> float:
+        """Get the delay before retrying a throttled ``GetRecords`` call."""
+        return self._back_off()
+
+
 class BaseConsumer(object):
     """
     Kinesis stream consumer.
 
     Consumes a single shard from a single stream, and checkpoints on disk
     (to reduce external dependencies).
+
+    Polling is adaptive (see :class:`.Poller`): the consumer fetches records
+    as fast as it can process them while it is behind, and backs off (to at
+    most ``back_off`` seconds) while the stream is idle. Consumer lag is
+    available via :attr:`.metrics`.
     """
 
     def __init__(self, stream_name: str = '', shard_id: str = '',
@@ -128,8 +224,15 @@ class BaseConsumer(object):
                  endpoint: Optional[str] = None, verify: bool = True,
                  duration: Optional[int] = None,
                  start_type: str = 'AT_TIMESTAMP',
-                 start_at: str = NOW) -> None:
-        """Initialize a new stream consumer."""
+                 start_at: str = NOW, handle_signals: bool = True) -> None:
+        """
+        Initialize a new stream consumer.
+
+        If ``handle_signals`` is ``False``, SIGINT and SIGTERM are not
+        intercepted; this is required when the consumer is run outside of the
+        main thread (e.g. by a :class:`.ShardCoordinator`), in which case it
+        is stopped by setting ``exit``.
+        """
         logger.info(f'New consumer for {stream_name} ({shard_id})')
         self.stream_name = stream_name
         self.shard_id = shard_id
@@ -139,10 +242,14 @@ class BaseConsumer(object):
         else:
             self.position = None
         self.duration = duration
-        self.start_time = None
+        self.start_time: Optional[float] = None
         self.back_off = back_off
         self.batch_size = batch_size
-        self.sleep_time = 5
+        self.poller = Poller(max_delay=back_off)
+        self.delay = 0.
+        self.millis_behind_latest: Optional[int] = None
+        self.throttle_count = 0
+        self.exit = False
         self.start_at = start_at
         self.start_type = start_type
         logger.info(f'Got start_type={start_type} and start_at={start_at}')
@@ -175,9 +282,9 @@ class BaseConsumer(object):
             self.wait_for_stream()
 
         # Intercept SIGINT and SIGTERM so that we can checkpoint before exit.
-        self.exit = False
-        signal.signal(signal.SIGINT, self.stop)
-        signal.signal(signal.SIGTERM, self.stop)
+        if handle_signals:
+            signal.signal(signal.SIGINT, self.stop)
+            signal.signal(signal.SIGTERM, self.stop)
         logger.info('Ready to start')
 
     def stop(self, signal: int, frame: Any) -> None:
@@ -270,13 +377,48 @@ class BaseConsumer(object):
             self.checkpointer.checkpoint(self.position)
             logger.debug(f'Set checkpoint at {self.position}')
 
+    @property
+    def behind(self) -> bool:
+        """Indicate whether the consumer is behind the tip of the stream."""
+        return self.poller.is_behind(self.millis_behind_latest)
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """Get the current consumer lag and polling state."""
+        return {
+            'stream_name': self.stream_name,
+            'shard_id': self.shard_id,
+            'millis_behind_latest': self.millis_behind_latest,
+            'poll_delay': self.delay,
+            'throttle_count': self.throttle_count
+        }
+
     @retry(retries=10, wait=5)
-    def get_records(self, iterator: str, limit: int) -> Tuple[str, dict]:
-        """Get the next batch of ``limit`` or fewer records."""
+    def get_records(self, iterator: str,
+                    limit: int) -> Tuple[Optional[str], dict]:
+        """
+        Get the next batch of ``limit`` or fewer records.
+
+        The next iterator is ``None`` if the shard is closed, and there are
+        no more records to read.
+
+        Raises
+        ------
+        :class:`.Throttled`
+            Raised when the request was throttled. This is not retried here,
+            so that the caller can back off.
+
+        """
         logger.debug(f'Get more records from {iterator}, limit {limit}')
-        response = self.client.get_records(ShardIterator=iterator,
-                                           Limit=limit)
-        iterator = response['NextShardIterator']
+        try:
+            response = self.client.get_records(ShardIterator=iterator,
+                                               Limit=limit)
+        except ClientError as e:
+            if e.response['Error']['Code'] in THROTTLING_CODES:
+                raise Throttled('GetRecords was throttled') from e
+            raise
+        # The iterator is left out of the response once the shard is closed.
+        iterator = response.get('NextShardIterator')
         return iterator, response
 
     def _check_timeout(self) -> None:
@@ -289,27 +431,64 @@ class BaseConsumer(object):
             self._checkpoint()
             raise StopProcessing(f'Ran for {running_for} seconds; exiting')
 
-    def process_records(self, start: str) -> Tuple[str, int]:
+    def process_records(self, start: str) -> Tuple[Optional[str], int]:
         """Retrieve and process records starting at ``start``."""
         logger.debug(f'Get more records, starting at {start}')
         processed = 0
         try:
-            time.sleep(self.sleep_time)   # Don't get carried away.
+            if self.delay:
+                time.sleep(self.delay)   # Don't get carried away.
             next_start, response = self.get_records(start, self.batch_size)
+        except Throttled:
+            self.throttle_count += 1
+            self.delay = self.poller.throttled()
+            logger.warning(f'Throttled; retrying in {self.delay:.2f}s')
+            return start, processed
         except Exception as e:
             self._checkpoint()
             raise StopProcessing('Unhandled exception: %s' % str(e)) from e
 
         logger.debug('Got %i records', len(response['Records']))
-        for record in response['Records']:
-            self._check_timeout()
+        self.millis_behind_latest = response.get('MillisBehindLatest')
+        self.delay = self.poller.next_delay(len(response['Records']),
+                                            self.batch_size,
+                                            self.millis_behind_latest)
+        logger.info(f'Consumer lag: {self.millis_behind_latest} ms;'
+                    f' next poll in {self.delay:.2f}s')
+        # It is possible that Kinesis will replay the same message several
+        # times, especially at the end of the stream. There's no point in
+        # replaying the message, so we'll continue on.
+        records = [record for record in response['Records']
+                   if record['SequenceNumber'] != self.position]
+        if records:
+            processed = self.process_batch(records)
+        logger.debug(f'Next start is {next_start}')
+        return next_start, processed
 
-            # It is possible that Kinesis will replay the same message several
-            # times, especially at the end of the stream. There's no point in
-            # replaying the message, so we'll continue on.
-            if record['SequenceNumber'] == self.position:
-                continue
+    def process_batch(self, records: List[dict]) -> int:
+        """
+        Process a batch of records, e.g. from a single ``GetRecords`` call.
+
+        Calls :meth:`.process_record` for each record in turn. Subclasses may
+        override this to handle the whole batch at once; they must set
+        ``position`` to the sequence number of the last record that was
+        successfully processed.
+
+        Parameters
+        ----------
+        records : list
+            Records in stream order, not including a replay of the record at
+            the current position.
 
+        Returns
+        -------
+        int
+            The number of records that were processed.
+
+        """
+        processed = 0
+        for record in records:
+            self._check_timeout()
             self.process_record(record)
             processed += 1
 
@@ -318,8 +497,7 @@ class BaseConsumer(object):
             if record['SequenceNumber']:    # Make sure it's set.
                 self.position = record['SequenceNumber']
                 logger.debug(f'Updated position to {self.position}')
-        logger.debug(f'Next start is {next_start}')
-        return next_start, processed
+        return processed
 
     def go(self) -> None:
         """Main processing routine."""
@@ -327,17 +505,23 @@ class BaseConsumer(object):
         logger.info(f'Starting processing from position {self.position}'
                     f' on stream {self.stream_name} and shard {self.shard_id}')
 
-        start = self._get_iterator()
-        while True:
+        start: Optional[str] = self._get_iterator()
+        while start is not None:
             start, processed = self.process_records(start)
             if processed > 0:
                 self._checkpoint()  # Checkpoint after every batch.
             if start is None:     # Shard is closed.
-                logger.error('Shard closed unexpectedly; no new iterator')
+                break
+            if self.exit:
+                logger.info('Exit requested; stopping')
                 self._checkpoint()
-                raise StopProcessing('Could not get a new iterator')
+                raise StopProcessing('Exit requested')
             self._check_timeout()
 
+        logger.info(f'Shard {self.shard_id} closed; no new iterator')
+        self._checkpoint()
+        raise ShardClosed('Could not get a new iterator')
+
     def process_record(self, record: dict) -> None:
         """
         Process a single record from the stream.
@@ -350,3 +534,161 @@ class BaseConsumer(object):
         logger.info(f'Processing record {record["SequenceNumber"]}')
         logger.debug(f'Process record {record}')
         # raise NotImplementedError('Should be implemented by a subclass')
+
+
+class ShardCoordinator(object):
+    """
+    Consumes all of the shards of a stream in parallel.
+
+    Shards are discovered with ``DescribeStream``, and a consumer (obtained
+    from ``factory``) is run for each shard in a thread pool. Each consumer
+    checkpoints independently. To preserve the order of records for each
+    partition key, a shard that was created by a split or merge is only
+    consumed once its parent shard(s) have been consumed to the end. Shards
+    are rediscovered whenever a shard is closed, and every
+    ``discover_every`` seconds.
+    """
+
+    def __init__(self, stream_name: str,
+                 factory: Callable[[str], BaseConsumer],
+                 access_key: str = '', secret_key: str = '', region: str = '',
+                 endpoint: Optional[str] = None, verify: bool = True,
+                 max_workers: int = 8, discover_every: int = 60,
+                 run: Optional[Callable[[BaseConsumer], None]] = None) \
+            -> None:
+        """
+        Initialize a new coordinator.
+
+        Parameters
+        ----------
+        stream_name : str
+        factory : callable
+            Creates a consumer for a shard ID. The consumer should be created
+            with ``handle_signals=False``.
+        max_workers : int
+            Maximum number of shards to consume at once.
+        discover_every : int
+            Number of seconds between checks for new shards.
+        run : callable
+            Runs a consumer; by default, this calls its ``go`` method.
+
+        """
+        self.stream_name = stream_name
+        self.factory = factory
+        self.max_workers = max_workers
+        self.discover_every = discover_every
+        self.run = run if run is not None else lambda consumer: consumer.go()
+        self.consumers: Dict[str, BaseConsumer] = {}
+        self.finished: Set[str] = set()
+        self.exit = False
+        logger.info(f'Getting a new connection to Kinesis at {endpoint}'
+                    f' in region {region}, with SSL verification={verify}')
+        self.client = boto3.client('kinesis',
+                                   aws_access_key_id=access_key,
+                                   aws_secret_access_key=secret_key,
+                                   endpoint_url=endpoint,
+                                   verify=verify,
+                                   region_name=region)
+
+    def stop(self, signal: int, frame: Any) -> None:
+        """Ask all of the running consumers to stop."""
+        logger.error(f'Received signal {signal}; stopping consumers')
+        self.exit = True
+        for consumer in self.consumers.values():
+            consumer.exit = True
+
+    @retry(5, 10)
+    def list_shards(self) -> List[dict]:
+        """Get a description of every shard in the stream."""
+        shards: List[dict] = []
+        params: Dict[str, Any] = dict(StreamName=self.stream_name)
+        while True:
+            description = self.client.describe_stream(**params)
+            description = description['StreamDescription']
+            shards += description['Shards']
+            if not description['HasMoreShards']:
+                return shards
+            params['ExclusiveStartShardId'] = shards[-1]['ShardId']
+
+    def ready(self, shards: List[dict]) -> List[str]:
+        """
+        Get the IDs of shards that are ready to be consumed.
+
+        A shard is ready if it is not already being (or done being) consumed,
+        and its parents have been consumed. Parents that have aged out of the
+        stream are ignored.
+        """
+        known = {shard['ShardId'] for shard in shards}
+        ready: List[str] = []
+        for shard in shards:
+            shard_id = shard['ShardId']
+            if shard_id in self.consumers or shard_id in self.finished:
+                continue
+            parents = [shard.get('ParentShardId'),
+                       shard.get('AdjacentParentShardId')]
+            if all(parent not in known or parent in self.finished
+                   for parent in parents if parent):
+                ready.append(shard_id)
+        return ready
+
+    def go(self) -> None:
+        """
+        Consume the stream until it is stopped, or a consumer fails.
+
+        Raises
+        ------
+        :class:`.StopProcessing`
+            Raised when the coordinator is stopped, or when the duration of a
+            consumer is exceeded.
+        Exception
+            Any other exception raised by a consumer is re-raised once the
+            remaining consumers have stopped.
+
+        """
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        error: Optional[BaseException] = None
+        running: Dict[Future, str] = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            discover = True
+            last_discovered = 0.
+            while not self.exit or running:
+                if discover and not self.exit:
+                    try:
+                        for shard_id in self.ready(self.list_shards()):
+                            logger.info(f'Starting consumer for {shard_id}')
+                            consumer = self.factory(shard_id)
+                            self.consumers[shard_id] = consumer
+                            running[executor.submit(self.run, consumer)] = \
+                                shard_id
+                    except Exception as e:
+                        logger.error(f'Could not start consumers: {e}')
+                        error = e
+                        self.stop(0, None)
+                        continue
+                    last_discovered = time.time()
+                if not running:     # Wait for new shards to show up.
+                    time.sleep(self.discover_every)
+                    discover = True
+                    continue
+                done, _ = wait(running, timeout=self.discover_every,
+                               return_when=FIRST_COMPLETED)
+                discover = \
+                    time.time() - last_discovered >= self.discover_every
+                for future in done:
+                    shard_id = running.pop(future)
+                    self.consumers.pop(shard_id)
+                    try:
+                        future.result()
+                    except ShardClosed:
+                        logger.info(f'Finished shard {shard_id}')
+                        self.finished.add(shard_id)
+                        discover = True    # Look for children.
+                    except BaseException as e:
+                        logger.error(f'Consumer for {shard_id} stopped: {e}')
+                        if error is None:
+                            error = e
+                        self.stop(0, None)
+        if error is not None:
+            raise error
+        raise StopProcessing('Stopped')
@@ -19,6 +19,20 @@ class DocumentFailed(RuntimeError):
     """Raised when an arXiv paper could not be added to the search index."""
 
 
+class PapersFailed(DocumentFailed):
+    """
+    Raised when some of the papers in a bulk request were not indexed.
+
+    The rest of the papers were indexed, so only ``arxiv_ids`` need to be
+    accounted for.
+    """
+
+    def __init__(self, message: str, arxiv_ids: List[str]) -> None:
+        """Keep the IDs of the papers that were not indexed."""
+        super(PapersFailed, self).__init__(message)
+        self.arxiv_ids = arxiv_ids
+
+
 class IndexingFailed(RuntimeError):
     """Raised when indexing failed such that future success is unlikely."""
 
@@ -30,13 +44,30 @@ class MetadataRecordProcessor(BaseConsumer):
     """Max number of individual document failures before aborting entirely."""
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
-        """Initialize exception counter."""
+        """
+        Initialize exception counter.
+
+        If ``batch`` is passed and is ``True``, all of the records in each
+        ``GetRecords`` response are indexed together (see
+        :meth:`.process_batch`).
+        """
         self.sleep: float = kwargs.pop('sleep', 0.1)
+        self.batch: bool = kwargs.pop('batch', False)
         super(MetadataRecordProcessor, self).__init__(*args, **kwargs)  # type: ignore
         self._error_count = 0
 
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """Get consumer metrics, including the name cache and index state."""
+        metrics = super(MetadataRecordProcessor, self).metrics
+        metrics['name_cache_hit_rate'] = \
+            transform.name_cache_info()['hit_rate']
+        metrics['index_readiness'] = index.readiness()
+        return metrics
+
     # TODO: bring McCabe index down.
-    def _get_metadata(self, arxiv_id: str) -> DocMeta:
+    def _get_metadata(self, arxiv_id: str,
+                      notified: Optional[float] = None) -> DocMeta:
         """
         Retrieve metadata from the :mod:`.metadata` service.
 
@@ -44,6 +75,9 @@ class MetadataRecordProcessor(BaseConsumer):
         ----------
         arxiv_id : str
             Am arXiv identifier, with or without a version affix.
+        notified : float
+            When the notification for the paper was sent (seconds since the
+            epoch), if known. Metadata cached before then are stale.
 
         Returns
         -------
@@ -61,6 +95,9 @@ class MetadataRecordProcessor(BaseConsumer):
 
         """
         logger.debug(f'{arxiv_id}: get metadata')
+        # We were notified because the metadata changed, so any metadata for
+        # this paper that were cached before the notification are stale.
+        metadata.invalidate([arxiv_id], before=notified)
 
         try:
             logger.debug(f'{arxiv_id}: requesting metadata')
@@ -89,7 +126,9 @@ class MetadataRecordProcessor(BaseConsumer):
             raise IndexingFailed('Unhandled exception') from e
         return docmeta
 
-    def _get_bulk_metadata(self, arxiv_ids: List[str]) -> List[DocMeta]:
+    def _get_bulk_metadata(self, arxiv_ids: List[str],
+                           notified: Optional[float] = None) \
+            -> List[DocMeta]:
         """
         Retrieve metadata from :mod:`.metadata` service for multiple documents.
 
@@ -97,6 +136,9 @@ class MetadataRecordProcessor(BaseConsumer):
         ----------
         arxiv_id : str
             Am arXiv identifier, with or without a version affix.
+        notified : float
+            When the latest notification for the papers was sent (seconds
+            since the epoch), if known. Metadata cached before then are stale.
 
         Returns
         -------
@@ -115,6 +157,9 @@ class MetadataRecordProcessor(BaseConsumer):
 
         """
         logger.debug(f'{arxiv_ids}: get bulk metadata')
+        # We were notified because the metadata changed, so any metadata for
+        # these papers that were cached before the notification are stale.
+        metadata.invalidate(arxiv_ids, before=notified)
         meta: List[DocMeta]
         try:
             logger.debug(f'{arxiv_ids}: requesting bulk metadata')
@@ -208,31 +253,47 @@ class MetadataRecordProcessor(BaseConsumer):
         """
         Add :class:`.Document` to the search index.
 
+        Documents that are rejected by the index are not sent again; nor are
+        the rest of the documents.
+
         Parameters
         ----------
         documents : :class:`.Document`
 
         Raises
         ------
+        PapersFailed
+            Some of the documents were not indexed. The rest were.
         IndexingFailed
             Indexing of the document failed in a way that indicates recovery
             is unlikely for subsequent papers.
 
         """
         try:
-            index.bulk_add_documents(documents)
-        except index.IndexConnectionError as e:
-            # Let's try once more before giving up entirely.
             try:
                 index.bulk_add_documents(documents)
-            except index.IndexConnectionError as e:   # Nope, not happening.
-                logger.error(f'Could not bulk index documents: {e}')
-                raise IndexingFailed('Could not bulk index documents') from e
+            except index.IndexConnectionError:
+                # Let's try once more before giving up entirely.
+                index.bulk_add_documents(documents)
+        except index.PartialIndexingError as e:
+            paper_ids = {document.id: document.paper_id
+                         for document in documents}
+            failed: List[str] = []
+            for document_id in e.report.failed_ids:
+                arxiv_id = paper_ids.get(document_id, document_id)
+                if arxiv_id not in failed:
+                    failed.append(arxiv_id)
+            logger.error(f'Could not index {len(failed)} papers: {failed}')
+            raise PapersFailed('Could not index some documents', failed) from e
+        except index.IndexConnectionError as e:   # Nope, not happening.
+            logger.error(f'Could not bulk index documents: {e}')
+            raise IndexingFailed('Could not bulk index documents') from e
         except Exception as e:
             logger.error(f'Unhandled exception from index service: {e}')
             raise IndexingFailed('Unhandled exception') from e
 
-    def index_paper(self, arxiv_id: str) -> None:
+    def index_paper(self, arxiv_id: str,
+                    notified: Optional[float] = None) -> None:
         """
         Index a single paper, including its previous versions.
 
@@ -240,11 +301,14 @@ class MetadataRecordProcessor(BaseConsumer):
         ----------
         arxiv_id : str
             A **versionless** arXiv e-print identifier.
+        notified : float
+            When the notification for the paper was sent, if known.
 
         """
-        self.index_papers([arxiv_id])
+        self.index_papers([arxiv_id], notified)
 
-    def index_papers(self, arxiv_ids: List[str]) -> None:
+    def index_papers(self, arxiv_ids: List[str],
+                     notified: Optional[float] = None) -> None:
         """
         Index multiple papers, including their previous versions.
 
@@ -252,6 +316,10 @@ class MetadataRecordProcessor(BaseConsumer):
         ----------
         arxiv_ids : List[str]
             A list of **versionless** arXiv e-print identifiers.
+        notified : float
+            When the latest notification for the papers was sent (seconds
+            since the epoch), if known. Only metadata cached since then are
+            used; if not provided, metadata are always retrieved.
 
         Raises
         ------
@@ -265,7 +333,7 @@ class MetadataRecordProcessor(BaseConsumer):
         """
         try:
             documents = []
-            for docmeta in self._get_bulk_metadata(arxiv_ids):
+            for docmeta in self._get_bulk_metadata(arxiv_ids, notified):
                 logger.debug(f'{docmeta.paper_id}: transform to Document')
                 document = MetadataRecordProcessor._transform_to_document(
                     docmeta
@@ -278,6 +346,107 @@ class MetadataRecordProcessor(BaseConsumer):
             logger.debug(f'{arxiv_ids}: Document failed: {e}')
             raise e
 
+    @staticmethod
+    def _deserialize(record: dict) -> str:
+        """Get the arXiv ID from a ``MetadataIsAvailable`` record."""
+        try:
+            deserialized = json.loads(record['Data'].decode('utf-8'))
+        except json.decoder.JSONDecodeError as e:
+            logger.error("Error while deserializing data %s", e)
+            logger.error("Data payload: %s", record['Data'])
+            raise DocumentFailed('Could not deserialize record data')
+        arxiv_id: str = deserialized.get('document_id')
+        return arxiv_id
+
+    @staticmethod
+    def _notified(records: List[dict]) -> Optional[float]:
+        """Get the time at which the latest of some records was sent."""
+        try:
+            notified: float = max(
+                record['ApproximateArrivalTimestamp'].timestamp()
+                for record in records
+            )
+        except (KeyError, ValueError):     # Not known, or no records.
+            return None
+        return notified
+
+    def process_batch(self, records: List[dict]) -> int:
+        """
+        Index the papers for a batch of records.
+
+        In batch mode, duplicate arXiv IDs are removed, and the remaining
+        papers are indexed with a single metadata request and a single bulk
+        index request. If either request fails for the batch as a whole, each
+        paper is tried separately so that one bad paper does not hold up the
+        rest; papers that the index rejects are counted as failures, and are
+        not tried again. Otherwise, records are processed one at a time.
+
+        Parameters
+        ----------
+        records : list
+
+        Returns
+        -------
+        int
+            The number of records that were processed.
+
+        Raises
+        ------
+        IndexingFailed
+            Indexing of the documents failed in a way that indicates recovery
+            is unlikely for subsequent papers, or too many individual
+            documents failed. The position is not advanced, so the batch will
+            be processed again when the consumer restarts.
+
+        """
+        if not self.batch:
+            return super(MetadataRecordProcessor, self).process_batch(records)
+
+        if not self.behind:     # Don't slow down while catching up.
+            time.sleep(self.sleep)
+        logger.info(f'Processing {len(records)} records, from'
+                    f' {records[0]["SequenceNumber"]}'
+                    f' to {records[-1]["SequenceNumber"]}')
+        if self._error_count > self.MAX_ERRORS:
+            raise IndexingFailed('Too many errors')
+
+        arxiv_ids: List[str] = []
+        for record in records:
+            try:
+                arxiv_id = self._deserialize(record)
+            except DocumentFailed:
+                self._error_count += 1
+                continue
+            if arxiv_id not in arxiv_ids:
+                arxiv_ids.append(arxiv_id)
+        logger.debug(f'{len(arxiv_ids)} unique papers in batch')
+
+        if arxiv_ids:
+            notified = self._notified(records)
+            try:
+                self.index_papers(arxiv_ids, notified)
+            except PapersFailed as e:
+                logger.debug(f'{e.arxiv_ids}: failed to index documents')
+                self._error_count += len(e.arxiv_ids)
+            except DocumentFailed as e:
+                logger.debug(f'Batch failed ({e}); indexing papers one by one')
+                for arxiv_id in arxiv_ids:
+                    try:
+                        self.index_paper(arxiv_id, notified)
+                    except DocumentFailed:
+                        logger.debug(f'{arxiv_id}: failed to index document')
+                        self._error_count += 1
+            except IndexingFailed as e:
+                logger.error(f'Indexing failed: {e}')
+                raise
+
+        for record in reversed(records):
+            if record['SequenceNumber']:    # Make sure it's set.
+                self.position = record['SequenceNumber']
+                logger.debug(f'Updated position to {self.position}')
+                break
+        return len(records)
+
     def process_record(self, record: dict) -> None:
         """
         Call for each record that is passed to process_records.
@@ -297,22 +466,15 @@ class MetadataRecordProcessor(BaseConsumer):
             documents failed.
 
         """
-        time.sleep(self.sleep)
+        if not self.behind:     # Don't slow down while catching up.
+            time.sleep(self.sleep)
         logger.info(f'Processing record {record["SequenceNumber"]}')
         if self._error_count > self.MAX_ERRORS:
             raise IndexingFailed('Too many errors')
 
+        arxiv_id = self._deserialize(record)
         try:
-            deserialized = json.loads(record['Data'].decode('utf-8'))
-        except json.decoder.JSONDecodeError as e:
-            logger.error("Error while deserializing data %s", e)
-            logger.error("Data payload: %s", record['Data'])
-            raise DocumentFailed('Could not deserialize record data')
-            # return   # Don't bring down the whole batch.
-
-        try:
-            arxiv_id: str = deserialized.get('document_id')
-            self.index_paper(arxiv_id)
+            self.index_paper(arxiv_id, self._notified([record]))
         except DocumentFailed as e:
             logger.debug(f'{arxiv_id}: failed to index document')
             self._error_count += 1
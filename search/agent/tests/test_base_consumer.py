@@ -3,7 +3,8 @@
 from unittest import TestCase, mock
 from botocore.exceptions import BotoCoreError, WaiterError, ClientError
 
-from search.agent.base import BaseConsumer, StreamNotAvailable, StopProcessing
+from search.agent.base import BaseConsumer, StreamNotAvailable, \
+    StopProcessing, Poller, ShardClosed, ShardCoordinator
 
 
 class TestBaseConsumer(TestCase):
@@ -74,8 +75,8 @@ class TestBaseConsumer(TestCase):
         def get_records(**kwargs):
             start = int(kwargs['ShardIterator'])
             end = start + int(kwargs['Limit'])
-            if start > 500:
-                return {'Records': [], 'NextShardIterator': None}
+            if start > 500:     # The closed shard has no next iterator.
+                return {'Records': []}
             return {
                 'Records': [
                     {'SequenceNumber': str(i)} for i in range(start, end)
@@ -89,7 +90,7 @@ class TestBaseConsumer(TestCase):
         consumer = BaseConsumer('foo', '1', 'a1b2c3d4', 'qwertyuiop',
                                 'us-east-1', self.checkpointer,
                                 batch_size=batch_size)
-        with self.assertRaises(StopProcessing):
+        with self.assertRaises(ShardClosed):
             consumer.go()
         self.assertEqual(mock_client.get_records.call_count,
                          (500/batch_size) + 1,
@@ -164,3 +165,147 @@ class TestBaseConsumer(TestCase):
         args, kwargs = mock_client.get_shard_iterator.call_args
         self.assertEqual(kwargs['ShardIteratorType'], 'TRIM_HORIZON')
         self.assertNotIn('StartingSequenceNumber', kwargs)
+
+    @mock.patch('boto3.client')
+    def test_process_records_throttled(self, mock_client_factory):
+        """Throttled requests are retried later from the same iterator."""
+        mock_client = mock.MagicMock()
+        mock_client_factory.return_value = mock_client
+
+        def raise_throttled(*args, **kwargs):
+            raise ClientError({
+                'Error': {'Code': 'ProvisionedThroughputExceededException'}
+            }, 'GetRecords')
+
+        mock_client.get_records.side_effect = raise_throttled
+        consumer = BaseConsumer('foo', '1', 'a1b2c3d4', 'qwertyuiop',
+                                'us-east-1', self.checkpointer)
+        next_start, processed = consumer.process_records('0')
+        self.assertEqual(mock_client.get_records.call_count, 1,
+                         "Throttled requests should not be retried at once")
+        self.assertEqual(next_start, '0')
+        self.assertEqual(processed, 0)
+        self.assertGreater(consumer.delay, 0)
+        self.assertEqual(consumer.metrics['throttle_count'], 1)
+
+    @mock.patch('boto3.client')
+    def test_process_records_lag(self, mock_client_factory):
+        """Consumer lag is exposed, and drives the polling delay."""
+        mock_client = mock.MagicMock()
+        mock_client_factory.return_value = mock_client
+        mock_client.get_records.return_value = {
+            'Records': [{'SequenceNumber': '1'}],
+            'NextShardIterator': '2',
+            'MillisBehindLatest': 60_000
+        }
+        consumer = BaseConsumer('foo', '1', 'a1b2c3d4', 'qwertyuiop',
+                                'us-east-1', self.checkpointer)
+        consumer.process_records('0')
+        self.assertTrue(consumer.behind)
+        self.assertEqual(consumer.delay, 0)
+        self.assertEqual(consumer.metrics['millis_behind_latest'], 60_000)
+
+
+class TestPoller(TestCase):
+    """Test :class:`.Poller` delays."""
+
+    def setUp(self):
+        self.poller = Poller(min_delay=0.2, max_delay=5.)
+
+    def test_full_batch(self):
+        """Records are requested again immediately after a full batch."""
+        self.assertEqual(self.poller.next_delay(50, 50, 0), 0)
+
+    def test_behind(self):
+        """Records are requested again immediately while behind."""
+        self.assertEqual(self.poller.next_delay(1, 50, 30_000), 0)
+
+    def test_caught_up(self):
+        """There is a short delay after a partial batch, once caught up."""
+        self.assertEqual(self.poller.next_delay(10, 50, 0), 0.2)
+
+    def test_idle(self):
+        """The delay grows while the stream is idle, up to a maximum."""
+        delays = [self.poller.next_delay(0, 50, 0) for _ in range(10)]
+        self.assertLess(delays[0], delays[3])
+        self.assertTrue(all(delay <= 5. for delay in delays))
+        self.assertGreaterEqual(delays[-1], 2.5)
+        self.assertEqual(self.poller.next_delay(50, 50, 0), 0,
+                         "Backoff is reset when records arrive")
+
+
+class TestShardCoordinator(TestCase):
+    """Test :class:`.ShardCoordinator` behavior."""
+
+    def setUp(self):
+        """Describe a stream in which shard 0 was split into 1 and 2."""
+        self.shards = [
+            {'ShardId': '0'},
+            {'ShardId': '1', 'ParentShardId': '0'},
+            {'ShardId': '2', 'ParentShardId': '0'},
+            {'ShardId': '3', 'ParentShardId': '1',
+             'AdjacentParentShardId': '2'}
+        ]
+
+    @mock.patch('boto3.client')
+    def test_list_shards(self, mock_client_factory):
+        """Shards are listed across pages of DescribeStream."""
+        mock_client = mock.MagicMock()
+        mock_client_factory.return_value = mock_client
+        mock_client.describe_stream.side_effect = [
+            {'StreamDescription': {'Shards': self.shards[:2],
+                                   'HasMoreShards': True}},
+            {'StreamDescription': {'Shards': self.shards[2:],
+                                   'HasMoreShards': False}}
+        ]
+        coordinator = ShardCoordinator('foo', mock.MagicMock())
+        self.assertEqual(coordinator.list_shards(), self.shards)
+        _, kwargs = mock_client.describe_stream.call_args
+        self.assertEqual(kwargs['ExclusiveStartShardId'], '1')
+
+    @mock.patch('boto3.client')
+    def test_ready(self, mock_client_factory):
+        """Child shards are ready once their parents are finished."""
+        coordinator = ShardCoordinator('foo', mock.MagicMock())
+        self.assertEqual(coordinator.ready(self.shards), ['0'])
+        coordinator.finished.add('0')
+        self.assertEqual(coordinator.ready(self.shards), ['1', '2'])
+        coordinator.finished.add('1')
+        self.assertEqual(coordinator.ready(self.shards), ['2'])
+        coordinator.finished.add('2')
+        self.assertEqual(coordinator.ready(self.shards), ['3'])
+        self.assertEqual(coordinator.ready(self.shards[1:]), ['3'],
+                         "Parents that are no longer in the stream are"
+                         " ignored")
+
+    @mock.patch('search.agent.base.signal')
+    @mock.patch('boto3.client')
+    def test_go(self, mock_client_factory, mock_signal):
+        """Each shard is consumed in lineage order, until one fails."""
+        mock_client = mock.MagicMock()
+        mock_client_factory.return_value = mock_client
+        mock_client.describe_stream.return_value = {
+            'StreamDescription': {'Shards': self.shards,
+                                  'HasMoreShards': False}
+        }
+        consumed = []
+
+        def run(consumer):
+            consumed.append(consumer.shard_id)
+            if consumer.shard_id == '3':
+                raise StopProcessing('Ran for 30 seconds')
+            raise ShardClosed('Could not get a new iterator')
+
+        def factory(shard_id):
+            consumer = mock.MagicMock()
+            consumer.shard_id = shard_id
+            return consumer
+
+        coordinator = ShardCoordinator('foo', factory, run=run,
+                                       discover_every=1)
+        with self.assertRaises(StopProcessing):
+            coordinator.go()
+        self.assertEqual(consumed[0], '0')
+        self.assertEqual(sorted(consumed[1:3]), ['1', '2'])
+        self.assertEqual(consumed[3], '3')
+        self.assertEqual(coordinator.finished, {'0', '1', '2'})
@@ -1,9 +1,13 @@
 """Unit tests for :mod:`search.agent`."""
 
+import json
+from datetime import datetime, timedelta, timezone
 from unittest import TestCase, mock
 
 from search.domain import DocMeta, Document
 from search.services import metadata, index
+from search.services.docmeta_cache import DocMetaCache
+from search.services.index.bulk import BulkReport, BulkResult
 from search.agent import consumer
 
 # type: ignore
@@ -102,6 +106,84 @@ class TestIndexPaper(TestCase):
             [mock_doc_3, mock_doc_1, mock_doc_2, mock_doc_3])
 
 
+class TestCachedMetadata(TestCase):
+    """Notifications are not answered with cached metadata."""
+
+    def setUp(self):
+        """Initialize a :class:`.MetadataRecordProcessor`."""
+        self.checkpointer = mock.MagicMock()
+        self.args = ('foo', '1', 'a1b2c3d4', 'qwertyuiop', 'us-east-1',
+                     self.checkpointer)
+
+    @mock.patch('boto3.client')
+    @mock.patch('search.agent.consumer.index')
+    @mock.patch('search.agent.consumer.transform')
+    @mock.patch('search.services.metadata.requests.Session.get')
+    @mock.patch('search.services.metadata.current_session')
+    def test_new_version_is_retrieved(self, mock_current_session, mock_get,
+                                      mock_tx, mock_idx, mock_client_factory):
+        """A new version is indexed even if the paper is in the cache."""
+        mock_current_session.return_value = metadata.DocMetaSession(
+            'https://asdf.com/', cache=DocMetaCache(maxsize=100)
+        )
+        mock_tx.to_search_document.side_effect = lambda docmeta: docmeta
+        processor = consumer.MetadataRecordProcessor(*self.args)
+
+        def respond(versions):
+            response = mock.MagicMock(status_code=200)
+            content = json.dumps([
+                {'paper_id': '1234.56789', 'version': version,
+                 'latest_version': versions}
+                for version in range(1, versions + 1)
+            ])
+            response.iter_content.return_value = [content.encode('utf-8')]
+            return response
+
+        mock_get.return_value = respond(1)
+        processor.index_paper('1234.56789')
+        mock_get.return_value = respond(2)
+        processor.index_paper('1234.56789')
+
+        self.assertEqual(mock_get.call_count, 2)
+        args, _ = mock_idx.bulk_add_documents.call_args
+        self.assertEqual([docmeta.version for docmeta in args[0]], [1, 2])
+
+    @mock.patch('boto3.client')
+    @mock.patch('search.agent.consumer.index')
+    @mock.patch('search.agent.consumer.transform')
+    @mock.patch('search.services.metadata.requests.Session.get')
+    @mock.patch('search.services.metadata.current_session')
+    def test_replayed_record(self, mock_current_session, mock_get, mock_tx,
+                             mock_idx, mock_client_factory):
+        """Cached metadata are used for a notification that is replayed."""
+        mock_current_session.return_value = metadata.DocMetaSession(
+            'https://asdf.com/', cache=DocMetaCache(maxsize=100)
+        )
+        mock_tx.to_search_document.side_effect = lambda docmeta: docmeta
+        processor = consumer.MetadataRecordProcessor(*self.args, sleep=0)
+        response = mock.MagicMock(status_code=200)
+        response.iter_content.return_value = [json.dumps([
+            {'paper_id': '1234.56789', 'version': 1, 'latest_version': 1}
+        ]).encode('utf-8')]
+        mock_get.return_value = response
+
+        def record(sent):
+            return {'SequenceNumber': '1', 'ApproximateArrivalTimestamp': sent,
+                    'Data': json.dumps({'document_id': '1234.56789'})
+                    .encode('utf-8')}
+
+        sent = datetime.now(timezone.utc) - timedelta(seconds=10)
+        processor.process_record(record(sent))
+        processor.process_record(record(sent))
+        self.assertEqual(mock_get.call_count, 1,
+                         "The replayed record is indexed from the cache")
+        self.assertEqual(mock_idx.bulk_add_documents.call_count, 2)
+
+        processor.process_record(record(sent + timedelta(seconds=60)))
+        self.assertEqual(mock_get.call_count, 2,
+                         "A later notification is retrieved again")
+
+
 class TestAddToIndex(TestCase):
     """Add a search document to the index."""
 
@@ -138,6 +220,7 @@ class TestAddToIndex(TestCase):
         processor = consumer.MetadataRecordProcessor(*self.args)
 
         mock_index.IndexConnectionError = index.IndexConnectionError
+        mock_index.PartialIndexingError = index.PartialIndexingError
 
         mock_index.add_document.side_effect = index.IndexConnectionError
         with self.assertRaises(consumer.IndexingFailed):
@@ -155,6 +238,7 @@ class TestAddToIndex(TestCase):
         processor = consumer.MetadataRecordProcessor(*self.args)
 
         mock_index.IndexConnectionError = index.IndexConnectionError
+        mock_index.PartialIndexingError = index.PartialIndexingError
 
         mock_index.add_document.side_effect = RuntimeError
         with self.assertRaises(consumer.IndexingFailed):
@@ -198,6 +282,7 @@ class TestBulkAddToIndex(TestCase):
         processor = consumer.MetadataRecordProcessor(*self.args)
 
         mock_index.IndexConnectionError = index.IndexConnectionError
+        mock_index.PartialIndexingError = index.PartialIndexingError
 
         mock_index.bulk_add_documents.side_effect = index.IndexConnectionError
         with self.assertRaises(consumer.IndexingFailed):
@@ -215,12 +300,34 @@ class TestBulkAddToIndex(TestCase):
         processor = consumer.MetadataRecordProcessor(*self.args)
 
         mock_index.IndexConnectionError = index.IndexConnectionError
+        mock_index.PartialIndexingError = index.PartialIndexingError
 
         mock_index.bulk_add_documents.side_effect = RuntimeError
         with self.assertRaises(consumer.IndexingFailed):
             processor._bulk_add_to_index([Document()])
 
 
+    @mock.patch('boto3.client')
+    @mock.patch('search.agent.consumer.index')
+    def test_index_rejects_documents(self, mock_index, mock_client_factory):
+        """Only the papers that were rejected are reported, without retry."""
+        processor = consumer.MetadataRecordProcessor(*self.args)
+        mock_index.IndexConnectionError = index.IndexConnectionError
+        mock_index.PartialIndexingError = index.PartialIndexingError
+        report = BulkReport(indexed=1, failures=[
+            BulkResult(id='1234.56780v2', ok=False, status=400, error='bad')
+        ])
+        mock_index.bulk_add_documents.side_effect = \
+            index.PartialIndexingError('nope', report)
+        documents = [Document(id='1234.56789v1', paper_id='1234.56789'),
+                     Document(id='1234.56780v2', paper_id='1234.56780')]
+
+        with self.assertRaises(consumer.PapersFailed) as ctx:
+            processor._bulk_add_to_index(documents)
+        self.assertEqual(ctx.exception.arxiv_ids, ['1234.56780'])
+        self.assertEqual(mock_index.bulk_add_documents.call_count, 1)
+
+
 class TestTransformToDocument(TestCase):
     """Transform metadata into a search document."""
 
@@ -327,3 +434,118 @@ class TestGetMetadata(TestCase):
         mock_metadata.retrieve.side_effect = metadata.BadResponse
         with self.assertRaises(consumer.DocumentFailed):
             processor._get_metadata('1234.5678')
+
+
+class TestProcessBatch(TestCase):
+    """Index all of the papers in a batch of records at once."""
+
+    def setUp(self):
+        """Initialize a :class:`.MetadataRecordProcessor` in batch mode."""
+        self.checkpointer = mock.MagicMock()
+        self.args = ('foo', '1', 'a1b2c3d4', 'qwertyuiop', 'us-east-1',
+                     self.checkpointer)
+        self.records = [
+            {'SequenceNumber': str(i),
+             'Data': json.dumps({'document_id': arxiv_id}).encode('utf-8')}
+            for i, arxiv_id in enumerate(['1234.56789', '1234.56780',
+                                          '1234.56789'])
+        ]
+
+    @mock.patch('boto3.client')
+    @mock.patch('search.agent.consumer.index')
+    @mock.patch('search.agent.consumer.transform')
+    @mock.patch('search.agent.consumer.metadata')
+    def test_batch(self, mock_meta, mock_tx, mock_idx, mock_client_factory):
+        """Unique papers are retrieved and indexed with one request each."""
+        processor = consumer.MetadataRecordProcessor(*self.args, sleep=0,
+                                                     batch=True)
+        mock_meta.bulk_retrieve.return_value = [
+            DocMeta(paper_id='1234.56789'), DocMeta(paper_id='1234.56780')
+        ]
+
+        self.assertEqual(processor.process_batch(self.records), 3)
+        mock_meta.bulk_retrieve.assert_called_once_with(
+            ['1234.56789', '1234.56780']
+        )
+        self.assertEqual(mock_idx.bulk_add_documents.call_count, 1)
+        self.assertEqual(len(mock_idx.bulk_add_documents.call_args[0][0]), 2)
+        self.assertEqual(processor.position, '2')
+
+    @mock.patch('boto3.client')
+    def test_metrics(self, mock_client_factory):
+        """The name cache hit rate and the state of the index are reported."""
+        processor = consumer.MetadataRecordProcessor(*self.args)
+        self.assertIn('name_cache_hit_rate', processor.metrics)
+        self.assertEqual(processor.metrics['index_readiness'], 'unknown')
+        self.assertIn('millis_behind_latest', processor.metrics)
+
+    @mock.patch('boto3.client')
+    @mock.patch('search.agent.consumer.index')
+    @mock.patch('search.agent.consumer.transform')
+    @mock.patch('search.agent.consumer.metadata')
+    def test_batch_document_failed(self, mock_meta, mock_tx, mock_idx,
+                                   mock_client_factory):
+        """If the batch fails, papers are indexed one at a time."""
+        processor = consumer.MetadataRecordProcessor(*self.args, sleep=0,
+                                                     batch=True)
+        mock_meta.ConnectionFailed = metadata.ConnectionFailed
+        mock_meta.RequestFailed = metadata.RequestFailed
+        mock_meta.BadResponse = metadata.BadResponse
+
+        def bulk_retrieve(arxiv_ids):
+            if '1234.56780' in arxiv_ids:
+                raise metadata.RequestFailed('nope')
+            return [DocMeta(paper_id=arxiv_id) for arxiv_id in arxiv_ids]
+        mock_meta.bulk_retrieve.side_effect = bulk_retrieve
+
+        self.assertEqual(processor.process_batch(self.records), 3)
+        self.assertEqual(mock_meta.bulk_retrieve.call_count, 3)
+        self.assertEqual(mock_idx.bulk_add_documents.call_count, 1)
+        self.assertEqual(processor._error_count, 1)
+        self.assertEqual(processor.position, '2')
+
+    @mock.patch('boto3.client')
+    @mock.patch('search.agent.consumer.index')
+    @mock.patch('search.agent.consumer.transform')
+    @mock.patch('search.agent.consumer.metadata')
+    def test_batch_papers_rejected(self, mock_meta, mock_tx, mock_idx,
+                                   mock_client_factory):
+        """Papers rejected by the index are counted, and not sent again."""
+        processor = consumer.MetadataRecordProcessor(*self.args, sleep=0,
+                                                     batch=True)
+        mock_meta.bulk_retrieve.return_value = [
+            DocMeta(paper_id='1234.56789'), DocMeta(paper_id='1234.56780')
+        ]
+        mock_tx.to_search_document.side_effect = \
+            lambda meta: Document(id=f'{meta.paper_id}v1',
+                                  paper_id=meta.paper_id)
+        mock_idx.IndexConnectionError = index.IndexConnectionError
+        mock_idx.PartialIndexingError = index.PartialIndexingError
+        report = BulkReport(indexed=1, failures=[
+            BulkResult(id='1234.56780v1', ok=False, status=400, error='bad')
+        ])
+        mock_idx.bulk_add_documents.side_effect = \
+            index.PartialIndexingError('nope', report)
+
+        self.assertEqual(processor.process_batch(self.records), 3)
+        self.assertEqual(mock_idx.bulk_add_documents.call_count, 1)
+        self.assertEqual(processor._error_count, 1)
+        self.assertEqual(processor.position, '2')
+
+    @mock.patch('boto3.client')
+    @mock.patch('search.agent.consumer.index')
+    @mock.patch('search.agent.consumer.transform')
+    @mock.patch('search.agent.consumer.metadata')
+    def test_batch_indexing_failed(self, mock_meta, mock_tx, mock_idx,
+                                   mock_client_factory):
+        """If indexing fails, the position is not advanced."""
+        processor = consumer.MetadataRecordProcessor(*self.args, sleep=0,
+                                                     batch=True)
+        processor.position = None
+        mock_idx.IndexConnectionError = index.IndexConnectionError
+        mock_idx.PartialIndexingError = index.PartialIndexingError
+        mock_idx.bulk_add_documents.side_effect = index.IndexConnectionError
+
+        with self.assertRaises(consumer.IndexingFailed):
+            processor.process_batch(self.records)
+        self.assertIsNone(processor.position)
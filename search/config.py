@@ -172,6 +172,55 @@ ELASTICSEARCH_PASSWORD = os.environ.get('ELASTICSEARCH_PASSWORD', None)
 ELASTICSEARCH_VERIFY = os.environ.get('ELASTICSEARCH_VERIFY', 'true')
 """Indicates whether SSL certificate verification for ES should be enforced."""
 
+ELASTICSEARCH_MAXSIZE = os.environ.get('ELASTICSEARCH_MAXSIZE', '25')
+"""
+Maximum number of pooled connections to keep open to each ES node.
+
+The pool is shared by all of the threads/greenlets in a worker process, so
+this should be at least as large as the number of concurrent requests that a
+worker is expected to handle.
+"""
+
+ELASTICSEARCH_TIMEOUT = os.environ.get('ELASTICSEARCH_TIMEOUT', '10')
+"""Default timeout (in seconds) for requests to ES."""
+
+ELASTICSEARCH_KEEPALIVE = os.environ.get('ELASTICSEARCH_KEEPALIVE', 'true')
+"""If ``true``, connections to ES are kept alive and reused."""
+
+ELASTICSEARCH_SNIFF_ON_START = \
+    os.environ.get('ELASTICSEARCH_SNIFF_ON_START', 'false')
+"""If ``true``, discover the nodes of the ES cluster on startup."""
+
+ELASTICSEARCH_SNIFF_ON_CONNECTION_FAIL = \
+    os.environ.get('ELASTICSEARCH_SNIFF_ON_CONNECTION_FAIL', 'false')
+"""If ``true``, rediscover the nodes of the ES cluster when a node fails."""
+
+ELASTICSEARCH_SNIFFER_TIMEOUT = \
+    os.environ.get('ELASTICSEARCH_SNIFFER_TIMEOUT', None)
+"""Interval (in seconds) at which to rediscover nodes, if set."""
+
+SEARCH_CACHE = os.environ.get('SEARCH_CACHE', '')
+"""
+Backend for caching search results: ``local``, ``redis``, or empty (off).
+
+The ``local`` cache is per-process, so updates made by the indexing agent
+will only be visible after ``SEARCH_CACHE_TTL`` seconds. The ``redis``
+backend shares invalidation with the agent, and requires the ``redis``
+package.
+"""
+
+SEARCH_CACHE_SIZE = os.environ.get('SEARCH_CACHE_SIZE', '1000')
+"""Maximum number of result pages to keep in the ``local`` cache."""
+
+SEARCH_CACHE_TTL = os.environ.get('SEARCH_CACHE_TTL', '60')
+"""Number of seconds for which cached search results may be used."""
+
+SEARCH_CACHE_URL = os.environ.get('SEARCH_CACHE_URL', None)
+"""URL of the Redis server for the ``redis`` cache backend."""
+
+SEARCH_QUERY_CACHE_SIZE = os.environ.get('SEARCH_QUERY_CACHE_SIZE', '1024')
+"""Maximum number of compiled queries to keep for each search field."""
+
 
 METADATA_ENDPOINT = os.environ.get('METADATA_ENDPOINT',
                                    'https://arxiv.org/')
@@ -187,9 +236,58 @@ METADATA_CACHE_DIR = os.environ.get('METADATA_CACHE_DIR')
 METADATA_VERIFY_CERT = os.environ.get('METADATA_VERIFY_CERT', 'True')
 """If ``False``, SSL certificate verification will be disabled."""
 
+METADATA_POOL_SIZE = os.environ.get('METADATA_POOL_SIZE', '10')
+"""Maximum number of pooled connections to keep open to each endpoint."""
+
+METADATA_TIMEOUT = os.environ.get('METADATA_TIMEOUT', '10')
+"""Timeout (in seconds) for requests to the metadata service."""
+
+METADATA_KEEPALIVE = os.environ.get('METADATA_KEEPALIVE', 'true')
+"""If ``true``, connections to the metadata service are kept alive."""
+
+METADATA_ENDPOINT_COOLDOWN = os.environ.get('METADATA_ENDPOINT_COOLDOWN', '30')
+"""
+Seconds for which to skip a metadata endpoint after it fails.
+
+This doubles with each consecutive failure of the endpoint. If all of the
+endpoints are failing, they are tried in turn regardless.
+"""
+
+METADATA_MAX_URL_LENGTH = os.environ.get('METADATA_MAX_URL_LENGTH', '4000')
+"""Maximum length of a ``docmeta_bulk`` URL; longer requests are split."""
+
+METADATA_BULK_WORKERS = os.environ.get('METADATA_BULK_WORKERS', '4')
+"""Maximum number of concurrent ``docmeta_bulk`` requests per session."""
+
+METADATA_CACHE_SIZE = os.environ.get('METADATA_CACHE_SIZE', '0')
+"""
+Number of paper versions for which to cache metadata in memory.
+
+If ``0`` (the default), metadata are not cached. Otherwise, if
+``METADATA_CACHE_DIR`` is also set, cached metadata are persisted there as
+well.
+"""
+
+METADATA_CACHE_TTL = os.environ.get('METADATA_CACHE_TTL', '300')
+"""
+Seconds for which cached metadata may be used.
+
+Metadata that change within this time may be served stale, unless newer
+metadata for the paper are retrieved. If empty, cached metadata never expire.
+"""
+
 FULLTEXT_ENDPOINT = os.environ.get('FULLTEXT_ENDPOINT',
                                    'https://fulltext.arxiv.org/fulltext/')
 
+FULLTEXT_POOL_SIZE = os.environ.get('FULLTEXT_POOL_SIZE', '10')
+"""Maximum number of pooled connections to keep open to the endpoint."""
+
+FULLTEXT_TIMEOUT = os.environ.get('FULLTEXT_TIMEOUT', '10')
+"""Timeout (in seconds) for requests to the fulltext service."""
+
+FULLTEXT_KEEPALIVE = os.environ.get('FULLTEXT_KEEPALIVE', 'true')
+"""If ``true``, connections to the fulltext service are kept alive."""
+
 # Settings for the indexing agent.
 KINESIS_ENDPOINT = os.environ.get('KINESIS_ENDPOINT')
 """Can be used to set an alternate endpoint, e.g. for testing."""
@@ -201,6 +299,10 @@ KINESIS_STREAM = os.environ.get('KINESIS_STREAM', 'MetadataIsAvailable')
 """Name of the stream to which the indexing agent subscribes."""
 
 KINESIS_SHARD_ID = os.environ.get('KINESIS_SHARD_ID', '0')
+"""Shard to consume. If ``*``, all shards are consumed in parallel."""
+
+KINESIS_MAX_WORKERS = os.environ.get('KINESIS_MAX_WORKERS', '8')
+"""Maximum number of shards to consume at once, if consuming all shards."""
 
 KINESIS_CHECKPOINT_VOLUME = os.environ.get('KINESIS_CHECKPOINT_VOLUME',
                                            '/tmp')
@@ -211,6 +313,12 @@ KINESIS_START_AT = os.environ.get('KINESIS_START_AT')
 KINESIS_SLEEP = os.environ.get('KINESIS_SLEEP', '0.1')
 """Amount of time to wait before moving on to the next record."""
 
+KINESIS_BATCH = os.environ.get('KINESIS_BATCH', 'false')
+"""
+If ``true``, all of the records in each ``GetRecords`` response are indexed
+together, with a single metadata request and a single bulk index request.
+"""
+
 
 """
 Flask-S3 plugin settings.
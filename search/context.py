@@ -7,13 +7,16 @@ from flask import current_app as flask_app
 import werkzeug
 
 
-def get_application_config(app: Flask = None) -> Union[dict, os._Environ]:
+def get_application_config(app: Union[Flask, dict, None] = None) \
+        -> Union[dict, os._Environ]:
     """
     Get a configuration from the current app, or fall back to env.
 
     Parameters
     ----------
-    app : :class:`flask.Flask`
+    app : :class:`flask.Flask` or dict
+        An application, or a configuration mapping (e.g. for the ASGI app,
+        which runs without Flask).
 
     Returns
     -------
@@ -25,6 +28,8 @@ def get_application_config(app: Flask = None) -> Union[dict, os._Environ]:
     if app is not None:
         if isinstance(app, Flask):
             return app.config # type: ignore
+        if isinstance(app, dict):
+            return app
     if flask_app:    # Proxy object; falsey if there is no application context.
         return flask_app.config # type: ignore
     return os.environ
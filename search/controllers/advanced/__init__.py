@@ -100,7 +100,7 @@ def search(request_params: MultiDict) -> Response:
 
         if form.validate():
             logger.debug('form is valid')
-            q = _query_from_form(form)
+            q = query_from_form(form)
 
             # Pagination is handled outside of the form.
             q = paginate(q, request_params)
@@ -155,7 +155,7 @@ def search(request_params: MultiDict) -> Response:
     return response_data, status.HTTP_200_OK, {}
 
 
-def _query_from_form(form: forms.AdvancedSearchForm) -> AdvancedQuery:
+def query_from_form(form: forms.AdvancedSearchForm) -> AdvancedQuery:
     """
     Generate a :class:`.AdvancedQuery` from valid :class:`.AdvancedSearchForm`.
 
@@ -0,0 +1,150 @@
+"""
+Handle requests to export all of the results of a search.
+
+The primary entrypoint to this module is :func:`.export`, which accepts the
+same parameters as the simple search (or, if ``advanced`` is present, the
+advanced search) and streams every result as JSON Lines or CSV. Results are
+retrieved from the index a page at a time (see :func:`.index.export`), so
+the size of an export is not limited by memory or by
+:const:`.index.util.MAX_RESULTS`.
+"""
+
+import csv
+import io
+import json
+from itertools import chain
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import InternalServerError, BadRequest
+
+from arxiv import status
+from arxiv.base import logging
+from search.services import index
+from search.domain import Query
+from search.controllers import simple, advanced
+from search.controllers.simple.forms import SimpleSearchForm
+from search.controllers.advanced.forms import AdvancedSearchForm
+
+logger = logging.getLogger(__name__)
+
+Response = Tuple[Iterator[str], int, Dict[str, Any]]
+
+FIELDS = ['paper_id_v', 'title', 'authors.full_name',
+          'primary_classification.category.id', 'submitted_date',
+          'announced_date_first', 'doi', 'journal_ref', 'abstract']
+"""Fields of each document that are exported."""
+
+COLUMNS: List[Tuple[str, Callable[[Dict[str, Any]], Any]]] = [
+    ('id', lambda doc: doc.get('paper_id_v')),
+    ('title', lambda doc: doc.get('title')),
+    ('authors', lambda doc: '; '.join(author.get('full_name', '')
+                                      for author in doc.get('authors', []))),
+    ('primary_category', lambda doc: doc.get('primary_classification', {})
+                                        .get('category', {}).get('id')),
+    ('submitted_date', lambda doc: doc.get('submitted_date')),
+    ('announced_date_first', lambda doc: doc.get('announced_date_first')),
+    ('doi', lambda doc: doc.get('doi')),
+    ('journal_ref', lambda doc: doc.get('journal_ref')),
+    ('abstract', lambda doc: doc.get('abstract'))
+]
+"""Columns of a CSV export, and how to get them from an exported document."""
+
+FORMATS = {'jsonl': 'application/x-ndjson', 'csv': 'text/csv'}
+"""Export formats, and their content types."""
+
+
+def export(request_params: MultiDict) -> Response:
+    """
+    Export all of the results of a search.
+
+    Parameters
+    ----------
+    request_params : dict
+        Parameters of a simple or advanced search, and ``format`` (``jsonl``,
+        the default, or ``csv``).
+
+    Returns
+    -------
+    iterator
+        Yields the export, a line at a time.
+    int
+        HTTP status code.
+    dict
+        Headers to add to the response.
+
+    Raises
+    ------
+    :class:`.BadRequest`
+        The format or the search parameters are not valid.
+    :class:`.InternalServerError`
+        Raised when there is a problem communicating with ES, or there was an
+        unexpected problem executing the query.
+
+    """
+    fmt = request_params.get('format', 'jsonl')
+    if fmt not in FORMATS:
+        raise BadRequest(f"Format must be one of: {', '.join(FORMATS)}")
+    query = _query_from_params(request_params)
+
+    documents = index.export(query, FIELDS)
+    try:
+        # Fetch the first page now, so that errors can still be reported.
+        first = next(documents, None)
+    except index.IndexConnectionError as e:
+        logger.error('IndexConnectionError: %s', e)
+        raise InternalServerError(
+            "There was a problem connecting to the search index. This is "
+            "quite likely a transient issue, so please try your search "
+            "again. If this problem persists, please report it to "
+            "help@arxiv.org."
+        ) from e
+    except index.QueryError as e:
+        logger.error('QueryError: %s', e)
+        raise InternalServerError(
+            "There was a problem executing your query. Please try your "
+            "search again.  If this problem persists, please report it to "
+            "help@arxiv.org."
+        ) from e
+
+    if first is not None:
+        documents = chain([first], documents)
+    lines = _csv_lines(documents) if fmt == 'csv' else _json_lines(documents)
+    headers = {
+        'Content-Type': FORMATS[fmt],
+        'Content-Disposition': f'attachment; filename=arxiv-search.{fmt}'
+    }
+    return lines, status.HTTP_200_OK, headers
+
+
+def _query_from_params(request_params: MultiDict) -> Query:
+    """Get a query from simple or advanced search parameters."""
+    if 'advanced' in request_params:
+        advanced_form = AdvancedSearchForm(request_params)
+        if not advanced_form.validate():
+            logger.debug('form is invalid: %s', str(advanced_form.errors))
+            raise BadRequest('Invalid search parameters')
+        return advanced.query_from_form(advanced_form)
+
+    form = SimpleSearchForm(request_params)
+    if not form.validate():
+        logger.debug('form is invalid: %s', str(form.errors))
+        raise BadRequest('Invalid search parameters')
+    return simple.query_from_form(form)
+
+
+def _json_lines(documents: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    for document in documents:
+        yield json.dumps(document, ensure_ascii=False) + '\n'
+
+
+def _csv_lines(documents: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    header = [name for name, _ in COLUMNS]
+    rows = ([get(document) for _, get in COLUMNS] for document in documents)
+    for row in chain([header], rows):
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
@@ -0,0 +1,87 @@
+"""Tests for the export controller, :mod:`search.controllers.export`."""
+
+import csv
+import io
+import json
+from unittest import TestCase, mock
+
+from werkzeug import MultiDict
+from werkzeug.exceptions import InternalServerError, BadRequest
+
+from arxiv import status
+
+from search.controllers import export
+from search.domain import SimpleQuery
+from search.services.index import IndexConnectionError, QueryError
+
+DOCUMENTS = [
+    {'paper_id_v': '1801.00001v1', 'title': 'Foo',
+     'authors': [{'full_name': 'Jane Bloggs'}, {'full_name': 'Joe Bloggs'}],
+     'primary_classification': {'category': {'id': 'hep-th'}}},
+    {'paper_id_v': '1801.00002v2', 'title': 'Bär, "baz"'}
+]
+
+
+class TestExport(TestCase):
+    """Tests for :func:`.export.export`."""
+
+    def setUp(self):
+        """Set up simple search parameters."""
+        self.params = MultiDict({'searchtype': 'title', 'query': 'foo'})
+
+    @mock.patch('search.controllers.export.index')
+    def test_json_lines(self, mock_index):
+        """Each result is a line of JSON."""
+        mock_index.export.return_value = iter(DOCUMENTS)
+        lines, code, headers = export.export(self.params)
+        self.assertEqual(code, status.HTTP_200_OK)
+        self.assertEqual(headers['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([json.loads(line) for line in lines], DOCUMENTS)
+
+        query, fields = mock_index.export.call_args[0]
+        self.assertIsInstance(query, SimpleQuery)
+        self.assertEqual(query.value, 'foo')
+        self.assertEqual(fields, export.FIELDS)
+
+    @mock.patch('search.controllers.export.index')
+    def test_csv(self, mock_index):
+        """Results are flattened into rows, after a header."""
+        mock_index.export.return_value = iter(DOCUMENTS)
+        self.params['format'] = 'csv'
+        lines, code, headers = export.export(self.params)
+        self.assertEqual(headers['Content-Type'], 'text/csv')
+        rows = list(csv.reader(io.StringIO(''.join(lines))))
+        self.assertEqual(rows[0][:4],
+                         ['id', 'title', 'authors', 'primary_category'])
+        self.assertEqual(rows[1][:4], ['1801.00001v1', 'Foo',
+                                       'Jane Bloggs; Joe Bloggs', 'hep-th'])
+        self.assertEqual(rows[2][:3], ['1801.00002v2', 'Bär, "baz"', ''])
+
+    @mock.patch('search.controllers.export.index')
+    def test_no_results(self, mock_index):
+        """A CSV export with no results has only the header."""
+        mock_index.export.return_value = iter([])
+        self.params['format'] = 'csv'
+        lines, _, _ = export.export(self.params)
+        self.assertEqual(len(list(lines)), 1)
+
+    @mock.patch('search.controllers.export.index')
+    def test_index_errors(self, mock_index):
+        """Errors retrieving the first page are reported before streaming."""
+        mock_index.IndexConnectionError = IndexConnectionError
+        mock_index.QueryError = QueryError
+        for error in (IndexConnectionError, QueryError):
+            def documents():
+                raise error('nope')
+                yield
+            mock_index.export.return_value = documents()
+            with self.assertRaises(InternalServerError):
+                export.export(self.params)
+
+    def test_bad_request(self):
+        """An unknown format or invalid search is a bad request."""
+        self.params['format'] = 'xml'
+        with self.assertRaises(BadRequest):
+            export.export(self.params)
+        with self.assertRaises(BadRequest):
+            export.export(MultiDict({'searchtype': 'nope', 'query': 'foo'}))
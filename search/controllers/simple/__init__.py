@@ -115,7 +115,7 @@ def search(request_params: MultiDict) -> Response:
     q: Optional[Query]
     if form.validate():
         logger.debug('form is valid')
-        q = _query_from_form(form)
+        q = query_from_form(form)
 
         # Pagination is handled outside of the form.
         q = paginate(q, request_params)
@@ -218,7 +218,7 @@ def retrieve_document(document_id: str) -> Response:
     return {'document': result}, status.HTTP_200_OK, {}
 
 
-def _query_from_form(form: SimpleSearchForm) -> SimpleQuery:
+def query_from_form(form: SimpleSearchForm) -> SimpleQuery:
     """
     Generate a :class:`.SimpleQuery` from valid :class:`.SimpleSearchForm`.
 
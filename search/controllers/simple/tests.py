@@ -232,7 +232,7 @@ class TestSimpleSearchForm(TestCase):
 
 
 class TestQueryFromForm(TestCase):
-    """Tests for :func:`.simple._query_from_form`."""
+    """Tests for :func:`.simple.query_from_form`."""
 
     def test_multiple_simple(self):
         """Form data has three simple."""
@@ -241,7 +241,7 @@ class TestQueryFromForm(TestCase):
             'query': 'foo title'
         })
         form = SimpleSearchForm(data)
-        query = simple._query_from_form(form)
+        query = simple.query_from_form(form)
         self.assertIsInstance(query, SimpleQuery,
                               "Should return an instance of SimpleQuery")
 
@@ -253,7 +253,7 @@ class TestQueryFromForm(TestCase):
             'order': 'submitted_date'
         })
         form = SimpleSearchForm(data)
-        query = simple._query_from_form(form)
+        query = simple.query_from_form(form)
         self.assertIsInstance(query, SimpleQuery,
                               "Should return an instance of SimpleQuery")
         self.assertEqual(query.order, 'submitted_date')
@@ -266,7 +266,7 @@ class TestQueryFromForm(TestCase):
             'order': 'None'    #
         })
         form = SimpleSearchForm(data)
-        query = simple._query_from_form(form)
+        query = simple.query_from_form(form)
         self.assertIsInstance(query, SimpleQuery,
                               "Should return an instance of SimpleQuery")
         self.assertIsNone(query.order, "Order should be None")
@@ -1,22 +1,150 @@
 """Base domain classes for search service."""
 
-from typing import Any, Optional, List, Dict
+from typing import Any, Optional, List, Dict, Iterable, Tuple, Type, \
+    TypeVar, Union
 from datetime import datetime, date
 from operator import attrgetter
 from pytz import timezone
+import json
 import re
 
-from dataclasses import dataclass, field
-from dataclasses import asdict as _asdict
+from dataclasses import dataclass, field, fields
 
 EASTERN = timezone('US/Eastern')
 
+_C = TypeVar('_C', bound=type)
+_D = TypeVar('_D')
+
+_VERSIONED = re.compile(r'^(.+?)(?:v(?P<version>[\d]+))?$')
+
+
+_LEAF_TYPES = (str, int, float, bool, datetime, date, dict, type(None))
+
+_plans: Dict[type, List[Tuple[str, bool]]] = {}
+
+
+def _is_leaf(annotation: Any) -> bool:
+    """
+    Determine whether values of a field never contain dataclasses.
+
+    Dicts in the domain are only ever keyed/valued by primitives, so any
+    dict-typed field is a leaf; lists and unions are leaves if their
+    element/member types are.
+    """
+    if annotation in _LEAF_TYPES:
+        return True
+    origin = getattr(annotation, '__origin__', None)
+    if annotation is Dict or origin in (dict, Dict):
+        return True
+    args = getattr(annotation, '__args__', None) or ()
+    if origin in (list, List) or origin is Union:
+        return bool(args) and all(_is_leaf(arg) for arg in args)
+    return False
+
+
+def _plan(cls: type) -> List[Tuple[str, bool]]:
+    plan = _plans.get(cls)
+    if plan is None:
+        plan = [(f.name, _is_leaf(f.type)) for f in fields(cls)]
+        _plans[cls] = plan
+    return plan
 
-def asdict(obj: Any) -> dict:
-    """Coerce a dataclass object to a dict."""
-    return {key: value for key, value in _asdict(obj).items()}
 
+def _convert(value: Any) -> Any:
+    if hasattr(type(value), '__dataclass_fields__'):
+        return asdict(value)
+    if isinstance(value, (list, tuple)):
+        return type(value)(_convert(item) for item in value)
+    if isinstance(value, dict):
+        return {key: _convert(item) for key, item in value.items()}
+    return value
 
+
+def asdict(obj: Any) -> dict:
+    """
+    Coerce a dataclass object to a dict.
+
+    Unlike :func:`dataclasses.asdict`, this does not deep-copy the object.
+    Only fields that may contain dataclasses (according to their type
+    annotations) are converted; other values (e.g. lists of author dicts) are
+    shared with ``obj``, and so should not be modified in place.
+    """
+    data = {}
+    for name, leaf in _plan(type(obj)):
+        value = getattr(obj, name)
+        data[name] = value if leaf else _convert(value)
+    return data
+
+
+class _Encoder(json.JSONEncoder):
+    """Encodes domain objects without first converting them to dicts."""
+
+    def default(self, obj: Any) -> Any:
+        if hasattr(type(obj), '__dataclass_fields__'):
+            # Nested dataclasses are passed back to this method as needed.
+            return {name: getattr(obj, name) for name, _ in _plan(type(obj))}
+        if isinstance(obj, date):     # Includes datetime.
+            return obj.isoformat()
+        if hasattr(obj, 'to_dict'):   # E.g. fields of a search hit.
+            return obj.to_dict()
+        if isinstance(obj, Iterable):
+            return list(obj)
+        return super(_Encoder, self).default(obj)
+
+
+_encoder = _Encoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def to_json(obj: Any) -> str:
+    """
+    Serialize a domain object, or a structure that contains them, to JSON.
+
+    This is equivalent to ``json.dumps(asdict(obj))`` (dates are formatted as
+    they are by the Elasticsearch client), but builds no intermediate dicts
+    other than one (shallow) dict per dataclass.
+    """
+    return _encoder.encode(obj)
+
+
+def to_json_bytes(obj: Any) -> bytes:
+    """Serialize a domain object to UTF-8 encoded JSON; see :func:`to_json`."""
+    return _encoder.encode(obj).encode('utf-8')
+
+
+def _slotted(cls: _C) -> _C:
+    """
+    Recreate a dataclass so that its fields are stored in ``__slots__``.
+
+    Instances of the new class have no per-instance ``__dict__``, which
+    shrinks classes with as many fields as :class:`.DocMeta` and
+    :class:`.Document` several-fold. As a side-effect, attributes that are
+    not fields can no longer be set on instances.
+    """
+    names = tuple(f.name for f in fields(cls))
+    namespace = dict(cls.__dict__)
+    for name in names + ('__dict__', '__weakref__'):
+        namespace.pop(name, None)   # Defaults are kept by ``__init__``.
+    namespace['__slots__'] = names
+    slotted = type(cls)(cls.__name__, cls.__bases__, namespace)
+    slotted._field_names = {name: name for name in names}   # type: ignore
+    return slotted  # type: ignore
+
+
+def _from_dict(cls: Type[_D], data: Dict[str, Any]) -> _D:
+    """
+    Create an instance of a :func:`_slotted` class from a dict.
+
+    Keys that are not fields are ignored. The keys of dicts decoded from JSON
+    are not interned, so CPython matches them to the parameters of
+    ``__init__`` by comparing strings one by one; replacing them with the
+    (interned) field names makes construction several times faster.
+    """
+    names: Dict[str, str] = cls._field_names     # type: ignore
+    return cls(**{names[key]: value    # type: ignore
+                  for key, value in data.items() if key in names})
+
+
+@_slotted
 @dataclass
 class DocMeta:
     """Metadata for an arXiv paper, retrieved from the core repository."""
@@ -60,6 +188,16 @@ class DocMeta:
     latest_version: int = field(default=1)
     latest: str = field(default_factory=str)
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DocMeta':
+        """
+        Create from (e.g.) a docmeta response, ignoring any unknown keys.
+
+        Unlike ``DocMeta(**data)``, this does not fail when the docmeta
+        service adds a field.
+        """
+        return _from_dict(cls, data)
+
 
 @dataclass
 class Fulltext:
@@ -123,6 +261,8 @@ class Query:
     page_size: int = field(default=50)
     page_start: int = field(default=0)
     include_older_versions: bool = field(default=False)
+    cursor: Optional[str] = field(default=None)
+    """If set, page with this cursor instead of ``page_start``."""
 
     @property
     def page_end(self) -> int:
@@ -151,6 +291,7 @@ class SimpleQuery(Query):
     value: str = field(default_factory=str)
 
 
+@_slotted
 @dataclass(init=True)
 class Document:
     """A search document, representing an arXiv paper."""
@@ -208,7 +349,7 @@ class Document:
     def __post_init__(self) -> None:
         """Set latest_version, if not already set."""
         if not self.latest_version and self.latest:
-            m = re.match(r'^(.+?)(?:v(?P<version>[\d]+))?$', self.latest)
+            m = _VERSIONED.match(self.latest)
             if m and m.group('version'):
                 self.latest_version = int(m.group('version'))
             else:
@@ -219,6 +360,11 @@ class Document:
         """Get the names of fields on this class."""
         return cls.__dataclass_fields__.keys()  # type: ignore
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Document':
+        """Create from (e.g.) an indexed document, ignoring unknown keys."""
+        return _from_dict(cls, data)
+
 
 @dataclass
 class DocumentSet:
@@ -227,3 +373,10 @@ class DocumentSet:
     metadata: Dict[str, Any]
     results: List[Document]
     # __schema__ = 'schema/DocumentSet.json'
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'DocumentSet':
+        """Create from (e.g.) a deserialized :class:`.DocumentSet`."""
+        return cls(metadata=data['metadata'],
+                   results=[Document.from_dict(result)
+                            for result in data['results']])
@@ -0,0 +1,55 @@
+"""Tests for :mod:`search.domain`."""
+
+import dataclasses
+import json
+from datetime import datetime
+from unittest import TestCase
+
+from search.domain import Document, DocumentSet, AdvancedQuery, DateRange, \
+    FieldedSearchList, FieldedSearchTerm, Classification, ClassificationList, \
+    asdict, to_json
+
+
+class TestSerialization(TestCase):
+    """Tests for :func:`.asdict` and :func:`.to_json`."""
+
+    def setUp(self):
+        """Create a document with nested values."""
+        self.document = Document(
+            paper_id='1234.56789',
+            submitted_date=datetime(2018, 1, 2, 3, 4, 5),
+            authors=[{'first_name': 'Jane', 'last_name': 'Bloggs'}],
+            primary_classification=Classification(category='cs.DL'),
+            secondary_classification=ClassificationList([
+                Classification(category='cs.IR')
+            ])
+        )
+
+    def test_asdict(self):
+        """The result is the same as that of :func:`dataclasses.asdict`."""
+        document_set = DocumentSet(metadata={'total': 1},
+                                   results=[self.document])
+        self.assertEqual(asdict(document_set),
+                         dataclasses.asdict(document_set))
+        query = AdvancedQuery(
+            date_range=DateRange(),
+            terms=FieldedSearchList([FieldedSearchTerm('AND', 'title', 'x')])
+        )
+        self.assertEqual(asdict(query), dataclasses.asdict(query))
+
+    def test_asdict_is_shallow(self):
+        """Values that cannot contain dataclasses are not copied."""
+        data = asdict(self.document)
+        self.assertIs(data['authors'], self.document.authors)
+        self.assertEqual(data['primary_classification'],
+                         {'group': None, 'archive': None, 'category': 'cs.DL'})
+
+    def test_to_json(self):
+        """Documents are serialized without converting them to dicts."""
+        data = json.loads(to_json(self.document))
+        self.assertEqual(data['submitted_date'], '2018-01-02T03:04:05')
+        self.assertEqual(data['secondary_classification'][0]['category'],
+                         'cs.IR')
+        expected = dataclasses.asdict(self.document)
+        expected['submitted_date'] = '2018-01-02T03:04:05'
+        self.assertEqual(data, expected)
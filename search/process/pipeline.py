@@ -0,0 +1,170 @@
+"""
+Staged pipeline for (re)indexing many papers at once.
+
+Each stage is a generator that consumes the output of the previous stage, so
+the stages can be composed freely; e.g.::
+
+    batches = fetch(paper_ids, metadata.bulk_retrieve, n_workers=4)
+    documents = transform_all(batches, n_workers=8)
+    for ident in index.parallel_bulk_add_documents(documents):
+        ...
+
+Within a stage, work is done concurrently: :func:`.fetch` uses a thread pool
+(retrieval is I/O-bound), and :func:`.transform_all` uses a process pool
+(transformation is CPU-bound). Each stage only runs ahead of its consumer by
+a bounded number of batches, so a slow indexer applies backpressure all the
+way back to metadata retrieval, and memory use stays constant no matter how
+many papers are indexed.
+"""
+
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, \
+    ProcessPoolExecutor
+from itertools import islice
+from typing import Callable, Deque, Iterable, Iterator, List, Optional, \
+    TypeVar
+
+from search.domain import DocMeta, Document
+from . import transform
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+def chunks(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Group ``items`` into lists of at most ``size``."""
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _map_bounded(executor: Executor, func: Callable[[T], R],
+                 items: Iterable[T], max_pending: int) -> Iterator[R]:
+    """
+    Map ``func`` over ``items`` using ``executor``, in order.
+
+    At most ``max_pending`` items are submitted ahead of the consumer; unlike
+    :meth:`Executor.map`, ``items`` is not consumed eagerly.
+    """
+    pending: Deque[Future] = deque()
+    for item in items:
+        pending.append(executor.submit(func, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def fetch(paper_ids: Iterable[str],
+          retrieve: Callable[[List[str]], List[DocMeta]],
+          n_workers: int = 4, chunk_size: int = 50,
+          max_pending: Optional[int] = None) -> Iterator[List[DocMeta]]:
+    """
+    Retrieve metadata for ``paper_ids`` concurrently.
+
+    Parameters
+    ----------
+    paper_ids : iterable
+        Paper IDs; consumed lazily.
+    retrieve : callable
+        Retrieves a list of :class:`.DocMeta` for a list of paper IDs, e.g.
+        :func:`search.services.metadata.bulk_retrieve`. Must be thread-safe.
+    n_workers : int
+        Number of concurrent requests.
+    chunk_size : int
+        Number of paper IDs per request.
+    max_pending : int
+        Maximum number of requests to run ahead of the consumer. Default: two
+        per worker.
+
+    Returns
+    -------
+    iterator
+        Yields a list of :class:`.DocMeta` for each chunk of paper IDs, in
+        the order of ``paper_ids``.
+
+    """
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        yield from _map_bounded(executor, retrieve,
+                                chunks(paper_ids, chunk_size),
+                                max_pending or 2 * n_workers)
+
+
+def transform_all(batches: Iterable[List[DocMeta]], n_workers: int = 4,
+                  max_pending: Optional[int] = None,
+                  throughput: Optional['Throughput'] = None) \
+        -> Iterator[Document]:
+    """
+    Transform batches of :class:`.DocMeta` into :class:`.Document`.
+
+    Parameters
+    ----------
+    batches : iterable
+        Each item is a list of :class:`.DocMeta`, e.g. from :func:`.fetch`.
+    n_workers : int
+        Number of worker processes. If 0, transformation is performed in
+        the current process.
+    max_pending : int
+        Maximum number of batches to transform ahead of the consumer.
+        Default: two per worker.
+    throughput : :class:`.Throughput`
+        If provided, updated with the number of documents in each batch as
+        it is transformed.
+
+    Returns
+    -------
+    iterator
+        Yields :class:`.Document`, in the order of ``batches``.
+
+    """
+    if n_workers < 1:
+        transformed: Iterable[List[Document]] = \
+            map(transform.to_search_documents, batches)
+        yield from _count(transformed, throughput)
+        return
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        yield from _count(
+            _map_bounded(executor, transform.to_search_documents, batches,
+                         max_pending or 2 * n_workers),
+            throughput
+        )
+
+
+def _count(batches: Iterable[List[T]],
+           throughput: Optional['Throughput']) -> Iterator[T]:
+    for batch in batches:
+        if throughput is not None:
+            throughput.update(len(batch))
+        yield from batch
+
+
+class Throughput(object):
+    """Tracks the rate at which items pass through a pipeline."""
+
+    def __init__(self) -> None:
+        """Start the clock."""
+        self.count = 0
+        self.start = time.monotonic()
+
+    def update(self, n: int = 1) -> None:
+        """Record that ``n`` more items have been processed."""
+        self.count += n
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the clock was started."""
+        return time.monotonic() - self.start
+
+    @property
+    def rate(self) -> float:
+        """Items processed per second."""
+        elapsed = self.elapsed
+        return self.count / elapsed if elapsed > 0 else 0.
+
+    def __str__(self) -> str:
+        """Summarize the throughput so far."""
+        return f'{self.count} in {self.elapsed:.1f}s ({self.rate:.1f}/s)'
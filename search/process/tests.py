@@ -1,10 +1,10 @@
-"""Tests for :mod:`search.transform`."""
+"""Tests for :mod:`search.process`."""
 
 from unittest import TestCase
 import json
 import jsonschema
 from datetime import datetime, date
-from search.process import transform
+from search.process import transform, pipeline
 from search.domain import Document, DocMeta
 
 
@@ -330,6 +330,23 @@ class TestTransformMetdata(TestCase):
         self.assertEqual(doc.comments, 'comments!')
 
 
+class TestCompile(TestCase):
+    """Test compilation of the table of transformations."""
+
+    def test_single_source(self):
+        """A table with a single source field or function is applied."""
+        meta = DocMeta(paper_id='1234.56789', title='foo')
+        self.assertEqual(
+            transform._compile([('title', 'title', True)])(meta),
+            {'title': 'foo'}
+        )
+        self.assertEqual(
+            transform._compile([('upper', lambda meta: meta.title.upper(),
+                                 False)])(meta),
+            {'upper': 'FOO'}
+        )
+
+
 class TestTransformBulkDocmeta(TestCase):
     """Test transformation of docmeta retrieved from bulk endpoint."""
 
@@ -361,3 +378,81 @@ class TestTransformBulkDocmeta(TestCase):
                 self.assertFalse(doc.is_current)
                 self.assertEqual(doc.id, doc.paper_id_v)
             self.assertEqual(doc.latest_version, 2)
+
+
+class TestTransformBatch(TestCase):
+    """Tests for :func:`.transform.to_search_documents`."""
+
+    def test_same_as_single(self):
+        """Each document is the same as if it were transformed on its own."""
+        with open('tests/data/docmeta_bulk.json') as f:
+            data = json.load(f)
+        documents = transform.to_search_documents(
+            [DocMeta(**datum) for datum in data]
+        )
+        self.assertEqual(documents, [
+            transform.to_search_document(DocMeta(**datum)) for datum in data
+        ])
+
+    def test_authors_memoized(self):
+        """Names shared by papers are only normalized once."""
+        def author():
+            return {'first_name': 'Jane  Q.', 'last_name': 'Bloggs'}
+        docmeta = [DocMeta(paper_id=f'1234.5678{i}',
+                           authors_parsed=[author()], author_owners=[author()])
+                   for i in range(3)]
+        transform._normalizeName.cache_clear()
+        documents = transform.to_search_documents(docmeta)
+        info = transform.name_cache_info()
+        self.assertEqual((info['hits'], info['misses']), (5, 1))
+        self.assertAlmostEqual(info['hit_rate'], 5 / 6)
+        self.assertEqual(documents[0].authors[0]['full_name'],
+                         'Jane Q. Bloggs')
+        self.assertEqual(documents[0].owners[0]['full_name_initialized'],
+                         'J Q Bloggs')
+        self.assertIs(documents[0].authors[0]['full_name'],
+                      documents[2].owners[0]['full_name'])
+
+
+class TestPipeline(TestCase):
+    """Tests for :mod:`search.process.pipeline`."""
+
+    def test_fetch(self):
+        """Metadata is retrieved in chunks, in order."""
+        def retrieve(paper_ids):
+            return [DocMeta(paper_id=paper_id) for paper_id in paper_ids]
+
+        paper_ids = [f'1234.{i:05d}' for i in range(12)]
+        batches = list(pipeline.fetch(paper_ids, retrieve, n_workers=3,
+                                      chunk_size=5))
+        self.assertEqual([len(batch) for batch in batches], [5, 5, 2])
+        self.assertEqual([dm.paper_id for batch in batches for dm in batch],
+                         paper_ids)
+
+    def test_fetch_is_bounded(self):
+        """Retrieval does not run far ahead of the consumer."""
+        requested = []
+
+        def retrieve(paper_ids):
+            requested.extend(paper_ids)
+            return [DocMeta(paper_id=paper_id) for paper_id in paper_ids]
+
+        paper_ids = (f'1234.{i:05d}' for i in range(1_000))
+        batches = pipeline.fetch(paper_ids, retrieve, n_workers=2,
+                                 chunk_size=10)
+        next(batches)
+        self.assertLessEqual(len(requested), 40)
+        batches.close()
+
+    def test_transform_all(self):
+        """Documents are generated in order, in or out of process."""
+        batches = [[DocMeta(paper_id='1234.56789', version=1)],
+                   [DocMeta(paper_id='1234.56789', version=2),
+                    DocMeta(paper_id='1234.56790', version=1)]]
+        expected = ['1234.56789v1', '1234.56789v2', '1234.56790v1']
+        for n_workers in (0, 2):
+            throughput = pipeline.Throughput()
+            documents = list(pipeline.transform_all(batches, n_workers,
+                                                    throughput=throughput))
+            self.assertEqual([doc.id for doc in documents], expected)
+            self.assertEqual(throughput.count, 3)
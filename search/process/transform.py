@@ -1,8 +1,22 @@
-"""Responsible for transforming metadata & fulltext into a search document."""
+"""
+Responsible for transforming metadata & fulltext into a search document.
 
+:func:`.to_search_document` transforms a single :class:`.DocMeta`, and
+:func:`.to_search_documents` transforms a batch. Both use a function that is
+generated once from the table of ``_transformations``, rather than
+interpreting the table for every document.
+
+The normalized forms of author names are cached (see :func:`.name_cache_info`)
+and shared by all documents transformed in a process, since the members of
+large collaborations appear on hundreds of papers.
+"""
+
+from functools import lru_cache, partial
+from operator import attrgetter, itemgetter
 from string import punctuation
+from sys import intern
 import re
-from typing import Callable, Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from search.domain import Document, DocMeta, Fulltext
 
 DEFAULT_LICENSE = {
@@ -42,13 +56,50 @@ def _constructACMClass(meta: DocMeta) -> Optional[list]:
     return [obj.strip() for obj in meta.acm_class.split(';')]
 
 
+_WHITESPACE = re.compile(r'\s+')
+
+NameForms = Tuple[str, str, str]
+"""The ``full_name``, ``initials`` and ``full_name_initialized`` of a name."""
+
+NAME_CACHE_SIZE = 65_536
+"""Maximum number of author names for which to retain normalized forms."""
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def _normalizeName(first_name: str, last_name: str) -> NameForms:
+    """
+    Get the normalized forms of an author name.
+
+    The forms are interned, so documents for papers by the same authors share
+    the same strings even if the name has been evicted from the cache.
+    """
+    full_name = _WHITESPACE.sub(' ', f"{first_name} {last_name}")
+    initials = " ".join([pt[0] for pt in first_name.split() if pt])
+    name_parts = first_name.split() + last_name.split()
+    full_name_initialized = ' '.join([part[0] for part in name_parts[:-1]]
+                                     + [name_parts[-1]])
+    return intern(full_name), intern(initials), intern(full_name_initialized)
+
+
+def name_cache_info() -> Dict[str, Any]:
+    """Get hit rate statistics for the cache of normalized author names."""
+    info = _normalizeName.cache_info()
+    requests = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'maxsize': info.maxsize,
+        'hit_rate': info.hits / requests if requests else 0.0
+    }
+
+
 def _transformAuthor(author: dict) -> Optional[Dict]:
     if (not author['last_name']) and (not author['first_name']):
         return None
-    author['full_name'] = re.sub(r'\s+', ' ', f"{author['first_name']} {author['last_name']}")
-    author['initials'] = " ".join([pt[0] for pt in author['first_name'].split() if pt])
-    name_parts = author['first_name'].split() + author['last_name'].split()
-    author['full_name_initialized'] = ' '.join([part[0] for part in name_parts[:-1]] + [name_parts[-1]])
+    (author['full_name'], author['initials'],
+     author['full_name_initialized']) = \
+        _normalizeName(author['first_name'], author['last_name'])
     return author
 
 
@@ -130,6 +181,78 @@ _transformations: List[Tuple[str, TransformType, bool]] = [
 ]
 
 
+def _compile(transformations: List[Tuple[str, TransformType, bool]]) \
+        -> Callable[[DocMeta], Dict[str, Any]]:
+    """
+    Make a function that applies ``transformations`` to a DocMeta.
+
+    Sources are resolved once, here, rather than being looked up and
+    type-checked for every DocMeta: the fields of the DocMeta are read with a
+    single :func:`operator.attrgetter`, and each transformation function is
+    called once per DocMeta, even if it is the source of several fields (e.g.
+    ``_constructPaperVersion`` for ``id`` and ``paper_id_v``).
+    """
+    fields = DocMeta.__dataclass_fields__   # type: ignore
+    names = list(dict.fromkeys(
+        source for _, source, _ in transformations
+        if isinstance(source, str) and source in fields
+    ))
+    funcs: Dict[TransformType, Callable[[DocMeta], Any]] = {}
+    for _, source, _ in transformations:
+        if source in funcs or source in names:
+            continue
+        if isinstance(source, str):
+            funcs[source] = partial(_getattr_or_none, name=source)
+        else:
+            funcs[source] = source
+    # Values are computed in the order of ``names`` and then ``funcs``.
+    positions = {source: i for i, source in enumerate([*names, *funcs])}
+    getters = list(funcs.values())
+    get_fields = _tuple_getter(attrgetter, names)
+    required = [(key, positions[source])
+                for key, source, is_required in transformations
+                if is_required]
+    optional = [(key, positions[source])
+                for key, source, is_required in transformations
+                if not is_required]
+    get_required = _tuple_getter(itemgetter,
+                                 [position for _, position in required])
+    required_keys = [key for key, _ in required]
+
+    def transform(meta: DocMeta) -> Dict[str, Any]:
+        values = [*get_fields(meta), *[getter(meta) for getter in getters]]
+        data = dict(zip(required_keys, get_required(values)))
+        for key, position in optional:
+            value = values[position]
+            if value is not None:
+                data[key] = value
+        return data
+    return transform
+
+
+def _tuple_getter(make: Callable[..., Callable[[Any], Any]],
+                  items: List[Any]) -> Callable[[Any], Tuple]:
+    """
+    Make a getter with ``make`` (e.g. ``attrgetter``) that returns a tuple.
+
+    Given a single item, :func:`operator.attrgetter` and
+    :func:`operator.itemgetter` return the bare value; given none, they fail.
+    """
+    if not items:
+        return lambda obj: ()
+    if len(items) == 1:
+        get = make(items[0])
+        return lambda obj: (get(obj),)
+    return make(*items)
+
+
+def _getattr_or_none(meta: DocMeta, name: str) -> Any:
+    return getattr(meta, name, None)
+
+
+_transform = _compile(_transformations)
+
+
 def to_search_document(metadata: DocMeta, fulltext: Optional[Fulltext] = None)\
         -> Document:
     """
@@ -149,16 +272,31 @@ def to_search_document(metadata: DocMeta, fulltext: Optional[Fulltext] = None)\
     ValueError
 
     """
-    data = {}
-    for key, source, is_required in _transformations:
-        if isinstance(source, str):
-            value = getattr(metadata, source, None)
-        elif hasattr(source, '__call__'):
-            value = source(metadata)
-        if value is None and not is_required:
-            continue
-        data[key] = value
+    data = _transform(metadata)
     if fulltext:
         data['fulltext'] = fulltext.content
     return Document(**data)     # type: ignore
     # See https://github.com/python/mypy/issues/3937
+
+
+def to_search_documents(metadata: List[DocMeta]) -> List[Document]:
+    """
+    Transform a batch of metadata into search documents.
+
+    This is a module-level function of picklable arguments, so it can be run
+    in a process pool; each worker process then has its own cache of
+    normalized author names.
+
+    Parameters
+    ----------
+    metadata : list
+        Items are :class:`.DocMeta`.
+
+    Returns
+    -------
+    list
+        A :class:`.Document` for each item in ``metadata``, in order.
+
+    """
+    return [Document(**_transform(meta))    # type: ignore
+            for meta in metadata]
@@ -7,14 +7,14 @@ from urllib.parse import urljoin, urlparse, parse_qs, urlencode, urlunparse
 
 from flask.json import jsonify
 from flask import Blueprint, render_template, redirect, request, Response, \
-    url_for
+    url_for, stream_with_context
 from werkzeug.urls import Href, url_encode, url_parse, url_unparse, url_encode
 from werkzeug.datastructures import MultiDict, ImmutableMultiDict
 
 from arxiv import status
 from arxiv.base import logging
 from werkzeug.exceptions import InternalServerError
-from search.controllers import simple, advanced, health_check
+from search.controllers import simple, advanced, export, health_check
 
 logger = logging.getLogger(__name__)
 
@@ -112,6 +112,13 @@ def group_search(groups_or_archives: str) -> Union[str, Response]:
     )
 
 
+@blueprint.route('export', methods=['GET'])
+def export_results() -> Response:
+    """Stream all of the results of a search, as JSON Lines or CSV."""
+    lines, code, headers = export.export(request.args)
+    return Response(stream_with_context(lines), status=code, headers=headers)
+
+
 @blueprint.route('status', methods=['GET', 'HEAD'])
 def service_status() -> Union[str, Response]:
     """
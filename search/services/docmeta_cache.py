@@ -0,0 +1,258 @@
+"""
+Read-through caching of :class:`.DocMeta`.
+
+:class:`.DocMetaSession` can optionally use a :class:`.DocMetaCache` to avoid
+retrieving the same metadata from the docmeta service again, e.g. when the
+agent receives several notifications for a paper in quick succession, or when
+papers are reindexed.
+
+Entries are keyed on paper ID and version. The cache has two tiers: an
+in-process LRU cache, and (optionally) an on-disk :class:`.DocMetaStore` that
+persists the metadata for all versions of each paper for which a complete set
+of versions has been seen.
+
+Entries expire after a time-to-live. Metadata are also never replaced by
+metadata with an older ``modified_date``/``updated_date`` (e.g. from a lagging
+endpoint), and when a new version of a paper is seen the cached metadata for
+earlier versions (the ``is_current`` and ``latest_version`` fields of which
+are now stale) are discarded.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from search.domain import DocMeta
+from .docmeta_store import DocMetaStore
+
+
+def _modified(docmeta: DocMeta) -> Optional[datetime]:
+    """Get the time at which the metadata were last changed, if known."""
+    for value in (docmeta.updated_date, docmeta.modified_date):
+        if value:
+            try:
+                return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S%z')
+            except ValueError:
+                continue
+    return None
+
+
+class DocMetaCache(object):
+    """A two-tier cache of :class:`.DocMeta`, keyed on paper ID and version."""
+
+    def __init__(self, maxsize: int = 10_000, ttl: Optional[float] = 300,
+                 store: Optional[DocMetaStore] = None) -> None:
+        """
+        Initialize an empty cache.
+
+        Parameters
+        ----------
+        maxsize : int
+            Maximum number of versions to retain in memory.
+        ttl : float
+            Number of seconds for which cached metadata may be used. If
+            ``None``, cached metadata do not expire.
+        store : :class:`.DocMetaStore`
+            If provided, the on-disk tier of the cache.
+
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._latest: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self, stored: float) -> bool:
+        return self.ttl is None or stored + self.ttl >= time.time()
+
+    def _get_versions(self, paper_id: str) -> Optional[List[DocMeta]]:
+        """Get all versions of a paper from memory, if they are all fresh."""
+        latest = self._latest.get(paper_id)
+        if latest is None:
+            return None
+        versions: List[DocMeta] = []
+        for version in range(1, latest + 1):
+            entry: Optional[Tuple[float, DocMeta]] = \
+                self._data.get((paper_id, version))
+            if entry is None or not self._fresh(entry[0]):
+                return None
+            versions.append(entry[1])
+        for version in range(1, latest + 1):
+            self._data.move_to_end((paper_id, version))
+        return versions
+
+    def _load(self, paper_ids: List[str]) -> Dict[str, List[DocMeta]]:
+        """Load papers from the on-disk tier into memory."""
+        if self.store is None or not paper_ids:
+            return {}
+        found = self.store.get_many_stored(paper_ids, max_age=self.ttl)
+        # Keep the time at which the metadata were stored on disk, rather
+        # than the time at which they were loaded.
+        self._put((docmeta for versions, _ in found.values()
+                   for docmeta in versions), persist=False,
+                  stored={paper_id: stored
+                          for paper_id, (_, stored) in found.items()})
+        return {paper_id: versions
+                for paper_id, (versions, _) in found.items()}
+
+    def get(self, paper_id: str, version: Optional[int] = None) \
+            -> Optional[DocMeta]:
+        """
+        Get cached metadata for a version of a paper.
+
+        Parameters
+        ----------
+        paper_id : str
+            A **versionless** arXiv identifier.
+        version : int
+            If not provided, the latest version is returned.
+
+        Returns
+        -------
+        :class:`.DocMeta` or None
+
+        """
+        for attempt in range(2):
+            with self._lock:
+                latest = self._latest.get(paper_id)
+                key = (paper_id, version if version is not None else latest)
+                entry: Optional[Tuple[float, DocMeta]] = self._data.get(key)
+                if entry is not None and self._fresh(entry[0]):
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+            if attempt == 0 and not self._load([paper_id]):
+                break
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def get_many(self, paper_ids: Iterable[str]) -> Dict[str, List[DocMeta]]:
+        """
+        Get cached metadata for all versions of many papers.
+
+        Parameters
+        ----------
+        paper_ids : iterable
+            **Versionless** arXiv identifiers. Papers for which the metadata
+            of any version are missing or expired are omitted.
+
+        Returns
+        -------
+        dict
+            Maps paper IDs to the :class:`.DocMeta` for each version.
+
+        """
+        found: Dict[str, List[DocMeta]] = {}
+        missing: List[str] = []
+        with self._lock:
+            for paper_id in paper_ids:
+                versions = self._get_versions(paper_id)
+                if versions is None:
+                    missing.append(paper_id)
+                else:
+                    found[paper_id] = versions
+        loaded = self._load(missing)
+        found.update(loaded)
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(missing) - len(loaded)
+        return found
+
+    def put(self, docmeta: Iterable[DocMeta]) -> None:
+        """
+        Add metadata to the cache.
+
+        Metadata that were modified earlier than the metadata already in the
+        cache for the same version, or that predate the latest version that
+        has been seen, are ignored. Metadata for all versions of
+        a paper are written to the on-disk tier, once they are all cached.
+        """
+        self._put(docmeta, persist=True)
+
+    def _put(self, docmeta: Iterable[DocMeta], persist: bool,
+             stored: Optional[Dict[str, float]] = None) -> None:
+        now = time.time()
+        stored = stored or {}
+        updated: Dict[str, None] = OrderedDict()
+        superseded: List[str] = []
+        with self._lock:
+            for meta in docmeta:
+                paper_id = meta.paper_id
+                latest = max(meta.version, meta.latest_version)
+                known = self._latest.get(paper_id, 0)
+                if latest < known:      # Predates the latest version.
+                    continue
+                if latest > known:
+                    # A new version; earlier versions are no longer current.
+                    self._discard(paper_id)
+                    self._latest[paper_id] = latest
+                    if known:
+                        superseded.append(paper_id)
+                key = (paper_id, meta.version)
+                entry: Optional[Tuple[float, DocMeta]] = self._data.get(key)
+                if entry is not None:
+                    cached, incoming = _modified(entry[1]), _modified(meta)
+                    if cached and incoming and cached > incoming:
+                        continue
+                self._data[key] = (stored.get(paper_id, now), meta)
+                self._data.move_to_end(key)
+                updated[paper_id] = None
+            while len(self._data) > self.maxsize:
+                (paper_id, _), _ = self._data.popitem(last=False)
+                self._discard(paper_id)     # Evict the whole paper.
+                updated.pop(paper_id, None)
+            if not persist:
+                return
+            complete = {paper_id: versions for paper_id, versions
+                        in ((paper_id, self._get_versions(paper_id))
+                            for paper_id in updated)
+                        if versions is not None}
+        if self.store is None:
+            return
+        if complete:
+            self.store.put_many(complete)
+        stale = [paper_id for paper_id in superseded
+                 if paper_id not in complete]
+        if stale:
+            self.store.delete(stale)
+
+    def _discard(self, paper_id: str) -> None:
+        for version in range(1, self._latest.pop(paper_id, 0) + 1):
+            self._data.pop((paper_id, version), None)
+
+    def _stored_since(self, paper_id: str, since: float) -> bool:
+        """Determine whether all versions of a paper were stored since then."""
+        latest = self._latest.get(paper_id)
+        if latest is None:
+            return False
+        for version in range(1, latest + 1):
+            entry: Optional[Tuple[float, DocMeta]] = \
+                self._data.get((paper_id, version))
+            if entry is None or entry[0] < since:
+                return False
+        return True
+
+    def invalidate(self, paper_ids: Iterable[str],
+                   before: Optional[float] = None) -> None:
+        """
+        Discard the cached metadata for all versions of some papers.
+
+        If ``before`` (seconds since the epoch) is provided, only metadata
+        that were cached before then are discarded; e.g. metadata retrieved
+        after a notification was sent are kept if it is replayed.
+        """
+        paper_ids = list(paper_ids)
+        with self._lock:
+            if before is not None:
+                paper_ids = [paper_id for paper_id in paper_ids
+                             if not self._stored_since(paper_id, before)]
+            for paper_id in paper_ids:
+                self._discard(paper_id)
+        if self.store is not None and paper_ids:
+            self.store.delete(paper_ids, before=before)
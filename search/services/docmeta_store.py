@@ -0,0 +1,331 @@
+"""
+A packed, on-disk store for :class:`.DocMeta`.
+
+Metadata for bulk (re)indexing is cached locally so that subsequent runs need
+not hit the docmeta service again. Rather than writing one file per paper
+(which for millions of papers means millions of ``stat``/``open`` calls), all
+records are kept in a single SQLite database, one row per paper with the
+metadata for all of its versions stored as a compressed JSON blob.
+
+Lookups and writes are batched: :meth:`.DocMetaStore.get_many` retrieves any
+number of papers with a handful of ``SELECT ... IN`` queries, and
+:meth:`.DocMetaStore.put_many` writes a batch in a single transaction.
+:meth:`.DocMetaStore.preload` reads the (compressed) records for a set of
+papers into memory in one pass, and :meth:`.DocMetaStore.compact` reclaims
+space left by overwritten records.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from arxiv.base import logging
+from search.domain import DocMeta, to_json_bytes
+
+logger = logging.getLogger(__name__)
+
+FILENAME = 'docmeta.db'
+"""Name of the database file in a cache directory."""
+
+MAX_PARAMS = 500
+"""Maximum number of paper IDs per ``SELECT ... IN`` query."""
+
+IMPORT_BATCH_SIZE = 1_000
+"""Number of files to import per transaction in :meth:`.import_json_dir`."""
+
+_T = TypeVar('_T')
+
+
+def _encode(docmeta: List[DocMeta]) -> bytes:
+    return zlib.compress(to_json_bytes(docmeta), 1)
+
+
+def _decode(blob: bytes) -> List[DocMeta]:
+    data: List[dict] = json.loads(zlib.decompress(blob).decode('utf-8'))
+    return [DocMeta.from_dict(datum) for datum in data]
+
+
+def _batches(items: Iterable[_T], size: int) -> Iterator[List[_T]]:
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+class DocMetaStore(object):
+    """
+    A single-file store of :class:`.DocMeta`, keyed by paper ID.
+
+    Each paper ID maps to the metadata for all of its versions. Instances are
+    safe to share among threads.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Open (or create) a store.
+
+        Parameters
+        ----------
+        path : str
+            Path to the database file. If this is a directory, the store is
+            kept in a file called ``docmeta.db`` in that directory.
+
+        """
+        if os.path.isdir(path):
+            path = os.path.join(path, FILENAME)
+        self.path = path
+        self._lock = threading.Lock()
+        self._preloaded: Dict[str, Tuple[bytes, float]] = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS docmeta'
+            ' (paper_id TEXT PRIMARY KEY, data BLOB NOT NULL,'
+            '  stored REAL NOT NULL DEFAULT 0)'
+            ' WITHOUT ROWID'
+        )
+        logger.debug(f'Opened docmeta store at {path}')
+
+    def __enter__(self) -> 'DocMetaStore':
+        """Use the store as a context manager, closing it on exit."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Close the store."""
+        self.close()
+
+    def __len__(self) -> int:
+        """Get the number of papers in the store."""
+        with self._lock:
+            row = self._conn.execute('SELECT COUNT(*) FROM docmeta')
+            count: int = row.fetchone()[0]
+        return count
+
+    def __contains__(self, paper_id: object) -> bool:
+        """Determine whether there is metadata for a paper in the store."""
+        if paper_id in self._preloaded:
+            return True
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT 1 FROM docmeta WHERE paper_id = ?', (paper_id,)
+            ).fetchone()
+        return row is not None
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+        self._preloaded.clear()
+
+    def get(self, paper_id: str) -> List[DocMeta]:
+        """
+        Get the metadata for all versions of a paper.
+
+        Raises
+        ------
+        KeyError
+            Raised when the paper is not in the store.
+
+        """
+        found = self.get_many([paper_id])
+        if paper_id not in found:
+            raise KeyError(paper_id)
+        return found[paper_id]
+
+    def get_many(self, paper_ids: Iterable[str],
+                 max_age: Optional[float] = None) \
+            -> Dict[str, List[DocMeta]]:
+        """
+        Get the metadata for many papers at once.
+
+        Parameters
+        ----------
+        paper_ids : iterable
+            Papers that are not in the store are omitted from the result.
+        max_age : float
+            If provided, records that were stored more than this many seconds
+            ago are also omitted.
+
+        Returns
+        -------
+        dict
+            Maps paper IDs to the :class:`.DocMeta` for each version.
+
+        """
+        return {paper_id: docmeta for paper_id, (docmeta, _)
+                in self.get_many_stored(paper_ids, max_age).items()}
+
+    def get_many_stored(self, paper_ids: Iterable[str],
+                        max_age: Optional[float] = None) \
+            -> Dict[str, Tuple[List[DocMeta], float]]:
+        """
+        Get the metadata for many papers, and when they were stored.
+
+        As :meth:`.get_many`, except that each paper ID is mapped to its
+        metadata and the time (seconds since the epoch) at which they were
+        stored.
+        """
+        rows: Dict[str, Tuple[bytes, float]] = {}
+        missing: List[str] = []
+        for paper_id in paper_ids:
+            if paper_id in self._preloaded:
+                rows[paper_id] = self._preloaded[paper_id]
+            else:
+                missing.append(paper_id)
+        with self._lock:
+            for batch in _batches(missing, MAX_PARAMS):
+                marks = ','.join('?' * len(batch))
+                rows.update(
+                    (paper_id, (blob, stored)) for paper_id, blob, stored
+                    in self._conn.execute(
+                        f'SELECT paper_id, data, stored FROM docmeta'
+                        f' WHERE paper_id IN ({marks})', batch
+                    )
+                )
+        oldest = time.time() - max_age if max_age is not None else 0.
+        return {paper_id: (_decode(blob), stored)
+                for paper_id, (blob, stored) in rows.items()
+                if stored >= oldest}
+
+    def put(self, paper_id: str, docmeta: List[DocMeta]) -> None:
+        """Add or replace the metadata for a paper."""
+        self.put_many({paper_id: docmeta})
+
+    def put_many(self, docmeta: Dict[str, List[DocMeta]]) -> None:
+        """
+        Add or replace the metadata for many papers in one transaction.
+
+        Parameters
+        ----------
+        docmeta : dict
+            Maps paper IDs to the :class:`.DocMeta` for each version.
+
+        """
+        stored = time.time()
+        rows = [(paper_id, _encode(meta), stored)
+                for paper_id, meta in docmeta.items()]
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO docmeta (paper_id, data, stored)'
+                    ' VALUES (?, ?, ?)', rows
+                )
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+        for paper_id, blob, stored in rows:
+            if paper_id in self._preloaded:
+                self._preloaded[paper_id] = (blob, stored)
+
+    def delete(self, paper_ids: Iterable[str],
+               before: Optional[float] = None) -> None:
+        """
+        Remove papers from the store.
+
+        If ``before`` (seconds since the epoch) is provided, only records that
+        were stored before then are removed.
+        """
+        paper_ids = list(paper_ids)
+        for paper_id in paper_ids:
+            preloaded = self._preloaded.get(paper_id)
+            if preloaded is not None \
+                    and (before is None or preloaded[1] < before):
+                del self._preloaded[paper_id]
+        with self._lock:
+            for batch in _batches(paper_ids, MAX_PARAMS - 1):
+                marks = ','.join('?' * len(batch))
+                if before is None:
+                    self._conn.execute(
+                        f'DELETE FROM docmeta WHERE paper_id IN ({marks})',
+                        batch
+                    )
+                else:
+                    self._conn.execute(
+                        f'DELETE FROM docmeta WHERE paper_id IN ({marks})'
+                        ' AND stored < ?', batch + [before]
+                    )
+
+    def preload(self, paper_ids: Optional[Iterable[str]] = None) -> int:
+        """
+        Read records into memory, so that later lookups avoid the database.
+
+        Records are held in their compressed form, and are only decoded when
+        they are retrieved.
+
+        Parameters
+        ----------
+        paper_ids : iterable
+            Papers to preload. If not provided, the entire store is read in a
+            single sequential scan.
+
+        Returns
+        -------
+        int
+            The number of records that were preloaded.
+
+        """
+        query = 'SELECT paper_id, data, stored FROM docmeta'
+        with self._lock:
+            if paper_ids is None:
+                self._preloaded.update(
+                    (paper_id, (blob, stored)) for paper_id, blob, stored
+                    in self._conn.execute(query)
+                )
+            else:
+                for batch in _batches(paper_ids, MAX_PARAMS):
+                    marks = ','.join('?' * len(batch))
+                    self._preloaded.update(
+                        (paper_id, (blob, stored)) for paper_id, blob, stored
+                        in self._conn.execute(
+                            f'{query} WHERE paper_id IN ({marks})', batch
+                        )
+                    )
+        return len(self._preloaded)
+
+    def compact(self) -> None:
+        """Reclaim space left behind by replaced records."""
+        with self._lock:
+            self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            self._conn.execute('VACUUM')
+
+    def import_json_dir(self, path: str,
+                        batch_size: int = IMPORT_BATCH_SIZE) -> int:
+        """
+        Import a cache of one ``<paper_id>.json`` file per paper.
+
+        This is the layout that was previously used by ``bulk_index.py``.
+        Paper IDs are recovered from the file names. Files are imported in
+        batches of ``batch_size``, one transaction per batch, so that only one
+        batch is held in memory at a time.
+
+        Returns
+        -------
+        int
+            The number of papers that were imported.
+
+        """
+        count = 0
+        with os.scandir(path) as entries:
+            files = (entry for entry in entries
+                     if entry.name.endswith('.json'))
+            for batch in _batches(files, batch_size):
+                docmeta: Dict[str, List[DocMeta]] = {}
+                for entry in batch:
+                    paper_id = entry.name[:-len('.json')].replace('_', '/')
+                    with open(entry.path) as f:
+                        docmeta[paper_id] = [DocMeta.from_dict(datum)
+                                             for datum in json.load(f)]
+                self.put_many(docmeta)
+                count += len(docmeta)
+        return count
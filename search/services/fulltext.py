@@ -1,7 +1,9 @@
 """Provides access to fulltext content for arXiv papers."""
 
 from functools import wraps
+from typing import Any, Dict, Tuple
 import os
+import threading
 from urllib.parse import urljoin
 import json
 
@@ -15,11 +17,35 @@ from search.domain import Fulltext
 class FulltextSession(object):
     """An HTTP session with the fulltext endpoint."""
 
-    def __init__(self, endpoint: str) -> None:
-        """Initialize an HTTP session."""
+    def __init__(self, endpoint: str, pool_size: int = 10,
+                 timeout: float = 10., keep_alive: bool = True) -> None:
+        """
+        Initialize an HTTP session.
+
+        Parameters
+        ----------
+        endpoint : str
+            Base URL for fulltext endpoint.
+        pool_size : int
+            Maximum number of pooled connections to keep open.
+        timeout : float
+            Timeout (in seconds) for connecting to, and reading from, the
+            endpoint.
+        keep_alive : bool
+            If ``False``, connections are closed after each request.
+
+        """
         self._session = requests.Session()
-        self._adapter = requests.adapters.HTTPAdapter(max_retries=2)
+        self._timeout = timeout
+        self._adapter = requests.adapters.HTTPAdapter(
+            max_retries=2,
+            pool_connections=pool_size,
+            pool_maxsize=pool_size
+        )
         self._session.mount('https://', self._adapter)
+        self._session.mount('http://', self._adapter)
+        if not keep_alive:
+            self._session.headers['Connection'] = 'close'
 
         if not endpoint[-1] == '/':
             endpoint += '/'
@@ -53,9 +79,13 @@ class FulltextSession(object):
             raise ValueError('Invalid value for document_id')
 
         try:
-            response = requests.get(urljoin(self.endpoint, document_id))
+            response = self._session.get(urljoin(self.endpoint, document_id),
+                                         timeout=self._timeout)
         except requests.exceptions.SSLError as e:
             raise IOError('SSL failed: %s' % e)
+        except (requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout) as e:
+            raise IOError('Could not connect to fulltext service: %s' % e)
 
         if response.status_code != status.HTTP_200_OK:
             raise IOError('%s: could not retrieve fulltext: %i' %
@@ -74,24 +104,66 @@ def init_app(app: object = None) -> None:
     config = get_application_config(app)
     config.setdefault('FULLTEXT_ENDPOINT',
                       'https://fulltext.arxiv.org/fulltext/')
+    config.setdefault('FULLTEXT_POOL_SIZE', '10')
+    config.setdefault('FULLTEXT_TIMEOUT', '10')
+    config.setdefault('FULLTEXT_KEEPALIVE', 'true')
+
+
+def _get_session_params(app: object = None) -> Dict[str, Any]:
+    """Get the parameters for a :class:`.FulltextSession` from config."""
+    config = get_application_config(app)
+    return dict(
+        endpoint=config.get('FULLTEXT_ENDPOINT',
+                            'https://fulltext.arxiv.org/fulltext/'),
+        pool_size=int(config.get('FULLTEXT_POOL_SIZE', '10')),
+        timeout=float(config.get('FULLTEXT_TIMEOUT', '10')),
+        keep_alive=config.get('FULLTEXT_KEEPALIVE', 'true') == 'true'
+    )
 
 
 def get_session(app: object = None) -> FulltextSession:
     """Get a new session with the fulltext endpoint."""
-    config = get_application_config(app)
-    endpoint = config.get('FULLTEXT_ENDPOINT',
-                          'https://fulltext.arxiv.org/fulltext/')
-    return FulltextSession(endpoint)
+    return FulltextSession(**_get_session_params(app))
+
+
+_sessions: Dict[Tuple, FulltextSession] = {}
+"""Shared sessions, keyed on process ID and connection parameters."""
+
+_sessions_lock = threading.Lock()
+
+
+def _get_shared_session(app: object = None) -> FulltextSession:
+    """Get/create a :class:`.FulltextSession` shared within this process."""
+    params = _get_session_params(app)
+    key = (os.getpid(),) + tuple(sorted(params.items()))
+    session = _sessions.get(key)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(key)    # Another thread may have won.
+            if session is None:
+                session = FulltextSession(**params)
+                _sessions[key] = session
+    return session
+
+
+def clear_sessions() -> None:
+    """Discard all of the shared sessions in this process."""
+    with _sessions_lock:
+        _sessions.clear()
 
 
 def current_session() -> FulltextSession:
-    """Get/create :class:`.FulltextSession` for this context."""
+    """
+    Get/create :class:`.FulltextSession` for this context.
+
+    Within an application context, the session is shared with other requests
+    (and threads) in this process. Outside of an application context, a new
+    session is created.
+    """
     g = get_application_global()
     if not g:
         return get_session()
-    if 'fulltext' not in g:
-        g.fulltext = get_session() # type: ignore
-    return g.fulltext # type: ignore
+    return _get_shared_session()
 
 
 @wraps(FulltextSession.retrieve)
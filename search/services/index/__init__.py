@@ -6,20 +6,27 @@ The primary entrypoint to this module is :func:`.search`, which handles
 :class:`.DocumentSet` containing search results. :func:`.get_document` is
 available for future use, e.g. as part of a search API.
 
-In addition, :func:`.add_document` and :func:`.bulk_add_documents` are provided
-for indexing (e.g. by the
+In addition, :func:`.add_document`, :func:`.bulk_add_documents`, and
+:func:`.stream_bulk_add_documents` are provided for indexing (e.g. by the
 :mod:`search.agent.consumer.MetadataRecordProcessor`).
 
 :class:`.SearchSession` encapsulates configuration parameters and a connection
 to the Elasticsearch cluster for thread-safety. The functions mentioned above
 load the appropriate instance of :class:`.SearchSession` depending on the
-context of the request.
+context of the request. Within an application context, sessions (and their
+connection pools) are shared by all requests handled by the same process; see
+:func:`.current_session`.
 """
 
 import json
+import os
+import threading
+import time
 import urllib3
 from contextlib import contextmanager
-from typing import Any, Optional, Tuple, Union, List, Generator
+from dataclasses import replace
+from typing import Any, Optional, Tuple, Union, List, Generator, Dict, \
+    Iterable, Iterator, Callable, TypeVar
 from functools import reduce, wraps
 from operator import ior
 from elasticsearch import Elasticsearch, ElasticsearchException, \
@@ -33,18 +40,25 @@ from elasticsearch_dsl import Search, Q
 from search.context import get_application_config, get_application_global
 from arxiv.base import logging
 from search.domain import Document, DocumentSet, Query, AdvancedQuery, \
-    SimpleQuery, asdict
+    SimpleQuery, to_json
 
 from .exceptions import QueryError, IndexConnectionError, DocumentNotFound, \
-    IndexingError, OutsideAllowedRange, MappingError
+    IndexNotFound, IndexingError, PartialIndexingError, OutsideAllowedRange, \
+    MappingError, BulkLoadInProgress, NotAnAlias
 from .util import MAX_RESULTS
 from .advanced import advanced_search
 from .simple import simple_search
 from .highlighting import highlight
-from . import results
+from .prepare import QUERY_CACHE_SIZE, set_query_cache_size
+from .cache import ResultCache, get_cache_params, create_cache
+from .bulk import BulkReport, BulkResult, to_result
+from .reindex import ReindexProgress
+from . import results, cursor
 
 logger = logging.getLogger(__name__)
 
+_T = TypeVar('_T')
+
 # Disable the Elasticsearch logger. When enabled, the Elasticsearch logger
 # dumps entire Tracebacks prior to propagating exceptions. Thus we end up with
 # tracebacks in the logs even for handled exceptions.
@@ -71,7 +85,7 @@ def handle_es_exceptions() -> Generator:
             raise MappingError('Invalid mapping: %s' % str(e.info)) from e
         elif e.error == 'index_not_found_exception':
             logger.error('ES index_not_found_exception: %s', e.info)
-            create_index()
+            raise IndexNotFound('Index does not exist: %s' % e.info) from e
         elif e.error == 'parsing_exception':
             logger.error('ES parsing_exception: %s', e.info)
             raise QueryError(e.info) from e
@@ -90,13 +104,110 @@ def handle_es_exceptions() -> Generator:
         raise
 
 
+def prepare_search(current_search: Search, query: Query,
+                   fields: Optional[List[str]] = None) -> Search:
+    """
+    Apply the parameters of a :class:`.Query` to a :class:`.Search`.
+
+    This includes the query itself, highlighting, and pagination (by offset,
+    or with ``search_after`` if the query has a cursor; see
+    :mod:`.index.cursor`); the resulting :class:`.Search` is ready to be
+    executed, either directly or by passing its body and params to an
+    Elasticsearch client (e.g. see :class:`.aio.AsyncSearchSession`).
+
+    Parameters
+    ----------
+    current_search : :class:`.Search`
+    query : :class:`.Query`
+    fields : list
+        If given, only these fields of each document are retrieved, and
+        results are not highlighted.
+
+    Returns
+    -------
+    :class:`.Search`
+
+    Raises
+    ------
+    OutsideAllowedRange
+        The requested page is beyond the maximum number of results.
+    QueryError
+        Invalid query parameters.
+
+    """
+    # Make sure that the user is not requesting a nonexistant page. Cursors
+    # are not limited to MAX_RESULTS.
+    max_pages = int(MAX_RESULTS/query.page_size)
+    if query.cursor is None and query.page > max_pages:
+        _message = f'Requested page {query.page}, but max is {max_pages}'
+        logger.error(_message)
+        raise OutsideAllowedRange(_message)
+
+    try:
+        if isinstance(query, AdvancedQuery):
+            current_search = advanced_search(current_search, query)
+        elif isinstance(query, SimpleQuery):
+            current_search = simple_search(current_search, query)
+    except TypeError as e:
+        logger.error('Malformed query: %s', str(e))
+        raise QueryError('Malformed query') from e
+
+    if fields is not None:
+        current_search = current_search.source(fields)
+    else:
+        # Highlighting is performed by Elasticsearch; here we include the
+        # fields and configuration for highlighting.
+        current_search = highlight(current_search)
+
+    if query.cursor is not None:
+        after = cursor.decode(query.cursor)
+        if after is not None:
+            current_search = current_search.extra(search_after=after)
+        current_search = current_search.params(**_request_params(query))
+        return current_search[0:query.page_size]
+
+    # Slicing the search adds pagination parameters to the request.
+    return current_search[query.page_start:query.page_end]
+
+
+def _request_params(query: Query) -> Dict[str, str]:
+    """
+    Get the URL parameters of a search request for ``query``.
+
+    These are set on the search by :func:`.prepare_search`; requests that are
+    sent without :meth:`.Search.execute` must pass them explicitly.
+    """
+    if query.cursor is None:
+        return {}
+    return {'preference': cursor.preference(query)}
+
+
 class SearchSession(object):
-    """Encapsulates session with Elasticsearch host."""
+    """
+    Encapsulates session with Elasticsearch host.
+
+    The index is created when it is first written to, if it does not already
+    exist. Whether it exists is checked once per session, rather than before
+    every write; see :attr:`.readiness`.
+    """
+
+    UNKNOWN = 'unknown'
+    """The index has not been checked yet."""
+
+    CREATING = 'creating'
+    """The index did not exist, and is being created."""
+
+    READY = 'ready'
+    """The index exists."""
 
     def __init__(self, host: str, index: str, port: int=9200,
                  scheme: str='http', user: Optional[str]=None,
                  password: Optional[str]=None, mapping: Optional[str]=None,
-                 verify: bool=True, **extra: Any) -> None:
+                 verify: bool=True, maxsize: int=10, timeout: float=10,
+                 keep_alive: bool=True, sniff_on_start: bool=False,
+                 sniff_on_connection_fail: bool=False,
+                 sniffer_timeout: Optional[float]=None,
+                 cache: Optional[ResultCache]=None, **extra: Any) -> None:
         """
         Initialize the connection to Elasticsearch.
 
@@ -112,6 +223,22 @@ class SearchSession(object):
             Default: None
         password: str
             Default: None
+        maxsize : int
+            Maximum number of connections to keep open to each node.
+            Default: 10
+        timeout : float
+            Default request timeout, in seconds. Default: 10
+        keep_alive : bool
+            If False, connections are closed after each request.
+            Default: True
+        sniff_on_start : bool
+            Discover cluster nodes when the session is created. Default: False
+        sniff_on_connection_fail : bool
+            Rediscover cluster nodes when a node fails. Default: False
+        sniffer_timeout : float
+            Interval (seconds) between node discovery, if set. Default: None
+        cache : :class:`.ResultCache`
+            If provided, search results are cached. Default: None
 
         Raises
         ------
@@ -123,9 +250,15 @@ class SearchSession(object):
         self.index = index
         self.mapping = mapping
         self.doc_type = 'document'
+        self.cache = cache
+        self._readiness = self.UNKNOWN
+        self._readiness_lock = threading.Lock()
         use_ssl = True if scheme == 'https' else False
         http_auth = '%s:%s' % (user, password) if user else None
 
+        if not keep_alive:
+            extra['headers'] = {'connection': 'close'}
+
         logger.debug(
             f'init ES session for index {index} at {scheme}://{host}:{port}'
             f' with verify={verify}, ssl={use_ssl}, and user={user}'
@@ -137,6 +270,12 @@ class SearchSession(object):
                                       'http_auth': http_auth,
                                       'verify_certs': verify}],
                                     connection_class=Urllib3HttpConnection,
+                                    maxsize=maxsize, timeout=timeout,
+                                    sniff_on_start=sniff_on_start,
+                                    sniff_on_connection_fail=(
+                                        sniff_on_connection_fail
+                                    ),
+                                    sniffer_timeout=sniffer_timeout,
                                     **extra)
         except ElasticsearchException as e:
             logger.error('ElasticsearchException: %s', e)
@@ -144,6 +283,51 @@ class SearchSession(object):
                 'Could not initialize ES session: %s' % e
             ) from e
 
+    @property
+    def readiness(self) -> str:
+        """State of the index: ``unknown``, ``creating``, or ``ready``."""
+        return self._readiness
+
+    def _ensure_index(self) -> None:
+        """Create the index if it does not exist, checking once per session."""
+        if self._readiness == self.READY:
+            return
+        with self._readiness_lock:
+            if self._readiness == self.READY:   # Another thread got here.
+                return
+            with handle_es_exceptions():
+                exists = self.es.indices.exists(index=self.index)
+            if not exists:
+                logger.debug('index does not exist')
+                self._readiness = self.CREATING
+                try:
+                    self.create_index()
+                except Exception:
+                    self._readiness = self.UNKNOWN
+                    raise
+                logger.debug('created index')
+            self._readiness = self.READY
+
+    def _when_ready(self, operation: Callable[[], _T]) -> _T:
+        """
+        Perform a write ``operation`` once the index exists.
+
+        If the index has been deleted since it was checked, it is created
+        again and ``operation`` is retried once.
+        """
+        self._ensure_index()
+        try:
+            return operation()
+        except IndexNotFound:
+            self._recreate_index()
+            return operation()
+
+    def _recreate_index(self) -> None:
+        """Create the index again, after a write found that it is missing."""
+        logger.warning('index "%s" went away; recreating it', self.index)
+        self._readiness = self.UNKNOWN
+        self._ensure_index()
+
     def _base_search(self) -> Search:
         return Search(using=self.es, index=self.index)
 
@@ -186,6 +370,7 @@ class SearchSession(object):
         logger.debug('create ES index "%s"', self.index)
         with handle_es_exceptions():
             self.es.indices.create(self.index, self._load_mapping())
+        self._readiness = self.READY
 
     def index_exists(self, index_name: str) -> bool:
         """
@@ -240,6 +425,324 @@ class SearchSession(object):
         }, wait_for_completion=wait_for_completion)
         return response
 
+    def _get_settings(self, index_name: str,
+                      keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Get the current values of some index settings.
+
+        Settings that are not set explicitly are ``None``, which resets them
+        to their defaults when they are put back.
+        """
+        with handle_es_exceptions():
+            current = self.es.indices.get_settings(index=index_name,
+                                                   flat_settings=True)
+        # Keyed by concrete index, even if ``index_name`` is an alias.
+        flat = next(iter(current.values()))['settings']
+        return {key: flat.get(f'index.{key}') for key in keys}
+
+    def _put_settings(self, index_name: str, settings: Dict[str, Any]) \
+            -> None:
+        """Update dynamic settings of an index."""
+        logger.debug('update settings of "%s": %s', index_name, settings)
+        with handle_es_exceptions():
+            self.es.indices.put_settings(index=index_name,
+                                         body={'index': settings})
+
+    @contextmanager
+    def _tuned_settings(self, index_name: str,
+                        settings: Dict[str, Any]) -> Generator:
+        """
+        Apply dynamic ``settings`` to an index, and restore them afterward.
+
+        Settings that were not set explicitly before are reset to their
+        defaults.
+        """
+        if not settings:
+            yield {}
+            return
+        previous = self._get_settings(index_name, settings)
+        self._put_settings(index_name, settings)
+        try:
+            yield previous
+        finally:
+            self._put_settings(index_name, previous)
+
+    BULK_LOAD_SETTINGS = {'refresh_interval': '-1', 'number_of_replicas': 0,
+                          'translog.durability': 'async'}
+    """Settings for the index while it is in :meth:`.bulk_load_mode`."""
+
+    FORCE_MERGE_TIMEOUT = 3600
+    """Seconds to wait for the force-merge at the end of a bulk load."""
+
+    def _get_meta(self) -> Dict[str, Any]:
+        """Get the ``_meta`` of the document mapping of the index."""
+        with handle_es_exceptions():
+            mappings = self.es.indices.get_mapping(index=self.index,
+                                                   doc_type=self.doc_type)
+        meta: Dict[str, Any] = {}
+        for index_mapping in mappings.values():    # One per aliased index.
+            mapping = index_mapping['mappings'].get(self.doc_type, {})
+            meta.update(mapping.get('_meta', {}))
+        return meta
+
+    def _bulk_load_marker(self) -> Optional[Dict[str, Any]]:
+        """Get the settings saved by an unfinished bulk load, if any."""
+        marker: Optional[Dict[str, Any]] = self._get_meta().get('bulk_load')
+        return marker
+
+    def _set_bulk_load_marker(self, previous: Optional[Dict[str, Any]]) \
+            -> None:
+        """
+        Save (or with ``None``, clear) the settings to restore.
+
+        Updating the mapping replaces the whole ``_meta``, so the rest of it
+        is read first and written back unchanged.
+        """
+        meta = self._get_meta()
+        if previous is None:
+            meta.pop('bulk_load', None)
+        else:
+            meta['bulk_load'] = previous
+        with handle_es_exceptions():
+            self.es.indices.put_mapping(index=self.index,
+                                        doc_type=self.doc_type,
+                                        body={'_meta': meta})
+
+    def check_bulk_load_mode(self) -> bool:
+        """
+        Warn if the index is still tuned by :meth:`.bulk_load_mode`.
+
+        This is the case while a bulk load is running, but also after one was
+        interrupted (e.g. the process crashed), in which case the index does
+        not refresh until :meth:`.restore_settings` is called. The two can't
+        be told apart here, so nothing is restored.
+
+        Returns
+        -------
+        bool
+            True if the settings of a bulk load have not been restored.
+
+        """
+        try:
+            if self._bulk_load_marker() is None:
+                return False
+        except IndexNotFound:
+            return False
+        logger.warning('"%s" is in bulk load mode: new documents are not'
+                       ' searchable until its settings are restored. If no'
+                       ' bulk load is running, run restore_settings.',
+                       self.index)
+        return True
+
+    def restore_settings(self) -> bool:
+        """
+        Restore the settings of the index after an interrupted bulk load.
+
+        The settings that the index had before :meth:`.bulk_load_mode` was
+        entered are kept in the ``_meta`` of its mapping until they have been
+        restored, so that they survive a crash of the process doing the bulk
+        load.
+
+        Returns
+        -------
+        bool
+            True if settings were restored; False if there was nothing to do.
+
+        """
+        previous = self._bulk_load_marker()
+        if previous is None:
+            return False
+        logger.warning('restoring settings of "%s" after an unfinished bulk'
+                       ' load', self.index)
+        self._put_settings(self.index, previous)
+        self._set_bulk_load_marker(None)
+        return True
+
+    @contextmanager
+    def bulk_load_mode(self, force_merge: bool = True,
+                       max_num_segments: Optional[int] = None,
+                       recover: bool = False) -> Generator:
+        """
+        Tune the index for ingest while many documents are added.
+
+        Within the context, the index does not refresh, has no replicas, and
+        commits its translog asynchronously (see :attr:`.BULK_LOAD_SETTINGS`).
+        The previous settings are restored on the way out, whether or not the
+        load succeeded. If the process dies before then, they are restored by
+        :meth:`.restore_settings`, or by a bulk load with ``recover``.
+
+        Parameters
+        ----------
+        force_merge : bool
+            If True (default), merge the segments of the index once loading
+            has succeeded, before the replicas are restored.
+        max_num_segments : int
+            Number of segments to merge down to. By default, Elasticsearch
+            decides.
+        recover : bool
+            If True, restore the settings left by an unfinished bulk load
+            before starting. Only do this if no other bulk load is running.
+
+        Raises
+        ------
+        :class:`BulkLoadInProgress`
+            If the index is already in bulk load mode, and ``recover`` is not
+            set.
+
+        """
+        self._ensure_index()
+        if recover:
+            self.restore_settings()
+        elif self._bulk_load_marker() is not None:
+            raise BulkLoadInProgress(
+                f'"{self.index}" is already in bulk load mode; if no bulk'
+                ' load is running, restore its settings first'
+            )
+        previous = self._get_settings(self.index, self.BULK_LOAD_SETTINGS)
+        # Saved before the settings change, so that a crash can be undone.
+        self._set_bulk_load_marker(previous)
+        try:
+            self._put_settings(self.index, self.BULK_LOAD_SETTINGS)
+            yield
+            with handle_es_exceptions():
+                self.es.indices.refresh(index=self.index)
+                if force_merge:
+                    logger.debug('force merge "%s"', self.index)
+                    self.es.indices.forcemerge(
+                        index=self.index, max_num_segments=max_num_segments,
+                        request_timeout=self.FORCE_MERGE_TIMEOUT
+                    )
+        finally:
+            self._put_settings(self.index, previous)
+            self._set_bulk_load_marker(None)
+            if self.cache is not None:
+                self.cache.bump_generation()
+
+    REINDEX_SETTINGS = {'refresh_interval': '-1', 'number_of_replicas': 0}
+    """Settings for the target of :meth:`.rebuild_index` while it is copied."""
+
+    def _alias_actions(self, alias: str, new_index: str,
+                       delete_old: bool = False) -> List[dict]:
+        """
+        Get the actions that point ``alias`` at ``new_index``.
+
+        If ``alias`` is the name of an index, it is only deleted (to make way
+        for the alias) if ``delete_old`` is set.
+        """
+        with handle_es_exceptions():
+            if self.es.indices.exists_alias(name=alias):
+                current = list(self.es.indices.get_alias(name=alias))
+                actions = [{'remove': {'index': name, 'alias': alias}}
+                           for name in current if name != new_index]
+            elif self.es.indices.exists(index=alias):
+                if not delete_old:
+                    raise NotAnAlias(
+                        f'{alias} is an index, not an alias; convert it to an'
+                        ' alias first, or allow the index to be deleted'
+                    )
+                # The name is still taken by an index, which is deleted in
+                # the same (atomic) request that creates the alias.
+                actions = [{'remove_index': {'index': alias}}]
+            else:
+                raise IndexNotFound(f'No such index or alias: {alias}')
+        return actions + [{'add': {'index': new_index, 'alias': alias}}]
+
+    def rebuild_index(self, new_index: str, alias: Optional[str] = None,
+                      slices: Union[int, str] = 'auto', tune: bool = True,
+                      poll_interval: float = 2,
+                      progress: Optional[Callable[[ReindexProgress], None]]
+                      = None, delete_old: bool = False) -> ReindexProgress:
+        """
+        Copy an aliased index to ``new_index``, and then move the alias.
+
+        ``new_index`` is created with the current mappings (if it does not
+        already exist), and the documents behind ``alias`` are copied into it
+        by a sliced ``_reindex`` task. Searches are served from the old index
+        until the copy is complete, at which point the alias is moved to
+        ``new_index`` in a single atomic request. If ``alias`` is still the
+        name of an index, rather than an alias, that index is deleted in the
+        same request, but only if ``delete_old`` is set.
+
+        Documents written to ``alias`` while the copy is running may not be
+        copied, so indexing should be paused in the meantime.
+
+        Parameters
+        ----------
+        new_index : str
+            Name of the index to create and copy to.
+        alias : str
+            The alias (or index) to copy from, and then to point at
+            ``new_index``. Defaults to the index of this session.
+        slices : int or str
+            Number of slices to copy in parallel, or ``'auto'`` to have one
+            slice per shard.
+        tune : bool
+            If True (default), ``new_index`` has no replicas and does not
+            refresh while the copy is running (see :attr:`.REINDEX_SETTINGS`).
+            Its previous settings are restored afterward.
+        poll_interval : float
+            Seconds between checks on the progress of the task.
+        progress : callable
+            Called with a :class:`.ReindexProgress` each time the task is
+            checked.
+        delete_old : bool
+            If True, and ``alias`` is the name of an index, delete that index
+            once it has been copied so that the alias can take its name.
+
+        Returns
+        -------
+        :class:`.ReindexProgress`
+            The final status of the task.
+
+        Raises
+        ------
+        IndexNotFound
+            ``alias`` is neither an alias nor an index.
+        NotAnAlias
+            ``alias`` is the name of an index, and ``delete_old`` is not set.
+            Nothing is copied.
+        IndexingError
+            Not all documents could be copied. The alias is not moved.
+
+        """
+        alias = alias or self.index
+        actions = self._alias_actions(alias, new_index, delete_old)
+        logger.debug('rebuild "%s" as "%s"', alias, new_index)
+        with handle_es_exceptions():
+            self.es.indices.create(new_index, self._load_mapping())
+
+        settings = self.REINDEX_SETTINGS if tune else {}
+        with self._tuned_settings(new_index, settings):
+            with handle_es_exceptions():
+                response: dict = self.es.reindex({
+                    "source": {"index": alias},
+                    "dest": {"index": new_index}
+                }, slices=slices, wait_for_completion=False)
+            start = time.monotonic()
+            while True:
+                status = self.get_task_status(response['task'])
+                current = ReindexProgress.from_task(status,
+                                                    time.monotonic() - start)
+                if progress is not None:
+                    progress(current)
+                if current.completed:
+                    break
+                time.sleep(poll_interval)
+
+        result = status.get('response', {})
+        failures = status.get('error') or result.get('failures')
+        if failures:
+            logger.error('reindex to "%s" failed: %s', new_index, failures)
+            raise IndexingError(f'Could not copy {alias} to {new_index}:'
+                                f' {failures}')
+        with handle_es_exceptions():
+            self.es.indices.refresh(index=new_index)
+            self.es.indices.update_aliases(body={'actions': actions})
+        logger.debug('alias "%s" now points to "%s"', alias, new_index)
+        if self.cache is not None:
+            self.cache.bump_generation()
+        return current
+
     def get_task_status(self, task: str) -> dict:
         """
         Get the status of a running task in ES (e.g. reindex).
@@ -280,50 +783,238 @@ class SearchSession(object):
             Problem serializing ``document`` for indexing.
 
         """
-        if not self.es.indices.exists(index=self.index):
-            self.create_index()
+        ident = document.id if document.id else document.paper_id
+        body = to_json(document)
+
+        def index_document() -> None:
+            with handle_es_exceptions():
+                logger.debug(f'{ident}: index document')
+                self.es.index(index=self.index, doc_type=self.doc_type,
+                              id=ident, body=body)
+
+        self._when_ready(index_document)
+        if self.cache is not None:
+            self.cache.bump_generation()
+
+    def stream_bulk_add_documents(self, documents: Iterable[Document],
+                                  docs_per_chunk: int = 500,
+                                  max_retries: int = 3,
+                                  initial_backoff: float = 2,
+                                  max_backoff: float = 60) \
+            -> Iterator[BulkResult]:
+        """
+        Stream documents into the search index, and report on each of them.
 
-        with handle_es_exceptions():
-            ident = document.id if document.id else document.paper_id
-            logger.debug(f'{ident}: index document')
-            self.es.index(index=self.index, doc_type=self.doc_type,
-                          id=ident, body=document)
+        ``documents`` is consumed lazily, one chunk at a time. Documents that
+        are rejected because the cluster is busy (``429``) are sent again,
+        without the rest of their chunk, after an exponential backoff. Other
+        rejected documents are reported, and are not sent again, except for
+        documents that are rejected because the index has gone away
+        (``404``): the index is created again, and they are sent once more at
+        the end.
 
-    def bulk_add_documents(self, documents: List[Document],
-                           docs_per_chunk: int = 500) -> None:
+        Parameters
+        ----------
+        documents : iterable
+            Items are :class:`.Document`, and must be valid search documents
+            per ``schema/Document.json``.
+        docs_per_chunk: int
+            Number of documents to send to ES in a single request.
+        max_retries : int
+            Number of times to retry a document that is rejected with ``429``.
+        initial_backoff : float
+            Seconds to wait before the first retry of a chunk; this doubles
+            for each subsequent retry.
+        max_backoff : float
+            Maximum number of seconds to wait before a retry.
+
+        Returns
+        -------
+        iterator
+            Yields a :class:`.BulkResult` for each document.
+
+        Raises
+        ------
+        IndexConnectionError
+            Problem communicating with Elasticsearch host.
+
+        """
+        self._ensure_index()
+
+        sent: Dict[str, dict] = {}
+        missing: List[dict] = []
+        params = dict(chunk_size=docs_per_chunk, raise_on_error=False,
+                      max_retries=max_retries,
+                      initial_backoff=initial_backoff, max_backoff=max_backoff)
+        try:
+            with handle_es_exceptions():
+                for ok, item in helpers.streaming_bulk(
+                        client=self.es, actions=self._actions(documents, sent),
+                        **params):
+                    result = to_result(ok, item)
+                    if self._went_away(result, sent, missing):
+                        continue
+                    yield self._report(result)
+                if missing:
+                    for ok, item in helpers.streaming_bulk(
+                            client=self.es, actions=missing, **params):
+                        yield self._report(to_result(ok, item))
+        finally:
+            if self.cache is not None:
+                self.cache.bump_generation()
+
+    def _actions(self, documents: Iterable[Document],
+                 sent: Dict[str, dict]) -> Iterator[dict]:
+        """Generate bulk actions for ``documents``, noting each in ``sent``."""
+        for document in documents:
+            # Pre-serialized sources are passed through by the client as-is.
+            action = {
+                '_index': self.index,
+                '_type': self.doc_type,
+                '_id': document.id,
+                '_source': to_json(document)
+            }
+            sent[document.id] = action
+            yield action
+
+    def _went_away(self, result: BulkResult, sent: Dict[str, dict],
+                   missing: List[dict]) -> bool:
+        """
+        Check whether a document was rejected because the index is missing.
+
+        The action for ``result`` is removed from ``sent``. If the index is
+        missing, the action is added to ``missing`` (to be sent again), and
+        the index is created again when the first such document is seen.
+        """
+        action = sent.pop(result.id, None)
+        if result.ok or result.status != 404 or action is None:
+            return False
+        if not missing:
+            self._recreate_index()
+        missing.append(action)
+        return True
+
+    def _report(self, result: BulkResult) -> BulkResult:
+        """Log ``result`` if the document was rejected."""
+        if not result.ok:
+            logger.warning('%s: not indexed (%i): %s', result.id,
+                           result.status, result.error)
+            if result.status == 404:    # Check again next time.
+                self._readiness = self.UNKNOWN
+        return result
+
+    def bulk_add_documents(self, documents: Iterable[Document],
+                           docs_per_chunk: int = 500,
+                           max_retries: int = 3) -> BulkReport:
         """
         Add documents to the search index using the bulk API.
 
+        All of the documents are sent, even if some of them are rejected; see
+        :meth:`.stream_bulk_add_documents`.
+
         Parameters
         ----------
-        document : :class:`.Document`
-            Must be a valid search document, per ``schema/Document.json``.
+        documents : iterable
+            Items are :class:`.Document`, and must be valid search documents
+            per ``schema/Document.json``.
         docs_per_chunk: int
             Number of documents to send to ES in a single chunk
+        max_retries : int
+            Number of times to retry a document that is rejected with ``429``.
+
+        Returns
+        -------
+        :class:`.BulkReport`
+
         Raises
         ------
         IndexConnectionError
             Problem communicating with Elasticsearch host.
-        BulkIndexingError
-            Problem serializing ``document`` for indexing.
+        PartialIndexingError
+            One or more documents were rejected. The others were indexed; the
+            ``report`` attribute lists the documents that were not.
 
         """
-        if not self.es.indices.exists(index=self.index):
-            logger.debug('index does not exist')
-            self.create_index()
-            logger.debug('created index')
+        report = BulkReport.collect(self.stream_bulk_add_documents(
+            documents, docs_per_chunk=docs_per_chunk, max_retries=max_retries
+        ))
+        logger.debug('added %i documents to index', report.indexed)
+        if report.failures:
+            raise PartialIndexingError(
+                '%i document(s) failed to index: %s'
+                % (len(report.failures), ', '.join(report.failed_ids)),
+                report
+            )
+        return report
+
+    def parallel_bulk_add_documents(self, documents: Iterable[Document],
+                                    docs_per_chunk: int = 500,
+                                    thread_count: int = 4,
+                                    queue_size: int = 4) -> Iterator[str]:
+        """
+        Stream documents into the search index using concurrent bulk requests.
 
-        with handle_es_exceptions():
-            actions = ({
-                '_index': self.index,
-                '_type': self.doc_type,
-                '_id': document.id,
-                '_source': asdict(document)
-            } for document in documents)
+        ``documents`` is consumed lazily: at most ``queue_size`` chunks are
+        waiting to be sent at any time, so a slow cluster applies backpressure
+        to whatever is producing the documents.
 
-            helpers.bulk(client=self.es, actions=actions,
-                         chunk_size=docs_per_chunk)
-            logger.debug('added %i documents to index', len(documents))
+        Parameters
+        ----------
+        documents : iterable
+            Items are :class:`.Document`, and must be valid search documents
+            per ``schema/Document.json``.
+        docs_per_chunk: int
+            Number of documents to send to ES in a single request.
+        thread_count : int
+            Number of concurrent bulk requests.
+        queue_size : int
+            Number of chunks to prepare ahead of the bulk requests.
+
+        Returns
+        -------
+        iterator
+            Yields the ID of each document as it is indexed.
+
+        Raises
+        ------
+        IndexConnectionError
+            Problem communicating with Elasticsearch host.
+        IndexingError
+            Problem indexing one or more documents. Documents that are
+            rejected because the index has gone away are sent once more (at
+            the end) after the index is created again, as in
+            :meth:`.stream_bulk_add_documents`.
+
+        """
+        self._ensure_index()
+
+        sent: Dict[str, dict] = {}
+        missing: List[dict] = []
+        try:
+            with handle_es_exceptions():
+                for ok, item in helpers.parallel_bulk(
+                        client=self.es, actions=self._actions(documents, sent),
+                        thread_count=thread_count, chunk_size=docs_per_chunk,
+                        queue_size=queue_size, raise_on_error=False):
+                    result = to_result(ok, item)
+                    if self._went_away(result, sent, missing):
+                        continue
+                    yield self._indexed(result)
+                if missing:
+                    for ok, item in helpers.streaming_bulk(
+                            client=self.es, actions=missing,
+                            chunk_size=docs_per_chunk, raise_on_error=False):
+                        yield self._indexed(to_result(ok, item))
+        finally:
+            if self.cache is not None:
+                self.cache.bump_generation()
+
+    def _indexed(self, result: BulkResult) -> str:
+        """Get the ID of an indexed document, or raise if it was rejected."""
+        if not self._report(result).ok:
+            raise IndexingError('%s: not indexed (%i): %s'
+                                % (result.id, result.status, result.error))
+        return result.id
 
     def get_document(self, document_id: int) -> Document:
         """
@@ -355,8 +1046,7 @@ class SearchSession(object):
         if not record:
             logger.error("No such document: %s", document_id)
             raise DocumentNotFound('No such document')
-        return Document(**record['_source'])    # type: ignore
-        # See https://github.com/python/mypy/issues/3937
+        return Document.from_dict(record['_source'])
 
     def search(self, query: Query) -> DocumentSet:
         """
@@ -378,35 +1068,75 @@ class SearchSession(object):
             Invalid query parameters.
 
         """
-        # Make sure that the user is not requesting a nonexistant page.
-        max_pages = int(MAX_RESULTS/query.page_size)
-        if query.page > max_pages:
-            _message = f'Requested page {query.page}, but max is {max_pages}'
-            logger.error(_message)
-            raise OutsideAllowedRange(_message)
+        # The key must be obtained before the search is executed, in case the
+        # index is updated in the meantime.
+        cache_key: Optional[str] = None
+        if self.cache is not None:
+            cache_key = self.cache.key(query)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.debug('got cached results for %s', str(query))
+                return cached
 
         # Perform the search.
         logger.debug('got current search request %s', str(query))
-        current_search = self._base_search()
-        try:
-            if isinstance(query, AdvancedQuery):
-                current_search = advanced_search(current_search, query)
-            elif isinstance(query, SimpleQuery):
-                current_search = simple_search(current_search, query)
-        except TypeError as e:
-            logger.error('Malformed query: %s', str(e))
-            raise QueryError('Malformed query') from e
-
-        # Highlighting is performed by Elasticsearch; here we include the
-        # fields and configuration for highlighting.
-        current_search = highlight(current_search)
-
+        current_search = prepare_search(self._base_search(), query)
         with handle_es_exceptions():
-            # Slicing the search adds pagination parameters to the request.
-            resp = current_search[query.page_start:query.page_end].execute()
+            resp = current_search.execute()
 
         # Perform post-processing on the search results.
-        return results.to_documentset(query, resp)
+        document_set = results.to_documentset(query, resp)
+        if self.cache is not None and cache_key is not None:
+            self.cache.set(cache_key, document_set)
+        return document_set
+
+    def export(self, query: Query, fields: List[str],
+               page_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Retrieve all of the results of a search.
+
+        Results are retrieved a page at a time with a cursor (see
+        :mod:`.index.cursor`), so they are not limited to
+        :const:`.MAX_RESULTS`, and only one page is held in memory at a time.
+        The pagination parameters of ``query`` are ignored.
+
+        Parameters
+        ----------
+        query : :class:`.Query`
+        fields : list
+            Fields of each document to retrieve. Nested fields may be given
+            with dots, e.g. ``authors.full_name``.
+        page_size : int
+            Number of results to retrieve in each request.
+
+        Returns
+        -------
+        iterator
+            Yields the requested fields of each result, as a dict.
+
+        Raises
+        ------
+        IndexConnectionError
+            Problem communicating with the search index.
+        QueryError
+            Invalid query parameters.
+
+        """
+        page = replace(query, page_start=0, page_size=page_size,
+                       cursor=cursor.FIRST)
+        while page.cursor is not None:
+            current_search = prepare_search(self._base_search(), page,
+                                            fields=fields)
+            with handle_es_exceptions():
+                response: dict = self.es.search(
+                    index=self.index, body=current_search.to_dict(),
+                    **_request_params(page)
+                )
+            hits = response['hits']['hits']
+            for hit in hits:
+                yield hit.get('_source', {})
+            page.cursor = cursor.encode(hits[-1]['sort']) \
+                if len(hits) == page_size else None
 
     def exists(self, paper_id_v: str) -> bool:
         """Determine whether a paper exists in the index."""
@@ -414,9 +1144,41 @@ class SearchSession(object):
             ex: bool = self.es.exists(self.index, self.doc_type, paper_id_v)
             return ex
 
+    def bulk_exists(self, paper_ids: List[str]) -> Dict[str, bool]:
+        """
+        Determine which of several papers exist in the index.
+
+        Uses a single multi-get request without document sources, so this is
+        much cheaper than calling :meth:`.exists` for each paper.
+
+        Parameters
+        ----------
+        paper_ids : list
+            Paper IDs with version affixes (i.e. ``paper_id_v``).
+
+        Returns
+        -------
+        dict
+            Maps each paper ID to a bool (exists).
+
+        """
+        if not paper_ids:
+            return {}
+        with handle_es_exceptions():
+            response = self.es.mget(body={'ids': paper_ids}, index=self.index,
+                                    doc_type=self.doc_type, _source=False)
+        found = {doc['_id']: doc.get('found', False)
+                 for doc in response['docs']}
+        return {paper_id: found.get(paper_id, False) for paper_id in paper_ids}
+
 
 def init_app(app: object = None) -> None:
-    """Set default configuration parameters for an application instance."""
+    """
+    Set default configuration parameters for an application instance.
+
+    Also sizes the cache of compiled queries, which is shared by all of the
+    sessions in this process.
+    """
     config = get_application_config(app)
     config.setdefault('ELASTICSEARCH_HOST', 'localhost')
     config.setdefault('ELASTICSEARCH_PORT', '9200')
@@ -425,34 +1187,103 @@ def init_app(app: object = None) -> None:
     config.setdefault('ELASTICSEARCH_PASSWORD', None)
     config.setdefault('ELASTICSEARCH_MAPPING', 'mappings/DocumentMapping.json')
     config.setdefault('ELASTICSEARCH_VERIFY', 'true')
+    config.setdefault('ELASTICSEARCH_MAXSIZE', '25')
+    config.setdefault('ELASTICSEARCH_TIMEOUT', '10')
+    config.setdefault('ELASTICSEARCH_KEEPALIVE', 'true')
+    config.setdefault('ELASTICSEARCH_SNIFF_ON_START', 'false')
+    config.setdefault('ELASTICSEARCH_SNIFF_ON_CONNECTION_FAIL', 'false')
+    config.setdefault('ELASTICSEARCH_SNIFFER_TIMEOUT', None)
+    config.setdefault('SEARCH_CACHE', '')
+    config.setdefault('SEARCH_CACHE_SIZE', '1000')
+    config.setdefault('SEARCH_CACHE_TTL', '60')
+    config.setdefault('SEARCH_CACHE_URL', None)
+    config.setdefault('SEARCH_QUERY_CACHE_SIZE', str(QUERY_CACHE_SIZE))
+    set_query_cache_size(int(config['SEARCH_QUERY_CACHE_SIZE']))
+
+
+def _get_session_params(app: object = None) -> Dict[str, Any]:
+    """Get the parameters for a :class:`.SearchSession` from config."""
+    config = get_application_config(app)
+    sniffer_timeout = config.get('ELASTICSEARCH_SNIFFER_TIMEOUT', None)
+    return dict(
+        host=config.get('ELASTICSEARCH_HOST', 'localhost'),
+        port=config.get('ELASTICSEARCH_PORT', '9200'),
+        scheme=config.get('ELASTICSEARCH_SCHEME', 'http'),
+        index=config.get('ELASTICSEARCH_INDEX', 'arxiv'),
+        verify=config.get('ELASTICSEARCH_VERIFY', 'true') == 'true',
+        user=config.get('ELASTICSEARCH_USER', None),
+        password=config.get('ELASTICSEARCH_PASSWORD', None),
+        mapping=config.get('ELASTICSEARCH_MAPPING',
+                           'mappings/DocumentMapping.json'),
+        maxsize=int(config.get('ELASTICSEARCH_MAXSIZE', '25')),
+        timeout=float(config.get('ELASTICSEARCH_TIMEOUT', '10')),
+        keep_alive=config.get('ELASTICSEARCH_KEEPALIVE', 'true') == 'true',
+        sniff_on_start=(
+            config.get('ELASTICSEARCH_SNIFF_ON_START', 'false') == 'true'
+        ),
+        sniff_on_connection_fail=(
+            config.get('ELASTICSEARCH_SNIFF_ON_CONNECTION_FAIL', 'false')
+            == 'true'
+        ),
+        sniffer_timeout=float(sniffer_timeout) if sniffer_timeout else None
+    )
 
 
 # TODO: consider making this private.
 def get_session(app: object = None) -> SearchSession:
     """Get a new session with the search index."""
-    config = get_application_config(app)
-    host = config.get('ELASTICSEARCH_HOST', 'localhost')
-    port = config.get('ELASTICSEARCH_PORT', '9200')
-    scheme = config.get('ELASTICSEARCH_SCHEME', 'http')
-    index = config.get('ELASTICSEARCH_INDEX', 'arxiv')
-    verify = config.get('ELASTICSEARCH_VERIFY', 'true') == 'true'
-    user = config.get('ELASTICSEARCH_USER', None)
-    password = config.get('ELASTICSEARCH_PASSWORD', None)
-    mapping = config.get('ELASTICSEARCH_MAPPING',
-                         'mappings/DocumentMapping.json')
-    return SearchSession(host, index, port, scheme, user, password, mapping,
-                         verify=verify)
+    return SearchSession(**_get_session_params(app))
+
+
+_sessions: Dict[Tuple, SearchSession] = {}
+"""Shared sessions, keyed on process ID and connection parameters."""
+
+_sessions_lock = threading.Lock()
+
+
+def _get_shared_session(app: object = None) -> SearchSession:
+    """
+    Get/create a :class:`.SearchSession` that is shared within this process.
+
+    Sessions are keyed on the process ID as well as the connection parameters,
+    so that a worker that is forked after a session is created (e.g. by uWSGI
+    without ``lazy-apps``) does not share sockets with its parent.
+    """
+    params = _get_session_params(app)
+    cache_params = get_cache_params(app)
+    key = (os.getpid(),) + tuple(sorted(params.items())) \
+        + tuple(sorted(cache_params.items()))
+    session = _sessions.get(key)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(key)    # Another thread may have won.
+            if session is None:
+                session = SearchSession(cache=create_cache(**cache_params),
+                                        **params)
+                _sessions[key] = session
+    return session
+
+
+def clear_sessions() -> None:
+    """Discard all of the shared sessions in this process."""
+    with _sessions_lock:
+        _sessions.clear()
 
 
 # TODO: consider making this private.
 def current_session() -> SearchSession:
-    """Get/create :class:`.SearchSession` for this context."""
+    """
+    Get/create :class:`.SearchSession` for this context.
+
+    Within an application context, the session is shared with other requests
+    (and threads/greenlets) in this process, so that connections to the
+    cluster are pooled and reused. Outside of an application context, a new
+    session is created.
+    """
     g = get_application_global()
     if not g:
         return get_session()
-    if 'search' not in g:
-        g.search = get_session()    # type: ignore
-    return g.search     # type: ignore
+    return _get_shared_session()
 
 
 @wraps(SearchSession.search)
@@ -461,6 +1292,13 @@ def search(query: Query) -> DocumentSet:
     return current_session().search(query)
 
 
+@wraps(SearchSession.export)
+def export(query: Query, fields: List[str],
+           page_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """Retrieve all of the results of a search."""
+    return current_session().export(query, fields, page_size)
+
+
 @wraps(SearchSession.add_document)
 def add_document(document: Document) -> None:
     """Add Document."""
@@ -468,11 +1306,32 @@ def add_document(document: Document) -> None:
 
 
 @wraps(SearchSession.bulk_add_documents)
-def bulk_add_documents(documents: List[Document]) -> None:
+def bulk_add_documents(documents: Iterable[Document]) -> BulkReport:
     """Add Documents."""
     return current_session().bulk_add_documents(documents)
 
 
+@wraps(SearchSession.stream_bulk_add_documents)
+def stream_bulk_add_documents(documents: Iterable[Document],
+                              docs_per_chunk: int = 500,
+                              max_retries: int = 3) -> Iterator[BulkResult]:
+    """Stream documents into the index, with a result for each."""
+    return current_session().stream_bulk_add_documents(
+        documents, docs_per_chunk, max_retries
+    )
+
+
+@wraps(SearchSession.parallel_bulk_add_documents)
+def parallel_bulk_add_documents(documents: Iterable[Document],
+                                docs_per_chunk: int = 500,
+                                thread_count: int = 4,
+                                queue_size: int = 4) -> Iterator[str]:
+    """Stream documents into the index."""
+    return current_session().parallel_bulk_add_documents(
+        documents, docs_per_chunk, thread_count, queue_size
+    )
+
+
 @wraps(SearchSession.get_document)
 def get_document(document_id: int) -> Document:
     """Retrieve arxiv document by id."""
@@ -497,6 +1356,12 @@ def exists(paper_id_v: str) -> bool:
     return current_session().exists(paper_id_v)
 
 
+@wraps(SearchSession.bulk_exists)
+def bulk_exists(paper_ids: List[str]) -> Dict[str, bool]:
+    """Check which of several papers are present in the index."""
+    return current_session().bulk_exists(paper_ids)
+
+
 @wraps(SearchSession.index_exists)
 def index_exists(index_name: str) -> bool:
     """Check whether an index exists."""
@@ -510,12 +1375,50 @@ def reindex(old_index: str, new_index: str,
     return current_session().reindex(old_index, new_index, wait_for_completion)
 
 
+@wraps(SearchSession.rebuild_index)
+def rebuild_index(new_index: str, alias: Optional[str] = None,
+                  slices: Union[int, str] = 'auto', tune: bool = True,
+                  poll_interval: float = 2,
+                  progress: Optional[Callable[[ReindexProgress], None]]
+                  = None, delete_old: bool = False) -> ReindexProgress:
+    """Copy an aliased index to a new index, and then move the alias."""
+    return current_session().rebuild_index(new_index, alias, slices, tune,
+                                           poll_interval, progress,
+                                           delete_old)
+
+
+@wraps(SearchSession.bulk_load_mode)
+def bulk_load_mode(force_merge: bool = True,
+                   max_num_segments: Optional[int] = None,
+                   recover: bool = False) -> Any:
+    """Tune the index for ingest while many documents are added."""
+    return current_session().bulk_load_mode(force_merge, max_num_segments,
+                                            recover)
+
+
+@wraps(SearchSession.restore_settings)
+def restore_settings() -> bool:
+    """Restore the settings of the index after an interrupted bulk load."""
+    return current_session().restore_settings()
+
+
+@wraps(SearchSession.check_bulk_load_mode)
+def check_bulk_load_mode() -> bool:
+    """Warn if the index is still tuned for a bulk load."""
+    return current_session().check_bulk_load_mode()
+
+
 @wraps(SearchSession.get_task_status)
 def get_task_status(task: str) -> dict:
     """Get the status of a running task in ES (e.g. reindex)."""
     return current_session().get_task_status(task)
 
 
+def readiness() -> str:
+    """Get the state of the index for this context; see :attr:`.readiness`."""
+    return current_session().readiness
+
+
 def ok() -> bool:
     """Health check."""
     try:
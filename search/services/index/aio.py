@@ -0,0 +1,229 @@
+"""
+Asynchronous (asyncio) integration with the ElasticSearch cluster.
+
+:class:`.AsyncSearchSession` mirrors the read path of :class:`.SearchSession`
+(and the bulk indexing path), but awaits the cluster rather than blocking a
+thread on each request. Queries are built by :func:`.prepare_search` and
+results are post-processed by :func:`.results.to_documentset`, so a given
+:class:`.Query` produces exactly the same request body and
+:class:`.DocumentSet` as it does in the synchronous session.
+
+Requires the ``elasticsearch-async`` package; see ``asgi.py`` for the entry
+point that uses this module.
+"""
+
+from typing import Any, List, Optional
+
+from elasticsearch_dsl import Search
+
+from arxiv.base import logging
+from search.domain import Document, DocumentSet, Query, to_json_bytes
+
+from . import results, handle_es_exceptions, prepare_search, \
+    _get_session_params, _request_params
+from .cache import ResultCache, get_cache_params, create_cache
+from .bulk import BulkReport, to_result
+from .exceptions import IndexConnectionError, DocumentNotFound, \
+    PartialIndexingError
+
+try:
+    from elasticsearch_async import AsyncElasticsearch
+except ImportError:     # Not needed by the WSGI app; see AsyncSearchSession.
+    AsyncElasticsearch = None
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSearchSession(object):
+    """Encapsulates an asynchronous session with the search index."""
+
+    def __init__(self, host: str, index: str, port: int = 9200,
+                 scheme: str = 'http', user: Optional[str] = None,
+                 password: Optional[str] = None, mapping: Optional[str] = None,
+                 verify: bool = True, maxsize: int = 10, timeout: float = 10,
+                 keep_alive: bool = True,
+                 cache: Optional[ResultCache] = None, **extra: Any) -> None:
+        """
+        Initialize the connection to Elasticsearch.
+
+        Accepts the same parameters as :class:`.SearchSession`; node sniffing
+        is not supported by the asynchronous transport, so those parameters
+        are ignored.
+
+        Raises
+        ------
+        IndexConnectionError
+            The asynchronous client is not installed.
+
+        """
+        if AsyncElasticsearch is None:
+            raise IndexConnectionError('elasticsearch-async is not installed')
+        self.index = index
+        self.mapping = mapping
+        self.doc_type = 'document'
+        self.cache = cache
+        use_ssl = True if scheme == 'https' else False
+        http_auth = '%s:%s' % (user, password) if user else None
+        headers = {} if keep_alive else {'connection': 'close'}
+
+        logger.debug(
+            f'init async ES session for index {index} at'
+            f' {scheme}://{host}:{port}'
+        )
+        self.es = AsyncElasticsearch([{'host': host, 'port': port,
+                                       'use_ssl': use_ssl,
+                                       'http_auth': http_auth,
+                                       'verify_certs': verify}],
+                                     maxsize=maxsize, timeout=timeout,
+                                     headers=headers)
+
+    async def close(self) -> None:
+        """Close all connections to the cluster."""
+        await self.es.transport.close()
+
+    async def search(self, query: Query) -> DocumentSet:
+        """
+        Perform a search.
+
+        Parameters
+        ----------
+        query : :class:`.Query`
+
+        Returns
+        -------
+        :class:`.DocumentSet`
+
+        Raises
+        ------
+        IndexConnectionError
+            Problem communicating with the search index.
+        QueryError
+            Invalid query parameters.
+
+        """
+        cache_key: Optional[str] = None
+        if self.cache is not None:
+            cache_key = self.cache.key(query)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.debug('got cached results for %s', str(query))
+                return cached
+
+        logger.debug('got current search request %s', str(query))
+        current_search = prepare_search(Search(index=self.index), query)
+        with handle_es_exceptions():
+            raw = await self.es.search(index=self.index,
+                                       body=current_search.to_dict(),
+                                       **_request_params(query))
+        # This is what Search.execute() would have returned.
+        resp = current_search._response_class(current_search, raw)
+
+        document_set = results.to_documentset(query, resp)
+        if self.cache is not None and cache_key is not None:
+            self.cache.set(cache_key, document_set)
+        return document_set
+
+    async def get_document(self, document_id: int) -> Document:
+        """
+        Retrieve a document from the index by ID.
+
+        Parameters
+        ----------
+        doument_id : int
+            Value of ``metadata_id`` in the original document.
+
+        Returns
+        -------
+        :class:`.Document`
+
+        Raises
+        ------
+        IndexConnectionError
+            Problem communicating with the search index.
+        DocumentNotFound
+            There is no such document in the index.
+
+        """
+        with handle_es_exceptions():
+            record = await self.es.get(index=self.index,
+                                       doc_type=self.doc_type,
+                                       id=document_id)
+        if not record:
+            logger.error("No such document: %s", document_id)
+            raise DocumentNotFound('No such document')
+        return Document.from_dict(record['_source'])
+
+    async def exists(self, paper_id_v: str) -> bool:
+        """Determine whether a paper exists in the index."""
+        with handle_es_exceptions():
+            ex: bool = await self.es.exists(index=self.index,
+                                            doc_type=self.doc_type,
+                                            id=paper_id_v)
+            return ex
+
+    async def bulk_add_documents(self, documents: List[Document],
+                                 docs_per_chunk: int = 500) -> BulkReport:
+        """
+        Add documents to the search index using the bulk API.
+
+        Parameters
+        ----------
+        documents : list
+            Items are :class:`.Document`, and must be valid search documents
+            per ``schema/Document.json``.
+        docs_per_chunk: int
+            Number of documents to send to ES in a single request.
+
+        Returns
+        -------
+        :class:`.BulkReport`
+
+        Raises
+        ------
+        IndexConnectionError
+            Problem communicating with Elasticsearch host.
+        PartialIndexingError
+            One or more documents were rejected. The others were indexed; the
+            ``report`` attribute lists the documents that were not.
+
+        """
+        report = BulkReport()
+        for start in range(0, len(documents), docs_per_chunk):
+            # The body is serialized here, so the client sends it as-is.
+            lines: List[bytes] = []
+            for document in documents[start:start + docs_per_chunk]:
+                lines.append(to_json_bytes({'index': {
+                    '_index': self.index,
+                    '_type': self.doc_type,
+                    '_id': document.id
+                }}))
+                lines.append(to_json_bytes(document))
+            body = b'\n'.join(lines) + b'\n'
+            with handle_es_exceptions():
+                response = await self.es.bulk(body=body)
+            for item in response['items']:
+                report.add(to_result('error' not in item['index'], item))
+        logger.debug('added %i documents to index', report.indexed)
+        if self.cache is not None:
+            self.cache.bump_generation()
+        if report.failures:
+            raise PartialIndexingError(
+                '%i document(s) failed to index: %s'
+                % (len(report.failures), ', '.join(report.failed_ids)),
+                report
+            )
+        return report
+
+
+def get_async_session(app: object = None) -> AsyncSearchSession:
+    """
+    Get a new asynchronous session with the search index.
+
+    The session should be created from within the event loop that will use
+    it, and closed (see :meth:`.AsyncSearchSession.close`) when that loop
+    shuts down. Without a Flask app, ``app`` should be a configuration
+    mapping (see :func:`asgi.get_config`); otherwise the session parameters
+    are read directly from the environment.
+    """
+    return AsyncSearchSession(cache=create_cache(**get_cache_params(app)),
+                              **_get_session_params(app))
@@ -0,0 +1,85 @@
+"""
+Per-document results of bulk indexing requests.
+
+The bulk API reports success or failure separately for each document in a
+request. :func:`.to_result` reduces an item from a bulk response to a
+:class:`.BulkResult`, and :class:`.BulkReport` collects the results for a
+whole run, so that callers can find out which documents were not indexed
+without re-sending the ones that were.
+"""
+
+from typing import Any, Iterable, List, NamedTuple, Optional
+
+from dataclasses import dataclass, field
+
+
+class BulkResult(NamedTuple):
+    """The outcome of indexing a single document with the bulk API."""
+
+    id: str
+    """The ID of the document (``paper_id_v``)."""
+
+    ok: bool
+    """Whether the document was indexed."""
+
+    status: int
+    """HTTP status for the document, e.g. ``201`` or ``429``."""
+
+    error: Optional[Any] = None
+    """The error reported by Elasticsearch, if the document was rejected."""
+
+
+@dataclass
+class BulkReport:
+    """Summary of a bulk indexing run."""
+
+    indexed: int = 0
+    """Number of documents that were indexed."""
+
+    failures: List[BulkResult] = field(default_factory=list)
+    """Documents that were rejected, after any retries."""
+
+    @property
+    def failed_ids(self) -> List[str]:
+        """Get the IDs of the documents that were rejected."""
+        return [result.id for result in self.failures]
+
+    def add(self, result: BulkResult) -> BulkResult:
+        """Count ``result``, and return it."""
+        if result.ok:
+            self.indexed += 1
+        else:
+            self.failures.append(result)
+        return result
+
+    @classmethod
+    def collect(cls, results: Iterable[BulkResult]) -> 'BulkReport':
+        """Consume ``results`` and summarize them."""
+        report = cls()
+        for result in results:
+            report.add(result)
+        return report
+
+
+def to_result(ok: bool, item: dict) -> BulkResult:
+    """
+    Get a :class:`.BulkResult` from an item in a bulk API response.
+
+    Parameters
+    ----------
+    ok : bool
+        Whether the item succeeded.
+    item : dict
+        Keyed by the action (e.g. ``index``), as in the ``items`` of a bulk
+        API response.
+
+    Returns
+    -------
+    :class:`.BulkResult`
+
+    """
+    info: dict = next(iter(item.values()))
+    error = info.get('error', info.get('exception'))
+    return BulkResult(id=info['_id'], ok=ok,
+                      status=info.get('status', 0),
+                      error=None if ok else error)
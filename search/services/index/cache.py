@@ -0,0 +1,303 @@
+"""
+Caching of search results.
+
+:class:`.SearchSession` can optionally use a :class:`.ResultCache` to avoid
+repeating the same query against Elasticsearch. Results are keyed on a
+canonical form of the :class:`.Query` (see :func:`.query_key`), including
+pagination and ordering parameters.
+
+Each cache maintains a generation counter that is bumped whenever documents
+are added to the index. The generation is part of every key, so results
+obtained prior to an update are never served after it; they simply age out.
+
+:class:`.LocalCache` is an in-process LRU cache. :class:`.SharedCache` stores
+results in a shared backend (e.g. Redis), so that the generation counter is
+shared by the UI and the indexing agent. Any client that supports the
+``get``, ``setex``, and ``incr`` methods of the ``redis`` client can be used.
+Results are stored in the shared backend as JSON (see :func:`.to_json`).
+"""
+
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from hashlib import sha1
+from typing import Any, Optional, Tuple, Dict
+
+from dateutil import parser
+
+from search.context import get_application_config
+from search.domain import Query, DocumentSet, asdict, to_json_bytes
+
+
+def query_key(query: Query) -> str:
+    """
+    Generate a canonical key for a :class:`.Query`.
+
+    Two queries with the same type and field values (including pagination and
+    ordering) will always have the same key.
+    """
+    data = json.dumps(asdict(query), sort_keys=True, default=str)
+    digest = sha1(data.encode('utf-8')).hexdigest()
+    return f'{type(query).__name__}:{digest}'
+
+
+class ResultCache(ABC):
+    """Base class for search result caches."""
+
+    def __init__(self, ttl: int = 60) -> None:
+        """
+        Set the time-to-live for cached results.
+
+        Parameters
+        ----------
+        ttl : int
+            Number of seconds for which a cached result may be used.
+
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    @abstractmethod
+    def generation(self) -> int:
+        """Get the current generation of the index."""
+
+    @abstractmethod
+    def bump_generation(self) -> None:
+        """Invalidate all cached results, e.g. after an index update."""
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[DocumentSet]:
+        """Get the value stored at ``key``, if it has not expired."""
+
+    @abstractmethod
+    def _set(self, key: str, value: DocumentSet) -> None:
+        """Store ``value`` at ``key``."""
+
+    def key(self, query: Query) -> str:
+        """
+        Get the cache key for ``query`` in the current generation.
+
+        The key should be obtained before the search is executed, so that
+        results are not cached under a generation that began afterwards.
+        """
+        return f'{self.generation}:{query_key(query)}'
+
+    def get(self, key: str) -> Optional[DocumentSet]:
+        """Get cached results for ``key``, if available."""
+        value = self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: DocumentSet) -> None:
+        """Cache results for ``key``."""
+        self._set(key, value)
+
+
+class LocalCache(ResultCache):
+    """An in-process LRU cache with a time-to-live."""
+
+    def __init__(self, maxsize: int = 1_000, ttl: int = 60) -> None:
+        """
+        Initialize an empty cache.
+
+        Parameters
+        ----------
+        maxsize : int
+            Maximum number of results to retain.
+        ttl : int
+            Number of seconds for which a cached result may be used.
+
+        """
+        super(LocalCache, self).__init__(ttl=ttl)
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        """Get the current generation of the index."""
+        return self._generation
+
+    def bump_generation(self) -> None:
+        """Invalidate all cached results, e.g. after an index update."""
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def _get(self, key: str) -> Optional[DocumentSet]:
+        with self._lock:
+            entry: Optional[Tuple[float, DocumentSet]] = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def _set(self, key: str, value: DocumentSet) -> None:
+        with self._lock:
+            self._data[key] = (time.time() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+class SharedCache(ResultCache):
+    """A cache that stores results in a shared backend, e.g. Redis."""
+
+    def __init__(self, client: Any, ttl: int = 60,
+                 prefix: str = 'search') -> None:
+        """
+        Initialize with a backend client.
+
+        Parameters
+        ----------
+        client : object
+            Must support the ``get``, ``setex``, and ``incr`` methods of the
+            ``redis`` client.
+        ttl : int
+            Number of seconds for which a cached result may be used.
+        prefix : str
+            Prefix for all keys stored in the backend.
+
+        """
+        super(SharedCache, self).__init__(ttl=ttl)
+        self.client = client
+        self.prefix = prefix
+
+    @property
+    def generation(self) -> int:
+        """Get the current generation of the index."""
+        value = self.client.get(f'{self.prefix}:generation')
+        return int(value) if value is not None else 0
+
+    def bump_generation(self) -> None:
+        """Invalidate all cached results, e.g. after an index update."""
+        self.client.incr(f'{self.prefix}:generation')
+
+    def _get(self, key: str) -> Optional[DocumentSet]:
+        value = self.client.get(f'{self.prefix}:{key}')
+        if value is None:
+            return None
+        return _from_json(value)
+
+    def _set(self, key: str, value: DocumentSet) -> None:
+        self.client.setex(f'{self.prefix}:{key}', self.ttl,
+                          to_json_bytes(value))
+
+
+_DATETIME_FIELDS = ('submitted_date', 'submitted_date_first',
+                    'submitted_date_latest')
+"""Fields of :class:`.Document` that are :class:`datetime`s."""
+
+
+def _parse_date(value: Any) -> Any:
+    """Parse an ISO-8601 date, or return ``value`` if it is not one."""
+    try:
+        return parser.parse(value)
+    except (ValueError, TypeError, OverflowError):
+        return value    # Dates that could not be parsed are left as-is.
+
+
+def _from_json(value: bytes) -> DocumentSet:
+    """Restore a :class:`.DocumentSet` serialized with :func:`.to_json`."""
+    data = json.loads(value)
+    for document in data['results']:
+        for key in _DATETIME_FIELDS:
+            if document.get(key):
+                document[key] = _parse_date(document[key])
+        if document.get('announced_date_first'):
+            announced = _parse_date(document['announced_date_first'])
+            if isinstance(announced, datetime):
+                document['announced_date_first'] = announced.date()
+    return DocumentSet.from_dict(data)
+
+
+class LocalBackend(object):
+    """
+    An in-process stand-in for a shared backend, e.g. for testing.
+
+    Implements the subset of the ``redis`` client API used by
+    :class:`.SharedCache`.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty store."""
+        self._data: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        """Get the value at ``key``, if it has not expired."""
+        with self._lock:
+            expires, value = self._data.get(key, (None, None))
+            if expires is not None and expires < time.time():
+                del self._data[key]
+                return None
+            return value
+
+    def setex(self, key: str, ttl: int, value: Any) -> None:
+        """Set ``value`` at ``key``, to expire after ``ttl`` seconds."""
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+
+    def incr(self, key: str) -> int:
+        """Increment the integer value at ``key``."""
+        with self._lock:
+            _, value = self._data.get(key, (None, 0))
+            value = int(value) + 1
+            self._data[key] = (None, value)
+            return value
+
+
+def get_cache_params(app: object = None) -> Dict[str, Any]:
+    """Get the result cache parameters from the application config."""
+    config = get_application_config(app)
+    return dict(
+        backend=config.get('SEARCH_CACHE', ''),
+        maxsize=int(config.get('SEARCH_CACHE_SIZE', '1000')),
+        ttl=int(config.get('SEARCH_CACHE_TTL', '60')),
+        url=config.get('SEARCH_CACHE_URL', None)
+    )
+
+
+def create_cache(backend: str = '', maxsize: int = 1_000, ttl: int = 60,
+                 url: Optional[str] = None) -> Optional[ResultCache]:
+    """
+    Create a :class:`.ResultCache`.
+
+    Parameters
+    ----------
+    backend : str
+        One of ``local`` (an in-process LRU cache) or ``redis``. If empty, no
+        cache is created.
+    maxsize : int
+        Maximum number of results to retain (``local`` only).
+    ttl : int
+        Number of seconds for which a cached result may be used.
+    url : str
+        URL of the Redis server (``redis`` only).
+
+    Returns
+    -------
+    :class:`.ResultCache` or None
+
+    """
+    if not backend:
+        return None
+    if backend == 'local':
+        return LocalCache(maxsize=maxsize, ttl=ttl)
+    if backend == 'redis':
+        import redis    # Only imported if this backend is used.
+        return SharedCache(redis.StrictRedis.from_url(url), ttl=ttl)
+    raise ValueError(f'Unknown cache backend: {backend}')
@@ -0,0 +1,67 @@
+"""
+Cursors for paging through results with ``search_after``.
+
+Offset pagination (``from`` + ``size``) is limited to
+:const:`.util.MAX_RESULTS`, and gets more expensive for the cluster the
+deeper the page. With a cursor, each page starts after the sort values of the
+last result of the previous page, so every page costs the same.
+
+A cursor is an opaque token. :const:`.FIRST` requests the first page; the
+token for the next page is in the ``cursor`` metadata of each
+:class:`.DocumentSet`, and is ``None`` once there are no more results.
+"""
+
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodeError
+from hashlib import sha1
+from typing import Any, List, Optional
+
+from search.domain import Query, asdict
+
+from .exceptions import QueryError
+
+FIRST = '*'
+"""Cursor for the first page of results."""
+
+
+def encode(after: List[Any]) -> str:
+    """Make a cursor for the page after a hit with sort values ``after``."""
+    data = json.dumps(after, separators=(',', ':')).encode('utf-8')
+    return urlsafe_b64encode(data).decode('ascii')
+
+
+def decode(cursor: str) -> Optional[List[Any]]:
+    """
+    Get the sort values to search after, or ``None`` for the first page.
+
+    Raises
+    ------
+    QueryError
+        ``cursor`` is not a valid cursor.
+
+    """
+    if cursor == FIRST:
+        return None
+    try:
+        after = json.loads(urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, DecodeError) as e:
+        raise QueryError(f'Invalid cursor: {cursor}') from e
+    if not isinstance(after, list):
+        raise QueryError(f'Invalid cursor: {cursor}')
+    return after
+
+
+def preference(query: Query) -> str:
+    """
+    Get a search preference for all of the pages of ``query``.
+
+    Pages of the same query are served by the same shard copies, so results
+    are in a consistent order even if replicas differ (e.g. in the tiebreak
+    between documents with equal scores).
+    """
+    data = asdict(query)
+    data.pop('cursor')
+    data.pop('page_start')
+    key = json.dumps(data, sort_keys=True, default=str).encode('utf-8')
+    return sha1(key).hexdigest()[:16]
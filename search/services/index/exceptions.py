@@ -1,7 +1,11 @@
 """Exceptions raised by the search index service."""
 
-__all__ = ('MappingError', 'IndexConnectionError', 'IndexingError',
-           'QueryError', 'DocumentNotFound', 'OutsideAllowedRange')
+from .bulk import BulkReport
+
+__all__ = ('MappingError', 'IndexConnectionError', 'IndexNotFound',
+           'IndexingError', 'PartialIndexingError', 'QueryError',
+           'DocumentNotFound', 'OutsideAllowedRange', 'BulkLoadInProgress',
+           'NotAnAlias')
 
 
 class MappingError(ValueError):
@@ -12,10 +16,29 @@ class IndexConnectionError(IOError):
     """There was a problem connecting to the search index."""
 
 
+class IndexNotFound(IndexConnectionError):
+    """The search index does not exist."""
+
+
 class IndexingError(IOError):
     """There was a problem adding a document to the index."""
 
 
+class PartialIndexingError(IndexingError):
+    """
+    Some of the documents in a bulk request could not be indexed.
+
+    The rest of the documents were indexed. ``report`` is the
+    :class:`.BulkReport` for the request, which lists the documents that were
+    rejected.
+    """
+
+    def __init__(self, message: str, report: BulkReport) -> None:
+        """Keep the report of the bulk request."""
+        super(PartialIndexingError, self).__init__(message)
+        self.report = report
+
+
 class QueryError(ValueError):
     """
     Elasticsearch could not handle the query.
@@ -31,3 +54,16 @@ class DocumentNotFound(RuntimeError):
 
 class OutsideAllowedRange(RuntimeError):
     """A page outside of the allowed range has been requested."""
+
+
+class BulkLoadInProgress(RuntimeError):
+    """
+    The index is already in bulk load mode.
+
+    Either another bulk load is running, or one was interrupted before the
+    settings of the index were restored.
+    """
+
+
+class NotAnAlias(ValueError):
+    """An alias was expected, but the name is that of an index."""
@@ -7,13 +7,15 @@ fields to query-building functions in the module.
 See :func:`._query_all_fields` for information on how results are scored.
 """
 
-from typing import Any, List, Tuple, Callable, Dict, Optional
-from functools import reduce, wraps
+from typing import Any, List, Tuple, Callable, Dict, Optional, Union
+from functools import reduce, wraps, lru_cache
 from operator import ior, iand
 import re
+import time
 from string import punctuation
 
 from elasticsearch_dsl import Search, Q, SF
+from elasticsearch_dsl.query import Query as DSLQuery, Bool
 
 from arxiv.base import logging
 
@@ -25,6 +27,13 @@ from .authors import author_query, author_id_query, orcid_query
 
 logger = logging.getLogger(__name__)
 
+QUERY_CACHE_SIZE = 1_024
+"""
+Default maximum number of compiled queries to retain for each search field.
+
+Set with ``SEARCH_QUERY_CACHE_SIZE`` (see :func:`.set_query_cache_size`).
+"""
+
 
 def _query_title(term: str, default_operator: str = 'AND') -> Q:
     if is_tex_query(term):
@@ -233,18 +242,122 @@ def _query_all_fields(term: str) -> Q:
              boost_mode='multiply')
 
 
+class CompiledQuery(DSLQuery):
+    """
+    A query that has already been serialized.
+
+    Behaves like any other :class:`.Q` when combined with other queries, but
+    skips serialization of its (potentially many) parts when the search is
+    executed. The serialized query is shared, and must not be modified.
+    """
+
+    name = None
+
+    def __init__(self, compiled: dict) -> None:
+        """Wrap the ``compiled`` (serialized) query."""
+        super(CompiledQuery, self).__init__()
+        self._compiled = compiled
+
+    def _clone(self) -> 'CompiledQuery':
+        return self     # Immutable, so there is no need to copy.
+
+    def to_dict(self) -> dict:
+        """Get the serialized query."""
+        return self._compiled
+
+
+class CachedQueryBuilder(object):
+    """
+    Memoizes the queries generated by a query-builder function.
+
+    Building a query (especially :func:`._query_all_fields`) involves a fair
+    amount of escaping and pattern-matching on the search term, and a deep
+    tree of :class:`.Q` objects to serialize. Since the same terms are
+    searched over and over, we keep the serialized query for each term and
+    its arguments, and return it as a :class:`.CompiledQuery` (or a fresh
+    :class:`.Bool`, for boolean queries).
+    """
+
+    def __init__(self, builder: Callable[..., Q],
+                 maxsize: int = QUERY_CACHE_SIZE) -> None:
+        """Wrap ``builder`` with an LRU cache of size ``maxsize``."""
+        self.builder = builder
+        self.build_time = 0.0
+        self._compile = lru_cache(maxsize=maxsize)(self._compile_query)
+        wraps(builder)(self)
+
+    def _compile_query(self, term: str, **kwargs: str) \
+            -> Union[CompiledQuery, dict]:
+        start = time.perf_counter()
+        query = self.builder(term, **kwargs)
+        compiled: Union[CompiledQuery, dict] = query.to_dict()
+        # Boolean queries are merged with other boolean queries when they are
+        # combined, so we want a real (but fresh) Bool each time.
+        if not isinstance(query, Bool):
+            compiled = CompiledQuery(compiled)
+        self.build_time += time.perf_counter() - start
+        return compiled
+
+    def __call__(self, term: str, **kwargs: str) -> Q:
+        """Get a :class:`.Q` for ``term``."""
+        compiled = self._compile(term, **kwargs)
+        if isinstance(compiled, dict):
+            return Q(compiled)
+        return compiled
+
+    def cache_info(self) -> Dict[str, Any]:
+        """Get hit rate and build time statistics for the cache."""
+        info = self._compile.cache_info()
+        requests = info.hits + info.misses
+        return {
+            'hits': info.hits,
+            'misses': info.misses,
+            'size': info.currsize,
+            'maxsize': info.maxsize,
+            'hit_rate': info.hits / requests if requests else 0.0,
+            'build_time': self.build_time,
+            'mean_build_time': (
+                self.build_time / info.misses if info.misses else 0.0
+            )
+        }
+
+    def cache_clear(self) -> None:
+        """Discard all compiled queries."""
+        self._compile.cache_clear()
+        self.build_time = 0.0
+
+    def resize(self, maxsize: int) -> None:
+        """Retain up to ``maxsize`` compiled queries, discarding any cached."""
+        if maxsize == self._compile.cache_info().maxsize:
+            return
+        self._compile = lru_cache(maxsize=maxsize)(self._compile_query)
+        self.build_time = 0.0
+
+
 SEARCH_FIELDS: Dict[str, Callable[[str], Q]] = dict([
-    ('author', author_query),
-    ('title', _query_title),
-    ('abstract', _query_abstract),
-    ('comments', _query_comments),
-    ('journal_ref', _query_journal_ref),
-    ('report_num', _query_report_num),
-    ('acm_class', _query_acm_class),
-    ('msc_class', _query_msc_class),
-    ('doi', _query_doi),
-    ('paper_id', _query_paper_id),
-    ('orcid', orcid_query),
-    ('author_id', author_id_query),
-    ('all', _query_all_fields)
+    ('author', CachedQueryBuilder(author_query)),
+    ('title', CachedQueryBuilder(_query_title)),
+    ('abstract', CachedQueryBuilder(_query_abstract)),
+    ('comments', CachedQueryBuilder(_query_comments)),
+    ('journal_ref', CachedQueryBuilder(_query_journal_ref)),
+    ('report_num', CachedQueryBuilder(_query_report_num)),
+    ('acm_class', CachedQueryBuilder(_query_acm_class)),
+    ('msc_class', CachedQueryBuilder(_query_msc_class)),
+    ('doi', CachedQueryBuilder(_query_doi)),
+    ('paper_id', CachedQueryBuilder(_query_paper_id)),
+    ('orcid', CachedQueryBuilder(orcid_query)),
+    ('author_id', CachedQueryBuilder(author_id_query)),
+    ('all', CachedQueryBuilder(_query_all_fields))
 ])
+
+
+def set_query_cache_size(maxsize: int) -> None:
+    """Set the number of compiled queries to retain for each search field."""
+    for builder in SEARCH_FIELDS.values():
+        builder.resize(maxsize)     # type: ignore
+
+
+def query_cache_info() -> Dict[str, Dict[str, Any]]:
+    """Get cache statistics for each of the ``SEARCH_FIELDS``."""
+    return {field: builder.cache_info()     # type: ignore
+            for field, builder in SEARCH_FIELDS.items()}
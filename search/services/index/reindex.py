@@ -0,0 +1,72 @@
+"""
+Progress of reindexing tasks.
+
+Elasticsearch reports the progress of a ``_reindex`` task via the tasks API;
+when the task is sliced, the status of the parent task is the sum of the
+statuses of its slices. :meth:`.ReindexProgress.from_task` summarizes that
+status, so that callers can report throughput and an estimate of the time
+remaining.
+"""
+
+from typing import NamedTuple, Optional
+
+
+class ReindexProgress(NamedTuple):
+    """A snapshot of the progress of a reindexing task."""
+
+    total: int
+    """Number of documents to copy."""
+
+    done: int
+    """Number of documents copied so far."""
+
+    elapsed: float
+    """Seconds since the task was started."""
+
+    completed: bool = False
+    """Whether the task has finished."""
+
+    @property
+    def rate(self) -> float:
+        """Documents copied per second."""
+        return self.done / self.elapsed if self.elapsed > 0 else 0.
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Estimated seconds until the task finishes, if it can be known."""
+        if self.completed:
+            return 0.
+        if not self.rate:
+            return None
+        return max(self.total - self.done, 0) / self.rate
+
+    @classmethod
+    def from_task(cls, status: dict, elapsed: float) -> 'ReindexProgress':
+        """
+        Summarize a response from the tasks API.
+
+        Parameters
+        ----------
+        status : dict
+            Response from the tasks API for a reindexing task.
+        elapsed : float
+            Seconds since the task was started.
+
+        Returns
+        -------
+        :class:`.ReindexProgress`
+
+        """
+        task = status.get('task', {}).get('status', {})
+        done = sum(task.get(key, 0) for key in
+                   ('created', 'updated', 'deleted', 'noops',
+                    'version_conflicts'))
+        return cls(total=task.get('total', 0), done=done, elapsed=elapsed,
+                   completed=bool(status.get('completed')))
+
+    def __str__(self) -> str:
+        """Summarize the progress so far."""
+        eta = self.eta
+        remaining = f'{eta:.0f}s' if eta is not None else 'unknown'
+        return (f'{self.done}/{self.total} in {self.elapsed:.1f}s'
+                f' ({self.rate:.1f}/s, ETA {remaining})')
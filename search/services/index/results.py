@@ -7,7 +7,7 @@ The primary public function in this module is :func:`.to_documentset`.
 import re
 from datetime import datetime
 from math import floor
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from elasticsearch_dsl.response import Response
 from search.domain import Document, Query, DocumentSet
@@ -15,6 +15,7 @@ from arxiv.base import logging
 
 from .util import MAX_RESULTS, TEXISM
 from .highlighting import add_highlighting, preview
+from . import cursor
 
 logger = logging.getLogger(__name__)
 logger.propagate = False
@@ -51,6 +52,22 @@ def _to_document(raw: Response) -> Document:
     # See https://github.com/python/mypy/issues/3937
 
 
+def _to_cursor_documentset(query: Query, response: Response) -> DocumentSet:
+    """Get a page of results for a query with a cursor."""
+    hits = [raw for raw in response]
+    next_cursor: Optional[str] = None
+    if len(hits) == query.page_size:
+        next_cursor = cursor.encode(list(hits[-1].meta.sort))
+    return DocumentSet(**{  # type: ignore
+        'metadata': {
+            'total': response['hits']['total'],
+            'page_size': query.page_size,
+            'cursor': next_cursor
+        },
+        'results': [_to_document(raw) for raw in hits]
+    })
+
+
 def to_documentset(query: Query, response: Response) -> DocumentSet:
     """
     Transform a response from ES to a :class:`.DocumentSet`.
@@ -66,9 +83,13 @@ def to_documentset(query: Query, response: Response) -> DocumentSet:
     -------
     :class:`.DocumentSet`
         The set of :class:`.Document`s responding to the query on the current
-        page, along with pagination metadata.
+        page, along with pagination metadata. If the query has a cursor, the
+        metadata includes the ``cursor`` for the next page instead of page
+        numbers.
 
     """
+    if query.cursor is not None:
+        return _to_cursor_documentset(query, response)
     max_pages = int(MAX_RESULTS/query.page_size)
     N_pages_raw = response['hits']['total']/query.page_size
     N_pages = int(floor(N_pages_raw)) + \
@@ -0,0 +1,88 @@
+"""Tests for :mod:`search.services.index.aio`."""
+
+import asyncio
+from unittest import TestCase, mock
+
+from elasticsearch_dsl import Search
+
+from search.domain import SimpleQuery, DocumentSet, Document
+from search.services.index import aio, cursor, prepare_search, IndexingError
+
+RAW = {'took': 1, 'timed_out': False,
+       'hits': {'total': 53, 'max_score': 1.0, 'hits': []}}
+
+
+def _returns(value):
+    """Make a side-effect that returns an awaitable of ``value``."""
+    async def _coroutine(*args, **kwargs):
+        return value
+    return _coroutine
+
+
+def run(coroutine):
+    """Run ``coroutine`` to completion in a new event loop."""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+@mock.patch(f'{aio.__name__}.AsyncElasticsearch')
+class TestAsyncSearchSession(TestCase):
+    """:class:`.AsyncSearchSession` mirrors :class:`.SearchSession`."""
+
+    def setUp(self):
+        """Use a simple query."""
+        self.query = SimpleQuery(order='relevance', page_size=10,
+                                 search_field='title', value='foo title')
+
+    def test_search(self, mock_Elasticsearch):
+        """The request body is the same as for the synchronous session."""
+        mock_es = mock_Elasticsearch.return_value
+        mock_es.search.side_effect = _returns(RAW)
+        session = aio.AsyncSearchSession('localhost', 'arxiv')
+
+        document_set = run(session.search(self.query))
+        self.assertIsInstance(document_set, DocumentSet)
+        self.assertEqual(document_set.metadata['total'], 53)
+        self.assertEqual(document_set.metadata['total_pages'], 6)
+
+        expected = prepare_search(Search(index='arxiv'), self.query)
+        _, kwargs = mock_es.search.call_args
+        self.assertEqual(kwargs['body'], expected.to_dict())
+        self.assertNotIn('preference', kwargs)
+
+    def test_search_with_cursor(self, mock_Elasticsearch):
+        """Pages of a query with a cursor are served by the same shards."""
+        mock_es = mock_Elasticsearch.return_value
+        mock_es.search.side_effect = _returns(RAW)
+        session = aio.AsyncSearchSession('localhost', 'arxiv')
+        self.query.cursor = cursor.FIRST
+
+        run(session.search(self.query))
+        _, kwargs = mock_es.search.call_args
+        self.assertEqual(kwargs['preference'], cursor.preference(self.query))
+
+    def test_bulk_add_documents(self, mock_Elasticsearch):
+        """Documents are sent in chunks, and failures are raised."""
+        mock_es = mock_Elasticsearch.return_value
+        mock_es.bulk.side_effect = _returns({'errors': False, 'items': []})
+        session = aio.AsyncSearchSession('localhost', 'arxiv')
+        documents = [Document(id=f'1234.5678{i}v1') for i in range(5)]
+
+        run(session.bulk_add_documents(documents, docs_per_chunk=2))
+        self.assertEqual(mock_es.bulk.call_count, 3)
+
+        mock_es.bulk.side_effect = _returns({
+            'errors': True,
+            'items': [{'index': {'_id': '1234.56780v1', 'error': 'nope'}}]
+        })
+        with self.assertRaises(IndexingError):
+            run(session.bulk_add_documents(documents))
+
+    def test_not_installed(self, mock_Elasticsearch):
+        """An error is raised if the async client is not available."""
+        with mock.patch(f'{aio.__name__}.AsyncElasticsearch', None):
+            with self.assertRaises(aio.IndexConnectionError):
+                aio.AsyncSearchSession('localhost', 'arxiv')
@@ -0,0 +1,190 @@
+"""Tests for :mod:`search.services.index.cache`."""
+
+import json
+from datetime import date, datetime
+from unittest import TestCase, mock
+
+from elasticsearch_dsl.response import Hit
+from pytz import timezone
+
+from search.services import index
+from search.services.index import cache
+from search.domain import SimpleQuery, AdvancedQuery, Document, \
+    DocumentSet, FieldedSearchList, FieldedSearchTerm
+
+
+def _results() -> DocumentSet:
+    return DocumentSet(metadata={'total': 0}, results=[])  # type: ignore
+
+
+class TestQueryKey(TestCase):
+    """Tests for :func:`.cache.query_key`."""
+
+    def test_equivalent_queries(self):
+        """Queries with the same parameters have the same key."""
+        self.assertEqual(
+            cache.query_key(SimpleQuery(search_field='all', value='foo')),
+            cache.query_key(SimpleQuery(search_field='all', value='foo'))
+        )
+
+    def test_pagination(self):
+        """Different pages of the same query have different keys."""
+        self.assertNotEqual(
+            cache.query_key(SimpleQuery(search_field='all', value='foo')),
+            cache.query_key(SimpleQuery(search_field='all', value='foo',
+                                        page_start=50))
+        )
+
+    def test_order(self):
+        """Different orderings of the same query have different keys."""
+        self.assertNotEqual(
+            cache.query_key(SimpleQuery(search_field='all', value='foo')),
+            cache.query_key(SimpleQuery(search_field='all', value='foo',
+                                        order='-announced_date_first'))
+        )
+
+    def test_advanced_query(self):
+        """Fielded terms are part of the key."""
+        def _query(term: str) -> AdvancedQuery:
+            return AdvancedQuery(terms=FieldedSearchList([
+                FieldedSearchTerm(operator='AND', field='title', term=term)
+            ]))
+        self.assertEqual(cache.query_key(_query('foo')),
+                         cache.query_key(_query('foo')))
+        self.assertNotEqual(cache.query_key(_query('foo')),
+                            cache.query_key(_query('bar')))
+
+
+class TestLocalCache(TestCase):
+    """Tests for :class:`.cache.LocalCache`."""
+
+    def setUp(self):
+        """Create a cache and a query."""
+        self.cache = cache.LocalCache(maxsize=2, ttl=60)
+        self.query = SimpleQuery(search_field='all', value='foo')
+
+    def test_get_set(self):
+        """Cached results are returned for the same query."""
+        results = _results()
+        self.assertIsNone(self.cache.get(self.cache.key(self.query)))
+        self.cache.set(self.cache.key(self.query), results)
+        self.assertIs(self.cache.get(self.cache.key(self.query)), results)
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_lru(self):
+        """The least recently used result is evicted."""
+        keys = [self.cache.key(SimpleQuery(search_field='all', value=value))
+                for value in ['foo', 'bar', 'baz']]
+        for key in keys:
+            self.cache.set(key, _results())
+        self.assertIsNone(self.cache.get(keys[0]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+    @mock.patch(f'{cache.__name__}.time')
+    def test_ttl(self, mock_time):
+        """Results expire after the TTL."""
+        mock_time.time.return_value = 1_000
+        key = self.cache.key(self.query)
+        self.cache.set(key, _results())
+        mock_time.time.return_value = 1_061
+        self.assertIsNone(self.cache.get(key))
+
+    def test_bump_generation(self):
+        """Results obtained before the generation is bumped are not used."""
+        key = self.cache.key(self.query)
+        self.cache.set(key, _results())
+        self.cache.bump_generation()
+        self.assertIsNone(self.cache.get(self.cache.key(self.query)))
+
+
+class TestSharedCache(TestCase):
+    """Tests for :class:`.cache.SharedCache` with a local backend."""
+
+    def test_shared_generation(self):
+        """Caches that share a backend share the generation."""
+        backend = cache.LocalBackend()
+        ui_cache = cache.SharedCache(backend)
+        agent_cache = cache.SharedCache(backend)
+        query = SimpleQuery(search_field='all', value='foo')
+
+        ui_cache.set(ui_cache.key(query), _results())
+        self.assertIsNotNone(ui_cache.get(ui_cache.key(query)))
+        agent_cache.bump_generation()
+        self.assertIsNone(ui_cache.get(ui_cache.key(query)))
+
+    def test_results_are_json(self):
+        """Results are stored as JSON, and restored with their dates."""
+        backend = cache.LocalBackend()
+        shared = cache.SharedCache(backend)
+        submitted = datetime(2018, 1, 2, 3, 4, 5,
+                             tzinfo=timezone('US/Eastern'))
+        hit = Hit({'_source': {
+            'authors': [{'full_name': 'Ada Lovelace'}],
+            'primary_classification': {'category': {'id': 'cs.DL'}}
+        }})
+        document = DocumentSet(metadata={'total': 1}, results=[Document(
+            paper_id='1801.00001', submitted_date=submitted,
+            announced_date_first=date(2018, 1, 1), authors=hit.authors,
+            primary_classification=hit.primary_classification,
+            highlight={'title': '<span>foo</span>'}
+        )])
+        key = shared.key(SimpleQuery(search_field='all', value='foo'))
+        shared.set(key, document)
+
+        stored = backend.get(f'search:{key}')
+        self.assertIsInstance(stored, bytes)
+        self.assertEqual(json.loads(stored)['results'][0]['paper_id'],
+                         '1801.00001')
+
+        result = shared.get(key).results[0]
+        self.assertEqual(result.paper_id, '1801.00001')
+        self.assertEqual(result.submitted_date, submitted)
+        self.assertEqual(result.announced_date_first, date(2018, 1, 1))
+        self.assertEqual(result.authors, [{'full_name': 'Ada Lovelace'}])
+        self.assertEqual(result.primary_classification,
+                         {'category': {'id': 'cs.DL'}})
+        self.assertEqual(result.highlight, {'title': '<span>foo</span>'})
+
+
+class TestResultCache(TestCase):
+    """:class:`.cache.ResultCache` is abstract."""
+
+    def test_cannot_instantiate(self):
+        """Subclasses must implement the storage methods."""
+        with self.assertRaises(TypeError):
+            cache.ResultCache()     # type: ignore
+
+
+class TestCachedSearch(TestCase):
+    """:meth:`.SearchSession.search` uses the result cache."""
+
+    @mock.patch('search.services.index.Search')
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_search_is_cached(self, mock_Elasticsearch, mock_Search):
+        """The same query only hits the index once, until an update."""
+        mock_results = mock.MagicMock()
+        mock_results.__getitem__.return_value = {'total': 0}
+        mock_results.__iter__.return_value = []
+
+        # Support the chaining API for py-ES.
+        mock_Search.return_value = mock_Search
+        mock_Search.filter.return_value = mock_Search
+        mock_Search.highlight.return_value = mock_Search
+        mock_Search.highlight_options.return_value = mock_Search
+        mock_Search.query.return_value = mock_Search
+        mock_Search.sort.return_value = mock_Search
+        mock_Search.__getitem__.return_value = mock_Search
+        mock_Search.execute.return_value = mock_results
+
+        session = index.SearchSession('localhost', 'arxiv',
+                                      cache=cache.LocalCache())
+        query = SimpleQuery(search_field='title', value='foo')
+        first = session.search(query)
+        second = session.search(query)
+        self.assertIs(first, second)
+        self.assertEqual(mock_Search.execute.call_count, 1)
+
+        session.bulk_add_documents([])
+        session.search(query)
+        self.assertEqual(mock_Search.execute.call_count, 2)
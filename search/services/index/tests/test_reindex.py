@@ -66,3 +66,107 @@ class TestTaskStatus(TestCase):
                          "Should call the task status endpoint")
         self.assertEqual(mock_es.tasks.get.call_args[0][0], task_id,
                          "Should call the task status endpoint with task ID")
+
+
+class TestRebuildIndex(TestCase):
+    """Tests for :func:`.index.rebuild_index`."""
+
+    def setUp(self):
+        """Mock a sliced reindex task that finishes on the second check."""
+        self.statuses = [
+            {'completed': False,
+             'task': {'status': {'total': 10, 'created': 4}}},
+            {'completed': True,
+             'task': {'status': {'total': 10, 'created': 10}},
+             'response': {'failures': []}}
+        ]
+
+    def _mock_es(self, mock_Elasticsearch):
+        mock_es = mock_Elasticsearch.return_value
+        mock_es.indices.exists_alias.return_value = True
+        mock_es.indices.get_alias.return_value = {'arxiv-1': {}}
+        mock_es.indices.get_settings.return_value = {
+            'arxiv-2': {'settings': {'index.number_of_replicas': '1'}}
+        }
+        mock_es.reindex.return_value = {'task': 'foonode:bartask'}
+        mock_es.tasks.get.side_effect = self.statuses
+        return mock_es
+
+    @mock.patch('search.services.index.time.sleep')
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_rebuild(self, mock_Elasticsearch, mock_sleep):
+        """The index is copied with tuned settings, then the alias moves."""
+        mock_es = self._mock_es(mock_Elasticsearch)
+        reported = []
+        final = index.rebuild_index('arxiv-2', alias='arxiv', slices=4,
+                                    progress=reported.append)
+
+        _, kwargs = mock_es.reindex.call_args
+        self.assertEqual(kwargs['slices'], 4)
+        self.assertFalse(kwargs['wait_for_completion'])
+        self.assertEqual([p.done for p in reported], [4, 10])
+        self.assertTrue(final.completed)
+        self.assertEqual(final.eta, 0)
+
+        tuned, restored = [c[1]['body']['index'] for c
+                           in mock_es.indices.put_settings.call_args_list]
+        self.assertEqual(tuned, {'refresh_interval': '-1',
+                                 'number_of_replicas': 0})
+        self.assertEqual(restored, {'refresh_interval': None,
+                                    'number_of_replicas': '1'})
+        _, kwargs = mock_es.indices.update_aliases.call_args
+        self.assertEqual(kwargs['body']['actions'], [
+            {'remove': {'index': 'arxiv-1', 'alias': 'arxiv'}},
+            {'add': {'index': 'arxiv-2', 'alias': 'arxiv'}}
+        ])
+
+    @mock.patch('search.services.index.time.sleep')
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_rebuild_fails(self, mock_Elasticsearch, mock_sleep):
+        """If documents could not be copied, the alias does not move."""
+        mock_es = self._mock_es(mock_Elasticsearch)
+        self.statuses[-1]['response']['failures'] = [{'cause': 'nope'}]
+        with self.assertRaises(index.IndexingError):
+            index.rebuild_index('arxiv-2', alias='arxiv', tune=False)
+        self.assertEqual(mock_es.indices.put_settings.call_count, 0)
+        self.assertEqual(mock_es.indices.update_aliases.call_count, 0)
+
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_alias_is_an_index(self, mock_Elasticsearch):
+        """An index with the name of the alias is not deleted by default."""
+        mock_es = self._mock_es(mock_Elasticsearch)
+        mock_es.indices.exists_alias.return_value = False
+        mock_es.indices.exists.return_value = True
+        with self.assertRaises(index.NotAnAlias):
+            index.rebuild_index('arxiv-2', alias='arxiv', poll_interval=0)
+        self.assertEqual(mock_es.reindex.call_count, 0)
+        self.assertEqual(mock_es.indices.update_aliases.call_count, 0)
+
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_replace_index_with_alias(self, mock_Elasticsearch):
+        """An index with the name of the alias is removed atomically."""
+        mock_es = self._mock_es(mock_Elasticsearch)
+        mock_es.indices.exists_alias.return_value = False
+        mock_es.indices.exists.return_value = True
+        index.rebuild_index('arxiv-2', alias='arxiv', poll_interval=0,
+                            delete_old=True)
+        _, kwargs = mock_es.indices.update_aliases.call_args
+        self.assertEqual(kwargs['body']['actions'], [
+            {'remove_index': {'index': 'arxiv'}},
+            {'add': {'index': 'arxiv-2', 'alias': 'arxiv'}}
+        ])
+
+
+class TestReindexProgress(TestCase):
+    """Tests for :class:`.ReindexProgress`."""
+
+    def test_from_task(self):
+        """Throughput and ETA are estimated from the task status."""
+        progress = index.ReindexProgress.from_task({
+            'completed': False,
+            'task': {'status': {'total': 100, 'created': 20, 'updated': 5}}
+        }, elapsed=5.)
+        self.assertEqual(progress.done, 25)
+        self.assertEqual(progress.rate, 5.)
+        self.assertEqual(progress.eta, 15.)
+        self.assertIsNone(index.ReindexProgress(100, 0, 1.).eta)
@@ -0,0 +1,62 @@
+"""Tests for :func:`.index.current_session`."""
+
+from unittest import TestCase, mock
+
+from flask import Flask
+
+from search.services import index
+
+
+class TestSharedSession(TestCase):
+    """Sessions are shared by requests handled by the same process."""
+
+    def setUp(self):
+        """Start with no shared sessions."""
+        index.clear_sessions()
+        self.app = Flask('test')
+        index.init_app(self.app)
+
+    def tearDown(self):
+        """Discard shared sessions created by the test."""
+        index.clear_sessions()
+
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_session_is_reused(self, mock_Elasticsearch):
+        """The same session is used across application contexts."""
+        with self.app.app_context():
+            first = index.current_session()
+        with self.app.app_context():
+            second = index.current_session()
+        self.assertIs(first, second)
+        self.assertEqual(mock_Elasticsearch.call_count, 1,
+                         "Should only create one client")
+
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_session_per_configuration(self, mock_Elasticsearch):
+        """A different configuration gets a different session."""
+        with self.app.app_context():
+            first = index.current_session()
+        self.app.config['ELASTICSEARCH_INDEX'] = 'foo'
+        with self.app.app_context():
+            second = index.current_session()
+        self.assertIsNot(first, second)
+        self.assertEqual(second.index, 'foo')
+
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_pool_configuration(self, mock_Elasticsearch):
+        """Connection pool parameters are passed to the client."""
+        self.app.config['ELASTICSEARCH_MAXSIZE'] = '100'
+        self.app.config['ELASTICSEARCH_TIMEOUT'] = '2.5'
+        self.app.config['ELASTICSEARCH_SNIFF_ON_CONNECTION_FAIL'] = 'true'
+        with self.app.app_context():
+            index.current_session()
+        _, kwargs = mock_Elasticsearch.call_args
+        self.assertEqual(kwargs['maxsize'], 100)
+        self.assertEqual(kwargs['timeout'], 2.5)
+        self.assertTrue(kwargs['sniff_on_connection_fail'])
+        self.assertFalse(kwargs['sniff_on_start'])
+
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_no_application_context(self, mock_Elasticsearch):
+        """Outside of an application context, a new session is created."""
+        self.assertIsNot(index.current_session(), index.current_session())
@@ -1,19 +1,24 @@
 """Tests for :mod:`search.services.index`."""
 
+import os
 from unittest import TestCase, mock
 from datetime import date, datetime, timedelta
 from pytz import timezone
 from elasticsearch_dsl import Search, Q
 from elasticsearch_dsl.query import Range, Match, Bool, Nested
+from elasticsearch_dsl.response import Response
+from flask import Flask
 
 from search.services import index
-from search.services.index import advanced
+from search.services.index import advanced, prepare, cursor, results
 from search.services.index.util import wildcardEscape, Q_
 from search.domain import Query, FieldedSearchTerm, DateRange, Classification,\
     AdvancedQuery, FieldedSearchList, ClassificationList, SimpleQuery, \
-    DocumentSet
+    DocumentSet, Document
 
 EASTERN = timezone('US/Eastern')
+MAPPING = os.path.join(os.path.dirname(__file__), '..', '..', '..', '..',
+                       'mappings', 'DocumentMapping.json')
 
 
 class TestSearch(TestCase):
@@ -265,3 +270,426 @@ class TestPrepare(TestCase):
         except AssertionError:
             self.fail('Should result in a single group')
         self.assertEqual(expected, terms)
+
+
+class TestQueryCache(TestCase):
+    """Compiled queries are cached for each search field."""
+
+    def setUp(self):
+        """Start with an empty cache."""
+        self.builder = prepare.SEARCH_FIELDS['all']
+        self.builder.cache_clear()
+
+    def test_cached_query(self):
+        """The same term gets an equivalent query from the cache."""
+        first = self.builder('foo 1902 "bar baz"')
+        second = self.builder('foo 1902 "bar baz"')
+        self.assertEqual(first.to_dict(), second.to_dict())
+        info = prepare.query_cache_info()['all']
+        self.assertEqual(info['hits'], 1)
+        self.assertEqual(info['misses'], 1)
+        self.assertEqual(info['hit_rate'], 0.5)
+        self.assertGreater(info['build_time'], 0)
+
+    def test_configured_size(self):
+        """The size of the cache is set by ``SEARCH_QUERY_CACHE_SIZE``."""
+        app = Flask('test')
+        app.config['SEARCH_QUERY_CACHE_SIZE'] = '16'
+        try:
+            index.init_app(app)
+            self.assertEqual(prepare.query_cache_info()['all']['maxsize'], 16)
+        finally:
+            prepare.set_query_cache_size(prepare.QUERY_CACHE_SIZE)
+
+    def test_combined_queries(self):
+        """Combining cached queries does not alter the cache."""
+        query = AdvancedQuery(terms=FieldedSearchList([
+            FieldedSearchTerm(operator=None, field='all', term='muon'),
+            FieldedSearchTerm(operator='OR', field='all', term='gluon'),
+            FieldedSearchTerm(operator='AND', field='all', term='muon'),
+            FieldedSearchTerm(operator='NOT', field='all', term='gluon'),
+        ]))
+        expected = advanced._fielded_terms_to_q(query).to_dict()
+        for _ in range(3):
+            self.assertEqual(advanced._fielded_terms_to_q(query).to_dict(),
+                             expected)
+
+
+class TestBulkExists(TestCase):
+    """Tests for :meth:`.SearchSession.bulk_exists`."""
+
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_bulk_exists(self, mock_Elasticsearch):
+        """Several papers are checked in a single request."""
+        mock_es = mock_Elasticsearch.return_value
+        mock_es.mget.return_value = {'docs': [
+            {'_id': '1234.56789v1', 'found': True},
+            {'_id': '1234.56789v2', 'found': False},
+        ]}
+        status = index.bulk_exists(['1234.56789v1', '1234.56789v2'])
+        self.assertEqual(status, {'1234.56789v1': True,
+                                  '1234.56789v2': False})
+        self.assertEqual(mock_es.mget.call_count, 1)
+        _, kwargs = mock_es.mget.call_args
+        self.assertEqual(kwargs['body'],
+                         {'ids': ['1234.56789v1', '1234.56789v2']})
+        self.assertFalse(kwargs['_source'])
+
+
+class TestParallelBulkAddDocuments(TestCase):
+    """Tests for :meth:`.SearchSession.parallel_bulk_add_documents`."""
+
+    @mock.patch('search.services.index.helpers')
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_stream_documents(self, mock_Elasticsearch, mock_helpers):
+        """Documents are consumed lazily, and their IDs are generated."""
+        def parallel_bulk(client, actions, **kwargs):
+            for action in actions:
+                yield True, {'index': {'_id': action['_id']}}
+
+        mock_helpers.parallel_bulk.side_effect = parallel_bulk
+        documents = (Document(id=f'1234.5678{i}v1') for i in range(3))
+        indexed = index.parallel_bulk_add_documents(documents)
+        self.assertEqual(next(indexed), '1234.56780v1')
+        self.assertEqual(list(indexed), ['1234.56781v1', '1234.56782v1'])
+
+    @mock.patch('search.services.index.helpers')
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_index_went_away(self, mock_Elasticsearch, mock_helpers):
+        """Documents rejected for a missing index are sent again."""
+        mock_es = mock_Elasticsearch.return_value
+        mock_es.indices.exists.side_effect = [True, False]
+        mock_helpers.parallel_bulk.side_effect = \
+            TestStreamBulkAddDocuments._streaming_bulk({'1234.56781v1'}, 404)
+        mock_helpers.streaming_bulk.side_effect = \
+            TestStreamBulkAddDocuments._streaming_bulk(set())
+        session = index.SearchSession('localhost', 'arxiv', mapping=MAPPING)
+        documents = (Document(id=f'1234.5678{i}v1') for i in range(3))
+        self.assertEqual(list(session.parallel_bulk_add_documents(documents)),
+                         ['1234.56780v1', '1234.56782v1', '1234.56781v1'])
+        self.assertEqual(mock_es.indices.create.call_count, 1)
+
+    @mock.patch('search.services.index.helpers')
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_rejected(self, mock_Elasticsearch, mock_helpers):
+        """A rejected document is an indexing error."""
+        mock_helpers.parallel_bulk.side_effect = \
+            TestStreamBulkAddDocuments._streaming_bulk({'1234.56781v1'})
+        documents = (Document(id=f'1234.5678{i}v1') for i in range(3))
+        indexed = index.parallel_bulk_add_documents(documents)
+        self.assertEqual(next(indexed), '1234.56780v1')
+        with self.assertRaises(index.IndexingError):
+            next(indexed)
+
+
+class TestStreamBulkAddDocuments(TestCase):
+    """Tests for :meth:`.SearchSession.stream_bulk_add_documents`."""
+
+    @staticmethod
+    def _streaming_bulk(rejected, status=400):
+        def streaming_bulk(client, actions, **kwargs):
+            for action in actions:
+                if action['_id'] in rejected:
+                    yield False, {'index': {'_id': action['_id'],
+                                            'status': status, 'error': 'bad'}}
+                else:
+                    yield True, {'index': {'_id': action['_id'],
+                                           'status': 201}}
+        return streaming_bulk
+
+    @mock.patch('search.services.index.helpers')
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_stream_results(self, mock_Elasticsearch, mock_helpers):
+        """A result is generated for each document, including rejected ones."""
+        mock_helpers.streaming_bulk.side_effect = \
+            self._streaming_bulk({'1234.56781v1'})
+        documents = (Document(id=f'1234.5678{i}v1') for i in range(3))
+        results = list(index.stream_bulk_add_documents(documents,
+                                                       max_retries=5))
+        self.assertEqual([r.id for r in results],
+                         ['1234.56780v1', '1234.56781v1', '1234.56782v1'])
+        self.assertEqual([r.ok for r in results], [True, False, True])
+        self.assertEqual(results[1].status, 400)
+        self.assertEqual(results[1].error, 'bad')
+        _, kwargs = mock_helpers.streaming_bulk.call_args
+        self.assertFalse(kwargs['raise_on_error'])
+        self.assertEqual(kwargs['max_retries'], 5)
+
+    @mock.patch('search.services.index.helpers')
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_partial_failure(self, mock_Elasticsearch, mock_helpers):
+        """All documents are sent, and the rejected ones are reported."""
+        mock_helpers.streaming_bulk.side_effect = \
+            self._streaming_bulk({'1234.56781v1'})
+        documents = [Document(id=f'1234.5678{i}v1') for i in range(3)]
+        with self.assertRaises(index.PartialIndexingError) as ctx:
+            index.bulk_add_documents(documents)
+        self.assertEqual(ctx.exception.report.indexed, 2)
+        self.assertEqual(ctx.exception.report.failed_ids, ['1234.56781v1'])
+
+        mock_helpers.streaming_bulk.side_effect = self._streaming_bulk(set())
+        report = index.bulk_add_documents(documents)
+        self.assertEqual(report.indexed, 3)
+        self.assertEqual(report.failures, [])
+
+    @mock.patch('search.services.index.helpers')
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_index_went_away(self, mock_Elasticsearch, mock_helpers):
+        """The index is created again, and rejected documents are resent."""
+        mock_es = mock_Elasticsearch.return_value
+        mock_es.indices.exists.side_effect = [True, False]
+        first = self._streaming_bulk({'1234.56781v1', '1234.56782v1'}, 404)
+        again = self._streaming_bulk(set())
+        mock_helpers.streaming_bulk.side_effect = \
+            lambda client, actions, **kwargs: (
+                again if isinstance(actions, list) else first
+            )(client, actions, **kwargs)
+        session = index.SearchSession('localhost', 'arxiv', mapping=MAPPING)
+        documents = (Document(id=f'1234.5678{i}v1') for i in range(3))
+        results = list(session.stream_bulk_add_documents(documents))
+        self.assertEqual([r.id for r in results],
+                         ['1234.56780v1', '1234.56781v1', '1234.56782v1'])
+        self.assertTrue(all(r.ok for r in results))
+        self.assertEqual(mock_es.indices.create.call_count, 1)
+        self.assertEqual(mock_helpers.streaming_bulk.call_count, 2)
+        _, kwargs = mock_helpers.streaming_bulk.call_args
+        self.assertEqual([action['_id'] for action in kwargs['actions']],
+                         ['1234.56781v1', '1234.56782v1'])
+
+
+class TestIndexReadiness(TestCase):
+    """The index is checked once per session, and created when missing."""
+
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_check_once(self, mock_Elasticsearch):
+        """Existence of the index is checked before the first write only."""
+        mock_es = mock_Elasticsearch.return_value
+        mock_es.indices.exists.return_value = True
+        session = index.SearchSession('localhost', 'arxiv')
+        self.assertEqual(session.readiness, session.UNKNOWN)
+
+        session.add_document(Document(id='1234.56789v1'))
+        session.add_document(Document(id='1234.56789v2'))
+        self.assertEqual(mock_es.indices.exists.call_count, 1)
+        self.assertEqual(mock_es.index.call_count, 2)
+        self.assertEqual(session.readiness, session.READY)
+        self.assertEqual(mock_es.indices.create.call_count, 0)
+
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_index_went_away(self, mock_Elasticsearch):
+        """If the index is missing, it is created and the write retried."""
+        mock_es = mock_Elasticsearch.return_value
+        mock_es.indices.exists.side_effect = [True, False]
+        mock_es.index.side_effect = [
+            index.TransportError(404, 'index_not_found_exception', {}),
+            {'result': 'created'}
+        ]
+        session = index.SearchSession('localhost', 'arxiv', mapping=MAPPING)
+        session.add_document(Document(id='1234.56789v1'))
+        self.assertEqual(mock_es.indices.create.call_count, 1)
+        self.assertEqual(mock_es.index.call_count, 2)
+        self.assertEqual(session.readiness, session.READY)
+
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_create_fails(self, mock_Elasticsearch):
+        """If the index cannot be created, it is checked again next time."""
+        mock_es = mock_Elasticsearch.return_value
+        mock_es.indices.exists.return_value = False
+        session = index.SearchSession('localhost', 'arxiv')   # No mapping.
+        with self.assertRaises(index.IndexingError):
+            session.add_document(Document(id='1234.56789v1'))
+        self.assertEqual(session.readiness, session.UNKNOWN)
+        self.assertEqual(mock_es.index.call_count, 0)
+
+
+class TestBulkLoadMode(TestCase):
+    """Tests for :meth:`.SearchSession.bulk_load_mode`."""
+
+    def _mock_es(self, mock_Elasticsearch, marker=None):
+        mock_es = mock_Elasticsearch.return_value
+        mock_es.indices.exists.return_value = True
+        mock_es.indices.get_settings.return_value = {'arxiv-1': {
+            'settings': {'index.number_of_replicas': '2',
+                         'index.refresh_interval': '5s'}
+        }}
+        meta = {'owner': 'ops'}     # Set by someone else; must be kept.
+        if marker is not None:
+            meta['bulk_load'] = marker
+        mock_es.indices.get_mapping.return_value = {'arxiv-1': {
+            'mappings': {'document': {'_meta': meta}}
+        }}
+        return mock_es
+
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_settings_restored(self, mock_Elasticsearch):
+        """Settings are tuned within the context, and restored afterward."""
+        mock_es = self._mock_es(mock_Elasticsearch)
+        session = index.SearchSession('localhost', 'arxiv')
+        with session.bulk_load_mode():
+            _, kwargs = mock_es.indices.put_settings.call_args
+            self.assertEqual(kwargs['body']['index'],
+                             session.BULK_LOAD_SETTINGS)
+            _, kwargs = mock_es.indices.put_mapping.call_args
+            self.assertEqual(kwargs['body']['_meta'], {
+                'owner': 'ops',
+                'bulk_load': {'number_of_replicas': '2',
+                              'refresh_interval': '5s',
+                              'translog.durability': None}
+            })
+
+        self.assertEqual(mock_es.indices.forcemerge.call_count, 1)
+        _, kwargs = mock_es.indices.put_settings.call_args
+        self.assertEqual(kwargs['body']['index']['number_of_replicas'], '2')
+        _, kwargs = mock_es.indices.put_mapping.call_args
+        self.assertEqual(kwargs['body'], {'_meta': {'owner': 'ops'}})
+
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_settings_restored_on_error(self, mock_Elasticsearch):
+        """Settings are restored, without a merge, if loading fails."""
+        mock_es = self._mock_es(mock_Elasticsearch)
+        session = index.SearchSession('localhost', 'arxiv')
+        with self.assertRaises(RuntimeError):
+            with session.bulk_load_mode():
+                raise RuntimeError('nope')
+        self.assertEqual(mock_es.indices.forcemerge.call_count, 0)
+        _, kwargs = mock_es.indices.put_settings.call_args
+        self.assertEqual(kwargs['body']['index']['refresh_interval'], '5s')
+
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_restore_after_crash(self, mock_Elasticsearch):
+        """Settings saved by an unfinished bulk load are restored."""
+        saved = {'number_of_replicas': '1', 'refresh_interval': None,
+                 'translog.durability': None}
+        mock_es = self._mock_es(mock_Elasticsearch, marker=saved)
+        session = index.SearchSession('localhost', 'arxiv')
+        self.assertTrue(session.restore_settings())
+        _, kwargs = mock_es.indices.put_settings.call_args
+        self.assertEqual(kwargs['body']['index'], saved)
+        _, kwargs = mock_es.indices.put_mapping.call_args
+        self.assertEqual(kwargs['body'], {'_meta': {'owner': 'ops'}})
+
+        mock_es = self._mock_es(mock_Elasticsearch)
+        self.assertFalse(session.restore_settings())
+
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_already_in_bulk_load_mode(self, mock_Elasticsearch):
+        """A bulk load does not start over a marker unless asked to recover."""
+        saved = {'number_of_replicas': '1', 'refresh_interval': None,
+                 'translog.durability': None}
+        mock_es = self._mock_es(mock_Elasticsearch, marker=saved)
+        session = index.SearchSession('localhost', 'arxiv')
+        with self.assertRaises(index.BulkLoadInProgress):
+            with session.bulk_load_mode():
+                pass
+        self.assertEqual(mock_es.indices.put_settings.call_count, 0,
+                         "Settings are not touched")
+
+        with session.bulk_load_mode(recover=True):
+            _, kwargs = mock_es.indices.put_settings.call_args_list[0]
+            self.assertEqual(kwargs['body']['index'], saved,
+                             "Saved settings are restored first")
+
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_check_bulk_load_mode(self, mock_Elasticsearch):
+        """A warning is logged if settings have not been restored."""
+        saved = {'number_of_replicas': '1', 'refresh_interval': None,
+                 'translog.durability': None}
+        mock_es = self._mock_es(mock_Elasticsearch, marker=saved)
+        session = index.SearchSession('localhost', 'arxiv')
+        with self.assertLogs(index.logger, 'WARNING'):
+            self.assertTrue(session.check_bulk_load_mode())
+        self.assertEqual(mock_es.indices.put_settings.call_count, 0,
+                         "Settings are not restored")
+
+        self._mock_es(mock_Elasticsearch)
+        self.assertFalse(session.check_bulk_load_mode())
+
+
+class TestCursorPagination(TestCase):
+    """Pages of results can be requested with a cursor."""
+
+    def setUp(self):
+        """Request a page well beyond :const:`.MAX_RESULTS`."""
+        self.query = SimpleQuery(search_field='title', value='foo',
+                                 page_size=10, page_start=20_000,
+                                 cursor=cursor.FIRST)
+
+    def test_first_page(self):
+        """The first page starts at the beginning, with a unique tiebreak."""
+        search = index.prepare_search(Search(), self.query)
+        body = search.to_dict()
+        self.assertEqual(body['from'], 0)
+        self.assertEqual(body['size'], 10)
+        self.assertNotIn('search_after', body)
+        self.assertEqual(body['sort'][-1], 'paper_id_v')
+        self.assertEqual(search._params['preference'],
+                         cursor.preference(self.query))
+
+    def test_next_page(self):
+        """Later pages search after the last result of the previous page."""
+        self.query.cursor = cursor.encode([1514764800000, '1801.00001v2'])
+        search = index.prepare_search(Search(), self.query)
+        self.assertEqual(search.to_dict()['search_after'],
+                         [1514764800000, '1801.00001v2'])
+        # All pages of a query are served by the same shard copies.
+        first = SimpleQuery(search_field='title', value='foo', page_size=10,
+                            cursor=cursor.FIRST)
+        self.assertEqual(search._params['preference'],
+                         cursor.preference(first))
+
+    def test_invalid_cursor(self):
+        """A cursor that was not issued by the index is a query error."""
+        self.query.cursor = 'not a cursor'
+        with self.assertRaises(index.QueryError):
+            index.prepare_search(Search(), self.query)
+
+    def test_documentset(self):
+        """The cursor for the next page is included in the metadata."""
+        def response(n_hits):
+            return Response(Search(), {'hits': {'total': 25, 'hits': [
+                {'_id': f'1801.0000{i}v1', '_score': None,
+                 '_source': {'paper_id': f'1801.0000{i}', 'abstract': ''},
+                 'sort': [1514764800000, f'1801.0000{i}v1']}
+                for i in range(n_hits)
+            ]}})
+
+        page = results.to_documentset(self.query, response(10))
+        self.assertEqual(len(page.results), 10)
+        self.assertEqual(cursor.decode(page.metadata['cursor']),
+                         [1514764800000, '1801.00009v1'])
+
+        last_page = results.to_documentset(self.query, response(5))
+        self.assertIsNone(last_page.metadata['cursor'])
+
+
+class TestExport(TestCase):
+    """Tests for :meth:`.SearchSession.export`."""
+
+    @mock.patch('search.services.index.Elasticsearch')
+    def test_export(self, mock_Elasticsearch):
+        """All results are retrieved, a page at a time, with a cursor."""
+        def page(ids):
+            return {'hits': {'total': 5, 'hits': [
+                {'_source': {'paper_id_v': ident}, 'sort': [0, ident]}
+                for ident in ids
+            ]}}
+        mock_es = mock_Elasticsearch.return_value
+        mock_es.search.side_effect = [page(['a', 'b']), page(['c', 'd']),
+                                      page(['e'])]
+        query = SimpleQuery(search_field='title', value='foo',
+                            page_start=20_000)
+
+        documents = index.export(query, ['paper_id_v'], page_size=2)
+        self.assertEqual([doc['paper_id_v'] for doc in documents],
+                         ['a', 'b', 'c', 'd', 'e'])
+        self.assertEqual(mock_es.search.call_count, 3)
+        bodies = [kwargs['body'] for _, kwargs
+                  in mock_es.search.call_args_list]
+        self.assertEqual(bodies[0]['_source'], ['paper_id_v'])
+        self.assertNotIn('highlight', bodies[0])
+        self.assertNotIn('search_after', bodies[0])
+        self.assertEqual(bodies[2]['search_after'], [0, 'd'])
+        preferences = {kwargs['preference'] for _, kwargs
+                       in mock_es.search.call_args_list}
+        self.assertEqual(len(preferences), 1, 'Pages use the same shards')
+        self.assertIsNone(query.cursor, 'The query is not modified')
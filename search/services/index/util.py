@@ -24,6 +24,9 @@ SPECIAL_CHARACTERS = ['+', '=', '&&', '||', '>', '<', '!', '(', ')', '{',
                       '}', '[', ']', '^', '~', ':', '\\', '/', '-']
 DEFAULT_SORT = ['-announced_date_first', '_doc']
 
+CURSOR_TIEBREAKER = 'paper_id_v'
+"""Unique field that orders results with equal sort values, for cursors."""
+
 DATE_PARTIAL = r"(?:^|[\s])(\d{2})((?:0[1-9]{1})|(?:1[0-2]{1}))(?:$|[\s])"
 """Used to match parts of author IDs that encode the announcement date."""
 
@@ -122,6 +125,10 @@ def sort(query: Query, search: Search) -> Search:
     else:
         direction = '-' if query.order.startswith('-') else ''
         sort_params = [query.order, f'{direction}paper_id_v']
+    if query.cursor is not None and sort_params[-1] == '_doc':
+        # ``_doc`` is only unique within a shard, so a cursor made from it
+        # could skip or repeat results.
+        sort_params = sort_params[:-1] + [CURSOR_TIEBREAKER]
     if sort_params is not None:
         search = search.sort(*sort_params)
     return search
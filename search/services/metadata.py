@@ -4,18 +4,28 @@ Provides acces to paper metadata from the core arXiv repository.
 The primary entrypoint to this module is :func:`.retrieve`, which retrieves
 :class:`.DocMeta` for a published arXiv paper.
 
-:class:`.DocMetaSession` encapsulates configuration parameters and a connection
-to the docmeta endpoint(s) for thread-safety and efficiency. The functions
-mentioned above load the appropriate instance of :class:`.DocMetaSession`
-depending on the context of the request.
+:class:`.DocMetaSession` encapsulates configuration parameters and a pool of
+connections to the docmeta endpoint(s) for thread-safety and efficiency. The
+functions mentioned above load the appropriate instance of
+:class:`.DocMetaSession` depending on the context of the request; within an
+application context, a single session is shared by each process.
+
+If ``METADATA_CACHE_SIZE`` is set, metadata are also cached (see
+:mod:`search.services.docmeta_cache`), so that the same paper need not be
+retrieved from the docmeta service again and again.
 """
 
-from typing import Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
+import codecs
 import os
+import re
+import time
+import threading
 from urllib.parse import urljoin
 import json
 from itertools import cycle
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 
 import requests
@@ -25,6 +35,8 @@ from arxiv import status
 from search.context import get_application_config, get_application_global
 from arxiv.base import logging
 from search.domain import DocMeta
+from .docmeta_cache import DocMetaCache
+from .docmeta_store import DocMetaStore
 
 
 logger = logging.getLogger(__name__)
@@ -34,6 +46,10 @@ class RequestFailed(IOError):
     """The metadata endpoint returned an unexpected status code."""
 
 
+class ServerError(RequestFailed):
+    """The metadata endpoint returned a 5xx status code."""
+
+
 class ConnectionFailed(IOError):
     """Could not connect to the metadata service."""
 
@@ -46,10 +62,113 @@ class BadResponse(IOError):
     """The response from the metadata service was malformed."""
 
 
+BULK_PATH = '/docmeta_bulk?'
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+_VERSIONED = re.compile(r'^(?P<paper_id>.+?)(?:v(?P<version>\d+))?$')
+
+
+class Endpoint(object):
+    """A metadata endpoint, and its recent health."""
+
+    def __init__(self, url: str) -> None:
+        """Initialize as healthy."""
+        if not url.endswith('/'):
+            url += '/'
+        self.url = url
+        self.failures = 0
+        self.down_until = 0.
+
+    @property
+    def healthy(self) -> bool:
+        """Indicate whether requests should be sent to this endpoint."""
+        return self.down_until <= time.time()
+
+
+def _iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """
+    Parse the elements of a JSON array incrementally.
+
+    Parameters
+    ----------
+    chunks : iterable
+        UTF-8 encoded chunks of a JSON document, the top level of which is an
+        array. Chunk boundaries may fall anywhere.
+
+    Returns
+    -------
+    iterator
+        Yields each element of the array as soon as it has been read.
+
+    Raises
+    ------
+    :class:`json.decoder.JSONDecodeError`
+        Raised if the document is not a well-formed JSON array.
+
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buffer, pos = '', 0
+    exhausted = False
+    state = 'start'     # Or 'first', 'value', 'delimiter'.
+
+    while True:
+        pos = _WHITESPACE.match(buffer, pos).end()  # type: ignore
+        incomplete = pos == len(buffer)
+        if not incomplete:
+            char = buffer[pos]
+            if state == 'start':
+                if char != '[':
+                    raise json.decoder.JSONDecodeError('Expected an array',
+                                                       buffer, pos)
+                pos += 1
+                state = 'first'
+            elif state in ('first', 'delimiter') and char == ']':
+                return
+            elif state == 'delimiter':
+                if char != ',':
+                    raise json.decoder.JSONDecodeError("Expected ',' or ']'",
+                                                       buffer, pos)
+                pos += 1
+                state = 'value'
+            else:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.decoder.JSONDecodeError:
+                    if exhausted:
+                        raise
+                    end = len(buffer)
+                # A value that runs to the end of the buffer may be truncated
+                # (e.g. a number), so it is only accepted once there is more.
+                incomplete = end == len(buffer) and not exhausted
+                if not incomplete:
+                    yield value
+                    pos = end
+                    state = 'delimiter'
+
+        if incomplete:
+            if exhausted:
+                raise json.decoder.JSONDecodeError('Unterminated array',
+                                                   buffer, pos)
+            chunk = next(chunks, None)
+            exhausted = chunk is None
+            buffer = buffer[pos:] + utf8.decode(chunk or b'', exhausted)
+            pos = 0
+
+
 class DocMetaSession(object):
     """An HTTP session with the docmeta endpoint."""
 
-    def __init__(self, *endpoints: str, verify_cert: bool = True) -> None:
+    CHUNK_SIZE = 64 * 1024
+    """Number of bytes to read from a streaming response at a time."""
+
+    def __init__(self, *endpoints: str, verify_cert: bool = True,
+                 pool_size: int = 10, timeout: float = 10.,
+                 keep_alive: bool = True, cooldown: float = 30.,
+                 max_url_length: int = 4_000, max_workers: int = 4,
+                 cache: Optional[DocMetaCache] = None) -> None:
         """
         Initialize an HTTP session.
 
@@ -61,31 +180,133 @@ class DocMetaSession(object):
             endpoints for each call.
         verify_cert : bool
             Whether or not SSL certificate verification should enforced.
+        pool_size : int
+            Maximum number of pooled connections to keep open to each
+            endpoint.
+        timeout : float
+            Timeout (in seconds) for connecting to, and reading from, an
+            endpoint.
+        keep_alive : bool
+            If ``False``, connections are closed after each request.
+        cooldown : float
+            Base number of seconds for which an endpoint that fails is
+            skipped; this doubles with each consecutive failure.
+        max_url_length : int
+            Maximum length of the path and query of a bulk request; longer
+            lists of IDs are split across several requests.
+        max_workers : int
+            Maximum number of bulk requests to make concurrently.
+        cache : :class:`.DocMetaCache`
+            If provided, metadata are looked up in this cache before they are
+            requested, and are added to it once they have been retrieved.
 
         """
         self._session = requests.Session()
         self._verify_cert = verify_cert
+        self._timeout = timeout
+        self._cooldown = cooldown
+        # With more than one endpoint, a request that fails is better sent to
+        # the next endpoint (see ``_failed``) than retried against this one.
+        retries = 10 if len(endpoints) < 2 else 1
         self._retry = Retry(  # type: ignore
-            total=10,
-            read=10,
-            connect=10,
-            status=10,
+            total=retries,
+            read=retries,
+            connect=retries,
+            status=retries,
             backoff_factor=0.5
         )
-        self._adapter = requests.adapters.HTTPAdapter(max_retries=self._retry)
+        self._adapter = requests.adapters.HTTPAdapter(
+            max_retries=self._retry,
+            pool_connections=pool_size,
+            pool_maxsize=pool_size
+        )
         self._session.mount('https://', self._adapter)
+        self._session.mount('http://', self._adapter)
+        if not keep_alive:
+            self._session.headers['Connection'] = 'close'
 
-        for endpoint in endpoints:
-            if not endpoint[-1] == '/':
-                endpoint += '/'
+        self.endpoints = [Endpoint(endpoint) for endpoint in endpoints]
         logger.debug(f'New DocMeta session with endpoints {endpoints}')
-        self._endpoints = cycle(endpoints)
+        self._endpoints = cycle(self.endpoints)
+        self._lock = threading.Lock()
+        self._max_url_length = max_url_length
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.cache = cache
+
+    def _next_endpoint(self) -> Endpoint:
+        """Get the next healthy endpoint, or the next endpoint if none are."""
+        with self._lock:
+            for _ in range(len(self.endpoints)):
+                endpoint = next(self._endpoints)
+                if endpoint.healthy:
+                    return endpoint
+            return next(self._endpoints)
+
+    def _succeeded(self, endpoint: Endpoint) -> None:
+        with self._lock:
+            endpoint.failures = 0
+            endpoint.down_until = 0.
+
+    def _failed(self, endpoint: Endpoint) -> None:
+        with self._lock:
+            endpoint.failures += 1
+            cooldown = self._cooldown * 2 ** min(endpoint.failures - 1, 5)
+            endpoint.down_until = time.time() + cooldown
+        logger.warning(f'{endpoint.url} failed {endpoint.failures} time(s);'
+                       f' skipping for {cooldown}s')
 
     @property
     def endpoint(self) -> str:
         """Get a metadata endpoint."""
         logger.debug('get next endpoint')
-        return self._endpoints.__next__()
+        return self._next_endpoint().url
+
+    def _get(self, endpoint: Endpoint, path: str, stream: bool = False) \
+            -> requests.Response:
+        """
+        Make a GET request to ``path`` on ``endpoint``, and track its health.
+
+        If ``stream`` is ``True``, the body of a successful response is not
+        read until it is accessed.
+
+        Raises
+        ------
+        :class:`.SecurityException`
+        :class:`.ConnectionFailed`
+        :class:`.RequestFailed`
+
+        """
+        target = urljoin(endpoint.url, path)
+        logger.debug(f'retrieve metadata from {target} with SSL verify'
+                     f' {self._verify_cert}')
+        try:
+            response = self._session.get(target, verify=self._verify_cert,
+                                         timeout=self._timeout, stream=stream)
+        except requests.exceptions.SSLError as e:
+            logger.error('SSLError: %s', e)
+            self._failed(endpoint)
+            raise SecurityException('SSL failed: %s' % e) from e
+        except (requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout) as e:
+            logger.error('ConnectionError: %s', e)
+            self._failed(endpoint)
+            raise ConnectionFailed(
+                'Could not connect to metadata service: %s' % e
+            ) from e
+
+        if response.status_code not in \
+                [status.HTTP_200_OK, status.HTTP_206_PARTIAL_CONTENT]:
+            logger.error('Request failed: %s', response.content)
+            message = '%s: failed with %i: %s' % (
+                path, response.status_code, response.content
+            )
+            if response.status_code >= 500:
+                self._failed(endpoint)
+                raise ServerError(message)
+            raise RequestFailed(message)
+        self._succeeded(endpoint)
+        return response
 
     def retrieve(self, document_id: str) -> DocMeta:
         """
@@ -107,46 +328,63 @@ class DocMetaSession(object):
         if not document_id:    # This could use further elaboration.
             raise ValueError('Invalid value for document_id')
 
-        try:
-            target = urljoin(self.endpoint, '/docmeta/')
-            target = urljoin(target, document_id)
-            logger.debug(
-                f'{document_id}: retrieve metadata from {target} with SSL'
-                f' verify {self._verify_cert}'
-            )
-            response = requests.get(target, verify=self._verify_cert)
-        except requests.exceptions.SSLError as e:
-            logger.error('SSLError: %s', e)
-            raise SecurityException('SSL failed: %s' % e) from e
-        except requests.exceptions.ConnectionError as e:
-            logger.error('ConnectionError: %s', e)
-            raise ConnectionFailed(
-                'Could not connect to metadata service: %s' % e
-            ) from e
+        if self.cache is not None:
+            match = _VERSIONED.match(document_id)
+            version = match.group('version')    # type: ignore
+            cached = self.cache.get(match.group('paper_id'),  # type: ignore
+                                    int(version) if version else None)
+            if cached is not None:
+                logger.debug(f'{document_id}: found in cache')
+                return cached
 
-        if response.status_code not in \
-                [status.HTTP_200_OK, status.HTTP_206_PARTIAL_CONTENT]:
-            logger.error('Request failed: %s', response.content)
-            raise RequestFailed(
-                '%s: failed with %i: %s' % (
-                    document_id, response.status_code, response.content
-                )
-            )
+        response = self._get(self._next_endpoint(), f'/docmeta/{document_id}')
         logger.debug(f'{document_id}: response OK')
         try:
-            data = DocMeta(**response.json())   # type: ignore
-            # See https://github.com/python/mypy/issues/3937
+            data = DocMeta.from_dict(response.json())
         except json.decoder.JSONDecodeError as e:
             logger.error('JSONDecodeError: %s', e)
             raise BadResponse(
                 '%s: could not decode response: %s' % (document_id, e)
             ) from e
         logger.debug(f'{document_id}: response decoded; done!')
+        if self.cache is not None:
+            self.cache.put([data])
         return data
 
+    def invalidate(self, document_ids: Iterable[str],
+                   before: Optional[float] = None) -> None:
+        """
+        Discard any cached metadata for some papers, e.g. after an update.
+
+        The metadata for all versions of each paper are discarded, so that
+        they are retrieved from the docmeta service next time.
+
+        Parameters
+        ----------
+        document_ids : iterable
+            arXiv identifiers, with or without a version affix.
+        before : float
+            If provided (in seconds since the epoch), e.g. the time at which
+            the update was announced, metadata that were retrieved since then
+            are kept.
+
+        """
+        if self.cache is None:
+            return
+        self.cache.invalidate(
+            (_VERSIONED.match(document_id).group('paper_id')  # type: ignore
+             for document_id in document_ids),
+            before=before
+        )
+
     def bulk_retrieve(self, document_ids: List[str]) -> List[DocMeta]:
         """
-        Retrieve metadata for an arXiv paper.
+        Retrieve metadata for many arXiv papers.
+
+        Long lists of IDs are split into batches that fit within the maximum
+        URL length, and the batches are retrieved concurrently from all of the
+        configured endpoints. Metadata are returned in the order of
+        ``document_ids``.
 
         Parameters
         ----------
@@ -163,47 +401,153 @@ class DocMetaSession(object):
         """
         if not document_ids:    # This could use further elaboration.
             raise ValueError('Invalid value for document_ids')
+        if self.cache is None:
+            return self._retrieve_batches(document_ids)
+
+        cached = self.cache.get_many(document_ids)
+        missing = [doc_id for doc_id in document_ids if doc_id not in cached]
+        logger.debug(f'{len(document_ids) - len(missing)} papers found in'
+                     f' cache; {len(missing)} to retrieve')
+        retrieved: Dict[str, List[DocMeta]] = {}
+        if missing:
+            fetched = self._retrieve_batches(missing)
+            self.cache.put(fetched)
+            for meta in fetched:
+                retrieved.setdefault(meta.paper_id, []).append(meta)
+        data: List[DocMeta] = []
+        for document_id in document_ids:
+            if document_id in cached:
+                data += cached[document_id]
+            else:
+                match = _VERSIONED.match(document_id)
+                data += retrieved.pop(match.group('paper_id'),  # type: ignore
+                                      [])
+        for versions in retrieved.values():     # Anything we did not ask for.
+            data += versions
+        return data
+
+    def _retrieve_batches(self, document_ids: List[str]) -> List[DocMeta]:
+        batches = self._split(document_ids)
+        if len(batches) == 1:
+            return self._bulk_retrieve(batches[0])
+        # Results are returned in the order of the batches, and so of the IDs.
+        data: List[DocMeta] = []
+        for batch_data in self._get_executor().map(self._bulk_retrieve,
+                                                   batches):
+            data += batch_data
+        return data
 
-        query_string = '/docmeta_bulk?' + '&'.join(
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers
+                )
+            return self._executor
+
+    def _split(self, document_ids: List[str]) -> List[List[str]]:
+        """Split IDs into batches that fit in a ``docmeta_bulk`` URL."""
+        batches: List[List[str]] = [[]]
+        length = len(BULK_PATH)
+        for document_id in document_ids:
+            param_length = len(document_id) + 4     # Includes "id=" and "&".
+            if batches[-1] and length + param_length > self._max_url_length:
+                batches.append([])
+                length = len(BULK_PATH)
+            batches[-1].append(document_id)
+            length += param_length
+        return batches
+
+    def _bulk_request(self, document_ids: List[str]) -> requests.Response:
+        """
+        Request metadata for a batch of papers, without reading the body.
+
+        If an endpoint cannot be reached or fails with a 5xx status code, the
+        request is tried again on each of the other (healthy) endpoints.
+        """
+        query_string = BULK_PATH + '&'.join(
             f'id={document_id}' for document_id in document_ids
         )
+        for attempt in range(len(self.endpoints)):
+            endpoint = self._next_endpoint()
+            try:
+                response = self._get(endpoint, query_string, stream=True)
+                break
+            except (ConnectionFailed, ServerError) as e:
+                if attempt == len(self.endpoints) - 1:
+                    raise
+                logger.warning(f'{endpoint.url} failed ({e}); trying again')
+        logger.debug(f'{document_ids}: response OK')
+        return response
 
-        try:
-            target = urljoin(self.endpoint, query_string)
-            logger.debug(
-                f'{document_ids}: retrieve metadata from {target} with SSL'
-                f' verify {self._verify_cert}'
-            )
-            response = self._session.get(target, verify=self._verify_cert)
-        except requests.exceptions.SSLError as e:
-            logger.error('SSLError: %s', e)
-            raise SecurityException('SSL failed: %s' % e) from e
-        except requests.exceptions.ConnectionError as e:
-            logger.error('ConnectionError: %s', e)
-            raise ConnectionFailed(
-                'Could not connect to metadata service: %s' % e
-            ) from e
+    def _decode(self, document_ids: List[str],
+                response: requests.Response) -> Iterator[DocMeta]:
+        """
+        Decode :class:`.DocMeta` from a bulk response, as it is read.
 
-        if response.status_code not in \
-                [status.HTTP_200_OK, status.HTTP_206_PARTIAL_CONTENT]:
-            logger.error('Request failed: %s', response.content)
-            raise RequestFailed(
-                '%s: failed with %i: %s' % (
-                    document_ids, response.status_code, response.content
-                )
-            )
-        logger.debug(f'{document_ids}: response OK')
+        The response is a JSON array with metadata for each version of each
+        paper. Rather than holding the whole body, the parsed array, and the
+        resulting :class:`.DocMeta` in memory at once, each element is
+        decoded as soon as it has been read.
+        """
+        chunks = response.iter_content(chunk_size=self.CHUNK_SIZE)
         try:
-            resp = response.json()  # A list with metadata for each paper.
-            data: List[DocMeta]
-            data = [DocMeta(**value) for value in resp]     # type: ignore
+            for value in _iter_json_array(chunks):
+                yield DocMeta.from_dict(value)
         except json.decoder.JSONDecodeError as e:
             logger.error('JSONDecodeError: %s', e)
             raise BadResponse(
                 '%s: could not decode response: %s' % (document_ids, e)
             ) from e
+        except requests.exceptions.RequestException as e:
+            logger.error('Failed while reading response: %s', e)
+            raise ConnectionFailed(
+                'Could not read response from metadata service: %s' % e
+            ) from e
+        finally:
+            response.close()
         logger.debug(f'{document_ids}: response decoded; done!')
-        return data
+
+    def _bulk_retrieve(self, document_ids: List[str]) -> List[DocMeta]:
+        """Retrieve metadata for a batch of papers with a single request."""
+        return list(self._decode(document_ids,
+                                 self._bulk_request(document_ids)))
+
+    def iter_bulk_retrieve(self, document_ids: List[str]) \
+            -> Iterator[DocMeta]:
+        """
+        Retrieve metadata for many arXiv papers, lazily.
+
+        Like :meth:`.bulk_retrieve`, but batches are requested one at a time,
+        and :class:`.DocMeta` are yielded as the response is read. Peak memory
+        use is therefore bounded by the size of a batch, rather than by the
+        number of papers. If there is a cache, the cached metadata for each
+        batch are yielded before the rest of the batch is requested.
+
+        Raises
+        ------
+        IOError
+        ValueError
+        """
+        if not document_ids:    # This could use further elaboration.
+            raise ValueError('Invalid value for document_ids')
+        if self.cache is None:
+            for batch in self._split(document_ids):
+                yield from self._decode(batch, self._bulk_request(batch))
+            return
+
+        for batch in self._split(document_ids):
+            cached = self.cache.get_many(batch)
+            for versions in cached.values():
+                yield from versions
+            missing = [doc_id for doc_id in batch if doc_id not in cached]
+            if not missing:
+                continue
+            fetched: List[DocMeta] = []
+            for docmeta in self._decode(missing, self._bulk_request(missing)):
+                fetched.append(docmeta)
+                yield docmeta
+            self.cache.put(fetched)
 
 
 def init_app(app: object = None) -> None:
@@ -211,26 +555,98 @@ def init_app(app: object = None) -> None:
     config = get_application_config(app)
     config.setdefault('METADATA_ENDPOINT', 'https://arxiv.org/')
     config.setdefault('METADATA_VERIFY_CERT', 'True')
+    config.setdefault('METADATA_POOL_SIZE', '10')
+    config.setdefault('METADATA_TIMEOUT', '10')
+    config.setdefault('METADATA_KEEPALIVE', 'true')
+    config.setdefault('METADATA_ENDPOINT_COOLDOWN', '30')
+    config.setdefault('METADATA_MAX_URL_LENGTH', '4000')
+    config.setdefault('METADATA_BULK_WORKERS', '4')
+    config.setdefault('METADATA_CACHE_SIZE', '0')
+    config.setdefault('METADATA_CACHE_TTL', '300')
+
+
+def _get_session_params(app: object = None) -> Dict[str, Any]:
+    """Get the parameters for a :class:`.DocMetaSession` from config."""
+    config = get_application_config(app)
+    ttl = config.get('METADATA_CACHE_TTL', '300')
+    return dict(
+        endpoints=tuple(
+            config.get('METADATA_ENDPOINT', 'https://arxiv.org/').split(',')
+        ),
+        verify_cert=bool(eval(config.get('METADATA_VERIFY_CERT', 'True'))),
+        pool_size=int(config.get('METADATA_POOL_SIZE', '10')),
+        timeout=float(config.get('METADATA_TIMEOUT', '10')),
+        keep_alive=config.get('METADATA_KEEPALIVE', 'true') == 'true',
+        cooldown=float(config.get('METADATA_ENDPOINT_COOLDOWN', '30')),
+        max_url_length=int(config.get('METADATA_MAX_URL_LENGTH', '4000')),
+        max_workers=int(config.get('METADATA_BULK_WORKERS', '4')),
+        cache_size=int(config.get('METADATA_CACHE_SIZE', '0')),
+        cache_ttl=float(ttl) if ttl else None,
+        cache_dir=config.get('METADATA_CACHE_DIR') or None
+    )
 
 
 def get_session(app: object = None) -> DocMetaSession:
     """Get a new session with the docmeta endpoint."""
-    config = get_application_config(app)
-    endpoint = config.get('METADATA_ENDPOINT', 'https://arxiv.org/')
-    verify_cert = bool(eval(config.get('METADATA_VERIFY_CERT', 'True')))
-    if ',' in endpoint:
-        return DocMetaSession(*(endpoint.split(',')), verify_cert=verify_cert)
-    return DocMetaSession(endpoint, verify_cert=verify_cert)
+    params = _get_session_params(app)
+    endpoints = params.pop('endpoints')
+    cache_size = params.pop('cache_size')
+    cache_ttl = params.pop('cache_ttl')
+    cache_dir = params.pop('cache_dir')
+    if cache_size > 0:
+        store = DocMetaStore(cache_dir) if cache_dir else None
+        params['cache'] = DocMetaCache(
+            maxsize=cache_size,
+            ttl=cache_ttl,
+            store=store
+        )
+    return DocMetaSession(*endpoints, **params)
+
+
+_sessions: Dict[Tuple, DocMetaSession] = {}
+"""Shared sessions, keyed on process ID and connection parameters."""
+
+_sessions_lock = threading.Lock()
+
+
+def _get_shared_session(app: object = None) -> DocMetaSession:
+    """
+    Get/create a :class:`.DocMetaSession` that is shared within this process.
+
+    Sharing a session means that connections (and TLS sessions) to the
+    docmeta endpoints are pooled and reused across requests, and that the
+    health of each endpoint is tracked across requests.
+    """
+    params = _get_session_params(app)
+    key = (os.getpid(),) + tuple(sorted(params.items()))
+    session = _sessions.get(key)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(key)    # Another thread may have won.
+            if session is None:
+                session = get_session(app)
+                _sessions[key] = session
+    return session
+
+
+def clear_sessions() -> None:
+    """Discard all of the shared sessions in this process."""
+    with _sessions_lock:
+        _sessions.clear()
 
 
 def current_session() -> DocMetaSession:
-    """Get/create :class:`.DocMetaSession` for this context."""
+    """
+    Get/create :class:`.DocMetaSession` for this context.
+
+    Within an application context, the session is shared with other requests
+    (and threads) in this process. Outside of an application context, a new
+    session is created.
+    """
     g = get_application_global()
     if not g:
         return get_session()
-    elif 'docmeta' not in g:
-        g.docmeta = get_session()   # type: ignore
-    return g.docmeta    # type: ignore
+    return _get_shared_session()
 
 
 @wraps(DocMetaSession.retrieve)
@@ -239,7 +655,20 @@ def retrieve(document_id: str) -> DocMeta:
     return current_session().retrieve(document_id)
 
 
+@wraps(DocMetaSession.invalidate)
+def invalidate(document_ids: Iterable[str],
+               before: Optional[float] = None) -> None:
+    """Discard any cached metadata for some papers."""
+    current_session().invalidate(document_ids, before=before)
+
+
 @wraps(DocMetaSession.bulk_retrieve)
 def bulk_retrieve(document_ids: List[str]) -> List[DocMeta]:
     """Retrieve an arxiv document by id."""
     return current_session().bulk_retrieve(document_ids)
+
+
+@wraps(DocMetaSession.iter_bulk_retrieve)
+def iter_bulk_retrieve(document_ids: List[str]) -> Iterator[DocMeta]:
+    """Retrieve arxiv documents by id, lazily."""
+    return current_session().iter_bulk_retrieve(document_ids)
@@ -0,0 +1,116 @@
+"""Tests for :mod:`search.services.docmeta_cache`."""
+
+import tempfile
+import time
+from unittest import TestCase, mock
+
+from search.domain import DocMeta
+from search.services.docmeta_cache import DocMetaCache
+from search.services.docmeta_store import DocMetaStore
+
+
+def _docmeta(version, latest_version=2, **kwargs):
+    return DocMeta(paper_id='1234.56789', version=version,
+                   latest_version=latest_version, **kwargs)
+
+
+class TestDocMetaCache(TestCase):
+    """Tests for :class:`.DocMetaCache`."""
+
+    def setUp(self):
+        """Create a cache with an on-disk tier."""
+        self.store = DocMetaStore(tempfile.mkdtemp())
+        self.cache = DocMetaCache(maxsize=10, ttl=300, store=self.store)
+
+    def tearDown(self):
+        """Close the on-disk tier."""
+        self.store.close()
+
+    def test_get_version(self):
+        """Metadata are retrieved by paper ID and version."""
+        self.cache.put([_docmeta(1), _docmeta(2)])
+        self.assertEqual(self.cache.get('1234.56789', 1).version, 1)
+        self.assertEqual(self.cache.get('1234.56789').version, 2,
+                         "Latest version is returned by default")
+        self.assertIsNone(self.cache.get('1234.56790'))
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 1))
+
+    def test_get_many(self):
+        """Papers are only returned if all versions are cached."""
+        self.cache.put([_docmeta(2)])
+        self.assertEqual(self.cache.get_many(['1234.56789']), {})
+        self.assertNotIn('1234.56789', self.store)
+        self.cache.put([_docmeta(1)])
+        found = self.cache.get_many(['1234.56789'])
+        self.assertEqual([dm.version for dm in found['1234.56789']], [1, 2])
+        self.assertIn('1234.56789', self.store,
+                      "Complete set of versions is written to disk")
+
+    def test_read_through_disk(self):
+        """Metadata evicted from memory are read back from disk."""
+        self.cache.put([_docmeta(1), _docmeta(2)])
+        cache = DocMetaCache(maxsize=10, ttl=300, store=self.store)
+        self.assertEqual(cache.get('1234.56789', 1).version, 1)
+        self.assertEqual(len(cache.get_many(['1234.56789'])['1234.56789']), 2)
+
+    def test_expired(self):
+        """Metadata are not used after the TTL has elapsed."""
+        self.cache.put([_docmeta(1), _docmeta(2)])
+        with mock.patch('search.services.docmeta_cache.time.time') as now:
+            with mock.patch('search.services.docmeta_store.time.time') as t:
+                now.return_value = t.return_value = 2e10
+                self.assertIsNone(self.cache.get('1234.56789'))
+                self.assertEqual(self.cache.get_many(['1234.56789']), {})
+
+    def test_older_metadata_ignored(self):
+        """Metadata are not replaced by metadata that were modified earlier."""
+        newer = _docmeta(1, 1, title='new',
+                         modified_date='2018-02-02T00:00:00-0500')
+        older = _docmeta(1, 1, title='old',
+                         modified_date='2018-01-01T00:00:00-0500')
+        self.cache.put([newer])
+        self.cache.put([older])
+        self.assertEqual(self.cache.get('1234.56789').title, 'new')
+
+    def test_new_version(self):
+        """Earlier versions are discarded when a new version is seen."""
+        self.cache.put([_docmeta(1, 1)])
+        self.cache.put([_docmeta(2, 2)])
+        self.assertIsNone(self.cache.get('1234.56789', 1))
+        self.assertEqual(self.cache.get('1234.56789').version, 2)
+
+    def test_lru(self):
+        """Least recently used papers are evicted from memory."""
+        cache = DocMetaCache(maxsize=2)
+        cache.put([DocMeta(paper_id='1234.00001')])
+        cache.put([DocMeta(paper_id='1234.00002')])
+        cache.get('1234.00001')
+        cache.put([DocMeta(paper_id='1234.00003')])
+        self.assertIsNotNone(cache.get('1234.00001'))
+        self.assertIsNone(cache.get('1234.00002'))
+
+    def test_invalidate(self):
+        """Invalidated papers are removed from both tiers."""
+        self.cache.put([_docmeta(1), _docmeta(2)])
+        self.cache.invalidate(['1234.56789'])
+        self.assertIsNone(self.cache.get('1234.56789'))
+        self.assertNotIn('1234.56789', self.store)
+
+    def test_invalidate_before(self):
+        """Only papers that were cached before a given time are invalidated."""
+        self.cache.put([_docmeta(1), _docmeta(2)])
+        self.cache.invalidate(['1234.56789'], before=time.time() - 60)
+        self.assertIsNotNone(self.cache.get('1234.56789'))
+        self.assertIn('1234.56789', self.store)
+        self.cache.invalidate(['1234.56789'], before=time.time() + 60)
+        self.assertIsNone(self.cache.get('1234.56789'))
+        self.assertNotIn('1234.56789', self.store)
+
+    def test_invalidate_loaded_before(self):
+        """Papers loaded from disk keep the time at which they were stored."""
+        self.cache.put([_docmeta(1), _docmeta(2)])
+        cache = DocMetaCache(maxsize=10, ttl=300, store=self.store)
+        with mock.patch('time.time', return_value=time.time() + 60):
+            self.assertIsNotNone(cache.get('1234.56789'))
+        cache.invalidate(['1234.56789'], before=time.time() + 30)
+        self.assertIsNone(cache.get('1234.56789'))
@@ -0,0 +1,100 @@
+"""Tests for :mod:`search.services.docmeta_store`."""
+
+import json
+import os
+import tempfile
+from unittest import TestCase, mock
+
+from search.domain import DocMeta, asdict
+from search.services.docmeta_store import DocMetaStore
+
+
+class TestDocMetaStore(TestCase):
+    """Tests for :class:`.DocMetaStore`."""
+
+    def setUp(self):
+        """Open a store in a temporary directory."""
+        self.cache_dir = tempfile.mkdtemp()
+        self.store = DocMetaStore(self.cache_dir)
+        self.docmeta = [
+            DocMeta(paper_id='1234.56789', version=1, title='foo'),
+            DocMeta(paper_id='1234.56789', version=2, title='foo!')
+        ]
+
+    def tearDown(self):
+        """Close the store."""
+        self.store.close()
+
+    def test_put_get(self):
+        """Metadata for all versions of a paper are stored together."""
+        self.store.put('1234.56789', self.docmeta)
+        self.assertIn('1234.56789', self.store)
+        self.assertEqual(self.store.get('1234.56789'), self.docmeta)
+        self.assertTrue(os.path.exists(os.path.join(self.cache_dir,
+                                                    'docmeta.db')))
+
+    def test_get_missing(self):
+        """A KeyError is raised for a paper that is not in the store."""
+        self.assertNotIn('1234.56789', self.store)
+        with self.assertRaises(KeyError):
+            self.store.get('1234.56789')
+
+    def test_get_many(self):
+        """Papers not in the store are omitted from a batch lookup."""
+        self.store.put_many({
+            f'1234.{i:05d}': [DocMeta(paper_id=f'1234.{i:05d}')]
+            for i in range(1_200)
+        })
+        ids = [f'1234.{i:05d}' for i in range(1_000, 1_300)]
+        found = self.store.get_many(ids)
+        self.assertEqual(len(found), 200)
+        self.assertEqual(found['1234.01000'][0].paper_id, '1234.01000')
+        self.assertEqual(len(self.store), 1_200)
+
+    def test_delete_before(self):
+        """Only papers stored before a given time are deleted."""
+        self.store.put('1234.56789', self.docmeta)
+        _, stored = self.store.get_many_stored(['1234.56789'])['1234.56789']
+        self.store.delete(['1234.56789'], before=stored)
+        self.assertIn('1234.56789', self.store)
+        self.store.delete(['1234.56789'], before=stored + 1)
+        self.assertNotIn('1234.56789', self.store)
+
+    def test_put_replaces(self):
+        """Adding a paper again replaces its metadata."""
+        self.store.put('1234.56789', self.docmeta[:1])
+        self.store.put('1234.56789', self.docmeta)
+        self.assertEqual(len(self.store.get('1234.56789')), 2)
+        self.store.compact()
+        self.assertEqual(len(self.store), 1)
+
+    def test_preload(self):
+        """Preloaded records are served from memory."""
+        self.store.put('1234.56789', self.docmeta)
+        self.assertEqual(self.store.preload(), 1)
+        self.store._conn.execute('DELETE FROM docmeta')
+        self.assertEqual(self.store.get('1234.56789'), self.docmeta)
+
+    def test_import_json_dir(self):
+        """Caches with one JSON file per paper can be imported."""
+        with open(os.path.join(self.cache_dir, 'hep-th_9901001.json'),
+                  'w') as f:
+            json.dump([asdict(DocMeta(paper_id='hep-th/9901001'))], f)
+        self.assertEqual(self.store.import_json_dir(self.cache_dir), 1)
+        self.assertEqual(self.store.get('hep-th/9901001')[0].paper_id,
+                         'hep-th/9901001')
+
+    def test_import_json_dir_in_batches(self):
+        """Files are imported one batch at a time."""
+        for i in range(5):
+            with open(os.path.join(self.cache_dir, f'1234.0000{i}.json'),
+                      'w') as f:
+                json.dump([asdict(DocMeta(paper_id=f'1234.0000{i}'))], f)
+        with mock.patch.object(self.store, 'put_many',
+                               wraps=self.store.put_many) as put_many:
+            self.assertEqual(
+                self.store.import_json_dir(self.cache_dir, batch_size=2), 5
+            )
+        self.assertEqual([len(call[0][0]) for call in put_many.call_args_list],
+                         [2, 2, 1])
+        self.assertEqual(len(self.store), 5)
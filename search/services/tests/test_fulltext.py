@@ -8,7 +8,7 @@ from search.services import fulltext
 class TestRetrieveExistantContent(unittest.TestCase):
     """Fulltext content is available for a paper."""
 
-    @mock.patch('search.services.fulltext.requests.get')
+    @mock.patch('search.services.fulltext.requests.Session.get')
     def test_calls_fulltext_endpoint(self, mock_get):
         """:func:`.fulltext.retrieve` calls passed endpoint with GET."""
         base = 'https://asdf.com/'
@@ -35,7 +35,7 @@ class TestRetrieveExistantContent(unittest.TestCase):
 class TestRetrieveNonexistantRecord(unittest.TestCase):
     """Fulltext content is not available for a paper."""
 
-    @mock.patch('search.services.fulltext.requests.get')
+    @mock.patch('search.services.fulltext.requests.Session.get')
     def test_raise_ioerror_on_404(self, mock_get):
         """:func:`.fulltext.retrieve` raises IOError when text unvailable."""
         response = mock.MagicMock()
@@ -45,7 +45,7 @@ class TestRetrieveNonexistantRecord(unittest.TestCase):
         with self.assertRaises(IOError):
             fulltext.retrieve('1234.5678v3')
 
-    @mock.patch('search.services.fulltext.requests.get')
+    @mock.patch('search.services.fulltext.requests.Session.get')
     def test_raise_ioerror_on_503(self, mock_get):
         """:func:`.fulltext.retrieve` raises IOError when text unvailable."""
         response = mock.MagicMock()
@@ -55,7 +55,7 @@ class TestRetrieveNonexistantRecord(unittest.TestCase):
         with self.assertRaises(IOError):
             fulltext.retrieve('1234.5678v3')
 
-    @mock.patch('search.services.fulltext.requests.get')
+    @mock.patch('search.services.fulltext.requests.Session.get')
     def test_raise_ioerror_on_sslerror(self, mock_get):
         """:func:`.fulltext.retrieve` raises IOError when SSL fails."""
         from requests.exceptions import SSLError
@@ -72,7 +72,7 @@ class TestRetrieveNonexistantRecord(unittest.TestCase):
 class TestRetrieveMalformedRecord(unittest.TestCase):
     """Fulltext endpoint returns non-JSON response."""
 
-    @mock.patch('search.services.fulltext.requests.get')
+    @mock.patch('search.services.fulltext.requests.Session.get')
     def test_response_is_not_json(self, mock_get):
         """:func:`.fulltext.retrieve` raises IOError when not valid JSON."""
         from json.decoder import JSONDecodeError
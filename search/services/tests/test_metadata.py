@@ -7,13 +7,14 @@ import os
 from itertools import cycle
 
 from search.services import metadata
+from search.services.docmeta_cache import DocMetaCache
 from search.factory import create_ui_web_app
 
 
 class TestRetrieveExistantMetadata(unittest.TestCase):
     """Metadata is available for a paper."""
 
-    @mock.patch('search.services.metadata.requests.get')
+    @mock.patch('search.services.metadata.requests.Session.get')
     def test_calls_metadata_endpoint(self, mock_get):
         """:func:`.metadata.retrieve` calls passed endpoint with GET."""
         base = 'https://asdf.com/'
@@ -43,7 +44,19 @@ class TestRetrieveExistantMetadata(unittest.TestCase):
 
         self.assertTrue(args[0].startswith(base))
 
-    @mock.patch('search.services.metadata.requests.get')
+    @mock.patch('search.services.metadata.requests.Session.get')
+    def test_unknown_fields(self, mock_get):
+        """Fields that :class:`.DocMeta` does not know about are ignored."""
+        response = mock.MagicMock(status_code=200)
+        response.json.return_value = {'paper_id': '1602.00123',
+                                      'some_new_field': 'foo'}
+        mock_get.return_value = response
+        docmeta_session = metadata.DocMetaSession('https://asdf.com/')
+        docmeta = docmeta_session.retrieve('1602.00123')
+        self.assertEqual(docmeta.paper_id, '1602.00123')
+        self.assertFalse(hasattr(docmeta, 'some_new_field'))
+
+    @mock.patch('search.services.metadata.requests.Session.get')
     def test_calls_metadata_endpoint_roundrobin(self, mock_get):
         """:func:`.metadata.retrieve` calls passed endpoint with GET."""
         base = ['https://asdf.com/', 'https://asdf2.com/']
@@ -90,7 +103,7 @@ class TestRetrieveExistantMetadata(unittest.TestCase):
 class TestRetrieveNonexistantRecord(unittest.TestCase):
     """Metadata is not available for a paper."""
 
-    @mock.patch('search.services.metadata.requests.get')
+    @mock.patch('search.services.metadata.requests.Session.get')
     def test_raise_ioerror_on_404(self, mock_get):
         """:func:`.metadata.retrieve` raises IOError when unvailable."""
         response = mock.MagicMock()
@@ -100,7 +113,7 @@ class TestRetrieveNonexistantRecord(unittest.TestCase):
         with self.assertRaises(IOError):
             metadata.retrieve('1234.5678v3')
 
-    @mock.patch('search.services.metadata.requests.get')
+    @mock.patch('search.services.metadata.requests.Session.get')
     def test_raise_ioerror_on_503(self, mock_get):
         """:func:`.metadata.retrieve` raises IOError when unvailable."""
         response = mock.MagicMock()
@@ -110,7 +123,7 @@ class TestRetrieveNonexistantRecord(unittest.TestCase):
         with self.assertRaises(IOError):
             metadata.retrieve('1234.5678v3')
 
-    @mock.patch('search.services.metadata.requests.get')
+    @mock.patch('search.services.metadata.requests.Session.get')
     def test_raise_ioerror_on_sslerror(self, mock_get):
         """:func:`.metadata.retrieve` raises IOError when SSL fails."""
         from requests.exceptions import SSLError
@@ -127,7 +140,7 @@ class TestRetrieveNonexistantRecord(unittest.TestCase):
 class TestRetrieveMalformedRecord(unittest.TestCase):
     """Metadata endpoint returns non-JSON response."""
 
-    @mock.patch('search.services.metadata.requests.get')
+    @mock.patch('search.services.metadata.requests.Session.get')
     def test_response_is_not_json(self, mock_get):
         """:func:`.metadata.retrieve` raises IOError when not valid JSON."""
         from json.decoder import JSONDecodeError
@@ -143,3 +156,197 @@ class TestRetrieveMalformedRecord(unittest.TestCase):
         mock_get.return_value = response
         with self.assertRaises(IOError):
             metadata.retrieve('1234.5678v3')
+
+
+class TestEndpointHealth(unittest.TestCase):
+    """Failing endpoints are skipped."""
+
+    @mock.patch('search.services.metadata.requests.Session.get')
+    def test_failed_endpoint_is_skipped(self, mock_get):
+        """After an endpoint fails, requests go to the other endpoints."""
+        base = ['https://asdf.com/', 'https://asdf2.com/']
+        with open('tests/data/docmeta.json') as f:
+            mock_content = json.load(f)
+
+        def get(target, **kwargs):
+            response = mock.MagicMock()
+            if target.startswith(base[0]):
+                response.status_code = 503
+            else:
+                response.status_code = 200
+                type(response).json = \
+                    mock.MagicMock(return_value=mock_content)
+            return response
+        mock_get.side_effect = get
+
+        docmeta_session = metadata.DocMetaSession(*base)
+        with self.assertRaises(metadata.RequestFailed):
+            docmeta_session.retrieve('1602.00123')
+        self.assertFalse(docmeta_session.endpoints[0].healthy)
+        for _ in range(3):
+            docmeta_session.retrieve('1602.00123')
+            args, kwargs = mock_get.call_args
+            self.assertTrue(args[0].startswith(base[1]))
+            self.assertEqual(kwargs['timeout'], 10.)
+
+    def test_retries(self):
+        """Requests are retried less if there is another endpoint to try."""
+        single = metadata.DocMetaSession('https://asdf.com/')
+        self.assertEqual(single._retry.connect, 10)
+        multiple = metadata.DocMetaSession('https://asdf.com/',
+                                           'https://asdf2.com/')
+        self.assertEqual(multiple._retry.connect, 1)
+        self.assertEqual(multiple._retry.read, 1)
+
+
+class TestSharedSession(unittest.TestCase):
+    """The session is shared within an application context."""
+
+    def test_current_session(self):
+        """The same session is used across app contexts in a process."""
+        app = create_ui_web_app()
+        metadata.clear_sessions()
+        with app.app_context():
+            session = metadata.current_session()
+        with app.app_context():
+            self.assertIs(metadata.current_session(), session)
+
+
+class TestBulkRetrieve(unittest.TestCase):
+    """Bulk requests are split and distributed across endpoints."""
+
+    def setUp(self):
+        """Create a session with two endpoints."""
+        self.base = ['https://asdf.com/', 'https://asdf2.com/']
+        self.docmeta_session = metadata.DocMetaSession(*self.base,
+                                                       max_url_length=50)
+        self.ids = [f'1602.{i:05d}' for i in range(10)]
+
+    @staticmethod
+    def _respond(target, status_code=200):
+        response = mock.MagicMock()
+        response.status_code = status_code
+        ids = [param[3:] for param in target.split('?', 1)[1].split('&')]
+        content = json.dumps([{'paper_id': paper_id} for paper_id in ids])
+        response.iter_content.return_value = [content.encode('utf-8')]
+        return response
+
+    def test_split(self):
+        """IDs are split into batches that fit within the URL length."""
+        batches = self.docmeta_session._split(self.ids)
+        self.assertGreater(len(batches), 1)
+        self.assertEqual([i for batch in batches for i in batch], self.ids)
+        for batch in batches:
+            query = metadata.BULK_PATH + '&'.join(f'id={i}' for i in batch)
+            self.assertLessEqual(len(query), 50)
+
+    @mock.patch('search.services.metadata.requests.Session.get')
+    def test_bulk_retrieve(self, mock_get):
+        """Batches are sent to all endpoints, and merged in input order."""
+        mock_get.side_effect = lambda target, **kwargs: self._respond(target)
+        data = self.docmeta_session.bulk_retrieve(self.ids)
+        self.assertEqual([dm.paper_id for dm in data], self.ids)
+        targets = [args[0] for args, _ in mock_get.call_args_list]
+        self.assertTrue(any(t.startswith(self.base[0]) for t in targets))
+        self.assertTrue(any(t.startswith(self.base[1]) for t in targets))
+
+    @mock.patch('search.services.metadata.requests.Session.get')
+    def test_bulk_retrieve_failover(self, mock_get):
+        """Batches that fail on one endpoint are retried on another."""
+        def get(target, **kwargs):
+            if target.startswith(self.base[0]):
+                return self._respond(target, 502)
+            return self._respond(target)
+        mock_get.side_effect = get
+        data = self.docmeta_session.bulk_retrieve(self.ids)
+        self.assertEqual([dm.paper_id for dm in data], self.ids)
+        self.assertFalse(self.docmeta_session.endpoints[0].healthy)
+
+    @mock.patch('search.services.metadata.requests.Session.get')
+    def test_iter_bulk_retrieve(self, mock_get):
+        """Metadata are yielded as each response is read."""
+        mock_get.side_effect = lambda target, **kwargs: self._respond(target)
+        data = self.docmeta_session.iter_bulk_retrieve(self.ids)
+        self.assertEqual(next(data).paper_id, self.ids[0])
+        self.assertEqual(mock_get.call_count, 1,
+                         "Later batches should not be requested yet")
+        self.assertEqual([dm.paper_id for dm in data], self.ids[1:])
+        _, kwargs = mock_get.call_args
+        self.assertTrue(kwargs['stream'])
+
+    @mock.patch('search.services.metadata.requests.Session.get')
+    def test_malformed_response(self, mock_get):
+        """A truncated response raises :class:`.metadata.BadResponse`."""
+        response = mock.MagicMock()
+        response.status_code = 200
+        response.iter_content.return_value = [b'[{"paper_id": "1602.0']
+        mock_get.return_value = response
+        with self.assertRaises(metadata.BadResponse):
+            self.docmeta_session.bulk_retrieve(self.ids[:1])
+        response.close.assert_called_once()
+
+
+class TestCachedRetrieve(unittest.TestCase):
+    """Metadata are looked up in the cache before they are requested."""
+
+    def setUp(self):
+        """Create a session with a cache."""
+        self.cache = DocMetaCache(maxsize=100)
+        self.docmeta_session = metadata.DocMetaSession('https://asdf.com/',
+                                                       cache=self.cache)
+        self.ids = [f'1602.{i:05d}' for i in range(4)]
+
+    @mock.patch('search.services.metadata.requests.Session.get')
+    def test_retrieve(self, mock_get):
+        """A paper is only requested once."""
+        response = mock.MagicMock(status_code=200)
+        response.json.return_value = {'paper_id': '1602.00123', 'version': 2,
+                                      'latest_version': 2}
+        mock_get.return_value = response
+        self.assertEqual(
+            self.docmeta_session.retrieve('1602.00123').version, 2
+        )
+        self.assertEqual(
+            self.docmeta_session.retrieve('1602.00123v2').version, 2
+        )
+        self.assertEqual(mock_get.call_count, 1)
+
+    @mock.patch('search.services.metadata.requests.Session.get')
+    def test_bulk_retrieve(self, mock_get):
+        """Only papers that are not cached are requested, in input order."""
+        mock_get.side_effect = \
+            lambda target, **kwargs: TestBulkRetrieve._respond(target)
+        self.docmeta_session.bulk_retrieve(self.ids[1:3])
+        data = self.docmeta_session.bulk_retrieve(self.ids)
+        self.assertEqual([dm.paper_id for dm in data], self.ids)
+        args, _ = mock_get.call_args
+        self.assertEqual(args[0], 'https://asdf.com/docmeta_bulk'
+                                  '?id=1602.00000&id=1602.00003')
+
+    @mock.patch('search.services.metadata.requests.Session.get')
+    def test_iter_bulk_retrieve(self, mock_get):
+        """Cached papers are yielded without being requested."""
+        mock_get.side_effect = \
+            lambda target, **kwargs: TestBulkRetrieve._respond(target)
+        list(self.docmeta_session.iter_bulk_retrieve(self.ids))
+        data = list(self.docmeta_session.iter_bulk_retrieve(self.ids))
+        self.assertEqual(sorted(dm.paper_id for dm in data), self.ids)
+        self.assertEqual(mock_get.call_count, 1)
+
+
+class TestIterJSONArray(unittest.TestCase):
+    """Tests for :func:`.metadata._iter_json_array`."""
+
+    def test_chunk_boundaries(self):
+        """Elements are parsed regardless of where chunks are split."""
+        data = [{'paper_id': '1602.00123', 'title': 'Caf\u00e9 \u2713'},
+                12345, 'foo', None, [1.5, True]]
+        raw = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        for size in [1, 2, 7, len(raw)]:
+            chunks = [raw[i:i + size] for i in range(0, len(raw), size)]
+            self.assertEqual(list(metadata._iter_json_array(chunks)), data)
+
+    def test_not_an_array(self):
+        """A JSON document that is not an array is rejected."""
+        with self.assertRaises(json.decoder.JSONDecodeError):
+            list(metadata._iter_json_array([b'{"paper_id": "foo"}']))
@@ -0,0 +1,160 @@
+"""Tests for the :mod:`asgi` entry-point."""
+
+import asyncio
+import json
+from typing import Any, Dict, List
+from unittest import TestCase, mock
+
+import asgi
+from search import config
+from search.context import get_application_config
+from search.domain import DocumentSet
+from search.services.index import IndexConnectionError
+
+
+def _call(scope: Dict[str, Any],
+          messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Run the application on ``scope``, and get the messages it sends."""
+    received = iter(messages)
+    sent: List[Dict[str, Any]] = []
+
+    async def receive() -> Dict[str, Any]:
+        return next(received)
+
+    async def send(message: Dict[str, Any]) -> None:
+        sent.append(message)
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(asgi.application(scope, receive, send))
+    finally:
+        loop.close()
+    return sent
+
+
+def _http(method: str = 'GET', path: str = '/',
+          query_string: bytes = b'') -> Dict[str, Any]:
+    return {'type': 'http', 'method': method, 'path': path,
+            'query_string': query_string}
+
+
+class TestHTTP(TestCase):
+    """Simple searches are served as JSON."""
+
+    def setUp(self):
+        """Provide a session that returns no results."""
+        async def search(query):
+            return DocumentSet(metadata={'total': 0}, results=[])
+
+        self.session = mock.MagicMock()
+        self.session.search.side_effect = search
+        patcher = mock.patch.object(asgi, 'get_session',
+                                    return_value=self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_search(self):
+        """The results of the search are in the body of the response."""
+        start, body = _call(_http(query_string=b'searchtype=all&query=foo'),
+                            [])
+        self.assertEqual(start['status'], 200)
+        self.assertEqual(json.loads(body['body']),
+                         {'metadata': {'total': 0}, 'results': []})
+        self.assertEqual(self.session.search.call_count, 1)
+
+    def test_head(self):
+        """The response to a HEAD request has headers but no body."""
+        start, body = _call(
+            _http('HEAD', query_string=b'searchtype=all&query=foo'), []
+        )
+        get_start, get_body = _call(
+            _http(query_string=b'searchtype=all&query=foo'), []
+        )
+        self.assertEqual(start, get_start)
+        self.assertEqual(body['body'], b'')
+
+    def test_not_found(self):
+        """Other paths are not found."""
+        start, _ = _call(_http(path='/foo'), [])
+        self.assertEqual(start['status'], 404)
+
+    def test_method_not_allowed(self):
+        """Only GET and HEAD are supported."""
+        start, _ = _call(_http('POST'), [])
+        self.assertEqual(start['status'], 405)
+
+    def test_invalid_query(self):
+        """Invalid search parameters are a bad request."""
+        start, _ = _call(_http(query_string=b'searchtype=foo&query=bar'), [])
+        self.assertEqual(start['status'], 400)
+        self.assertEqual(self.session.search.call_count, 0)
+
+    def test_invalid_page(self):
+        """Invalid pagination parameters are a bad request."""
+        for params in (b'start=abc', b'start=-1', b'size=abc', b'size=0',
+                       b'size=51'):
+            query_string = b'searchtype=all&query=foo&' + params
+            start, body = _call(_http(query_string=query_string), [])
+            self.assertEqual(start['status'], 400, params)
+        self.assertEqual(self.session.search.call_count, 0)
+
+    def test_page(self):
+        """A valid page of results is requested."""
+        _call(_http(query_string=b'searchtype=all&query=foo&start=100'
+                                 b'&size=100'), [])
+        (query,), _ = self.session.search.call_args
+        self.assertEqual((query.page_start, query.page_size), (100, 100))
+
+
+class TestOtherScopes(TestCase):
+    """Scopes other than ``http`` are handled as servers expect."""
+
+    def setUp(self):
+        """Reset the session for this worker process."""
+        asgi.__session__ = None
+        self.addCleanup(setattr, asgi, '__session__', None)
+
+    @mock.patch.object(asgi, 'get_async_session')
+    def test_lifespan(self, mock_get_session):
+        """The session is created at startup, and closed at shutdown."""
+        async def close():
+            pass
+
+        mock_get_session.return_value.close.side_effect = close
+        sent = _call({'type': 'lifespan'},
+                     [{'type': 'lifespan.startup'},
+                      {'type': 'lifespan.shutdown'}])
+        self.assertEqual([message['type'] for message in sent],
+                         ['lifespan.startup.complete',
+                          'lifespan.shutdown.complete'])
+        self.assertEqual(mock_get_session.return_value.close.call_count, 1)
+        self.assertIsNone(asgi.__session__)
+
+    @mock.patch.object(asgi, 'get_async_session')
+    def test_lifespan_startup_failed(self, mock_get_session):
+        """Startup fails if the session cannot be created."""
+        mock_get_session.side_effect = IndexConnectionError('nope')
+        sent = _call({'type': 'lifespan'}, [{'type': 'lifespan.startup'}])
+        self.assertEqual(sent, [{'type': 'lifespan.startup.failed',
+                                 'message': 'nope'}])
+
+    @mock.patch.object(config, 'ELASTICSEARCH_HOST', 'es.example.org')
+    @mock.patch.object(asgi, 'get_async_session')
+    def test_config(self, mock_get_session):
+        """The session is configured from :mod:`search.config`."""
+        self.assertIs(asgi.get_session(), mock_get_session.return_value)
+        (app_config,), _ = mock_get_session.call_args
+        self.assertEqual(app_config['ELASTICSEARCH_HOST'], 'es.example.org')
+        self.assertEqual(
+            get_application_config(app_config)['ELASTICSEARCH_HOST'],
+            'es.example.org'
+        )
+
+    def test_websocket(self):
+        """WebSocket connections are closed."""
+        sent = _call({'type': 'websocket'}, [{'type': 'websocket.connect'}])
+        self.assertEqual(sent, [{'type': 'websocket.close', 'code': 1003}])
+
+    def test_unknown(self):
+        """Unknown scopes are ignored."""
+        self.assertEqual(_call({'type': 'foo'}, []), [])
@@ -0,0 +1,75 @@
+"""Tests for the :mod:`wsgi` entry-point."""
+
+import importlib
+import os
+from unittest import TestCase, mock
+
+from search import config
+import wsgi
+
+
+class TestApplication(TestCase):
+    """The app should be built once per worker process."""
+
+    def setUp(self):
+        """Reset the cached application."""
+        wsgi.__flask_app__ = None
+        wsgi.__flask_config__ = None
+
+    @mock.patch.dict(os.environ, {})
+    @mock.patch('wsgi.create_ui_web_app')
+    def test_app_is_reused(self, mock_create):
+        """The app is not rebuilt for subsequent requests."""
+        environ = {'ELASTICSEARCH_INDEX': 'arxiv', 'PATH_INFO': '/'}
+        wsgi.application(environ, mock.MagicMock())
+        environ = {'ELASTICSEARCH_INDEX': 'arxiv', 'PATH_INFO': '/advanced',
+                   'HTTP_USER_AGENT': 'foo'}
+        wsgi.application(environ, mock.MagicMock())
+        self.assertEqual(mock_create.call_count, 1)
+        self.assertEqual(mock_create.return_value.call_count, 2)
+
+    @mock.patch.dict(os.environ, {})
+    @mock.patch('wsgi.create_ui_web_app')
+    def test_app_is_rebuilt_on_config_change(self, mock_create):
+        """The app is rebuilt if a configuration variable changes."""
+        wsgi.application({'ELASTICSEARCH_INDEX': 'arxiv'}, mock.MagicMock())
+        wsgi.application({'ELASTICSEARCH_INDEX': 'arxiv2'}, mock.MagicMock())
+        self.assertEqual(mock_create.call_count, 2)
+
+    @mock.patch.dict(os.environ, {})
+    @mock.patch('wsgi.create_ui_web_app')
+    def test_app_is_reused_on_other_change(self, mock_create):
+        """Variables that are not read by the config are ignored."""
+        environ = {'ELASTICSEARCH_INDEX': 'arxiv', 'UNIQUE_ID': 'abc'}
+        wsgi.application(environ, mock.MagicMock())
+        environ = {'ELASTICSEARCH_INDEX': 'arxiv', 'UNIQUE_ID': 'def'}
+        wsgi.application(environ, mock.MagicMock())
+        self.assertEqual(mock_create.call_count, 1)
+        self.assertNotIn('UNIQUE_ID', os.environ)
+
+    def test_config_variables(self):
+        """Variables read by the config are recognized."""
+        self.assertTrue(wsgi.is_config_variable('ELASTICSEARCH_INDEX'))
+        self.assertTrue(
+            wsgi.is_config_variable('ELASTICSEARCH_PORT_443_PROTO')
+        )
+        self.assertTrue(wsgi.is_config_variable('DEBUG'))
+        self.assertFalse(wsgi.is_config_variable('REMOTE_ADDR'))
+        self.assertFalse(wsgi.is_config_variable('SERVER_NAME'))
+
+    def test_all_config_variables(self):
+        """Every variable that the config reads is recognized."""
+        read = set()
+
+        class Environ(dict):
+            def get(self, key, default=None):
+                read.add(key)
+                return super().get(key, default)
+
+        with mock.patch.object(os, 'environ', Environ(os.environ)):
+            importlib.reload(config)
+        importlib.reload(config)
+        self.assertIn('ELASTICSEARCH_SERVICE_HOST', read)
+        self.assertEqual(
+            {key for key in read if not wsgi.is_config_variable(key)}, set()
+        )
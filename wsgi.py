@@ -1,13 +1,74 @@
 """Web Server Gateway Interface entry-point."""
 
-from search.factory import create_ui_web_app
+from typing import Optional, Tuple
 import os
 
+from flask import Flask
+from search.factory import create_ui_web_app
 
-def application(environ, start_response):
-    """WSGI application factory."""
-    for key, value in environ.items():
-        if type(value) is str:
+__flask_app__: Optional[Flask] = None
+"""The application instance for this worker process."""
+
+__flask_config__: Optional[Tuple[Tuple[str, str], ...]] = None
+"""Configuration variables that were in effect when the app was built."""
+
+CONFIG_PREFIXES = (
+    'AWS_', 'ELASTICSEARCH_', 'FLASKS3_', 'FULLTEXT_', 'KINESIS_',
+    'METADATA_', 'SEARCH_'
+)
+"""
+Prefixes of the configuration variables read by :mod:`search.config`.
+
+These cover the variables for each service, including those set by the
+deployment under other names (e.g. ``ELASTICSEARCH_SERVICE_HOST``).
+"""
+
+CONFIG_NAMES = frozenset({
+    'APPLICATION_ROOT', 'DEBUG', 'EXPLAIN_TEMPLATE_LOADING', 'JSON_AS_ASCII',
+    'JSONIFY_MIMETYPE', 'LOGFILE', 'LOGGER_HANDLER_POLICY', 'LOGGER_NAME',
+    'LOGLEVEL', 'MAX_CONTENT_LENGTH', 'PREFERRED_URL_SCHEME',
+    'PRESERVE_CONTEXT_ON_EXCEPTION', 'PROPAGATE_EXCEPTIONS',
+    'SEND_FILE_MAX_AGE_DEFAULT', 'TEMPLATES_AUTO_RELOAD', 'TESTING',
+    'TRAP_BAD_REQUEST_ERRORS', 'TRAP_HTTP_EXCEPTIONS', 'USE_X_SENDFILE'
+})
+"""Other configuration variables read by :mod:`search.config`."""
+
+
+def is_config_variable(key: str) -> bool:
+    """
+    Determine whether ``key`` names a configuration variable.
+
+    Nothing else in the WSGI environ is configuration, so it is not copied to
+    the environment, and changes to it do not trigger a rebuild.
+    """
+    return key in CONFIG_NAMES or key.startswith(CONFIG_PREFIXES)
+
+
+def _config_from_environ(environ: dict) -> Tuple[Tuple[str, str], ...]:
+    """Extract configuration variables passed by the server in ``environ``."""
+    return tuple(sorted(
+        (key, value) for key, value in environ.items()
+        if type(value) is str and is_config_variable(key)
+    ))
+
+
+def get_application(environ: dict) -> Flask:
+    """
+    Get the application instance for this worker process.
+
+    The app is built on the first request handled by the worker, and is only
+    rebuilt if the configuration passed in the WSGI environ changes.
+    """
+    global __flask_app__, __flask_config__
+    config = _config_from_environ(environ)
+    if __flask_app__ is None or config != __flask_config__:
+        for key, value in config:
             os.environ[key] = value
-    app = create_ui_web_app()
-    return app(environ, start_response)
+        __flask_app__ = create_ui_web_app()
+        __flask_config__ = config
+    return __flask_app__
+
+
+def application(environ, start_response):
+    """WSGI application, built once per worker process."""
+    return get_application(environ)(environ, start_response)